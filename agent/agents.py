@@ -8,7 +8,13 @@ class LoopAgent(dspy.Signature):
     -   src_base: slot-annotated C source code (contains @slot markers)
     -   loop_dirs_curr: the current loop directive configuration (one entry per slot)
     -   feedback_curr: synthesis feedback produced when compiling loop_dirs_curr
-        (status/reason/info/warnings/counts/qor)
+        (status/reason/counts/qor, where qor["pipelines"] gives the achieved vs
+        target II of each pipelined loop, plus the synthesis messages either
+        summarized per loop label under "loops"/"messages" or as raw info/warnings
+        excerpts; with an archive, "elites" lists the best configurations found so
+        far for this kernel with their latency and utilization; with low-fidelity
+        screening, "front_end" holds the instruction count after each front-end
+        phase, and a design rejected by the screen has "fidelity": "low")
 
     Your task is to produce loop_dirs_next: the next directive configuration to try.
 
@@ -17,7 +23,7 @@ class LoopAgent(dspy.Signature):
     -   If feedback_curr["status"] is "killed" or "failed":
         Prioritize feasibility/legality. Make the smallest set of changes needed
         to eliminate the failure mode, even if performance is worse.
-        Use feedback_curr["reason"], info, warnings, and counts to decide what to change.
+        Use feedback_curr["reason"], loops/messages (or info/warnings), and counts to decide what to change.
 
     -   If feedback_curr["status"] is "completed":
         Optimize performance (reduce latency_cycles) while keeping directives conservative.
@@ -25,6 +31,10 @@ class LoopAgent(dspy.Signature):
         adjust directives to reduce those warnings in the next turn (e.g., relax II, change pipeline location,
         reduce/remove unroll).
 
+    -   If feedback_curr contains "elites":
+        These configurations are known to synthesize with the listed QoR. Build on them
+        rather than re-proposing one of them unchanged.
+
     IMPORTANT OPTIMIZATION GUIDELINES:
     ----------------------------------
     -   Optimization pragmas are powerful and must be applied conservatively.
@@ -96,7 +106,7 @@ class LoopAgent(dspy.Signature):
 
     src_base: str = dspy.InputField(desc="Slot-annotated C source (contains @slot markers; canonical source, not rendered with pragmas).")
     loop_dirs_curr: list = dspy.InputField(desc="Current loop directives (if any).")
-    feedback_curr: dict = dspy.InputField(desc="Synthesis feedback for loop_dirs_curr (status/reason/info/warnings/counts/qor).")
+    feedback_curr: dict = dspy.InputField(desc="Synthesis feedback for loop_dirs_curr (status/reason/counts/qor, loops/messages or info/warnings, optional elites/front_end).")
     loop_dirs_next: list = dspy.OutputField(desc="Proposed loop directives.")
 
 
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+def canonical_dirs(loop_dirs: list) -> list:
+    """
+    loop_dirs without the no-op entries, ordered by slot: two directive sets that
+    render the same source are the same configuration.
+    """
+    return sorted(
+        (d for d in loop_dirs or [] if d.get("pragma") in ("pipeline", "unroll")),
+        key=lambda d: str(d.get("slot")),
+    )
+
+def config_hash(loop_dirs: list) -> str:
+    text = json.dumps(canonical_dirs(loop_dirs), sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def thresholds_key(thresholds: dict | None) -> str:
+    return json.dumps(thresholds, sort_keys=True, default=str)
+
+
+class EliteArchive:
+    """
+    Best and known-bad directive configurations per kernel, shared by all
+    trajectories of a run (and, with path, persisted as JSONL for later runs).
+
+    Completed designs compete for the size elite places of their kernel (lowest
+    latency first); configurations killed for a design reason (count thresholds,
+    static screen; not time budgets, which depend on host load) are known bad,
+    but only under the thresholds they were killed with: a run with other kill
+    thresholds synthesizes them again.
+    Trajectories seed from the best elite, show the prompt_top best ones to the
+    agent and skip known-bad configurations without synthesizing them.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        size: int = 8,
+        prompt_top: int = 3,
+        seed: bool = True,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.size = size
+        self.prompt_top = prompt_top
+        self.seed = seed
+        self.elites = {}  # kernel -> [entry, ...] by latency
+        self.bad = {}  # kernel -> {(config hash, thresholds): kill reason}
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._insert(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # torn last line of an interrupted run
+
+    def _insert(self, entry: dict) -> bool:
+        kernel = entry["kernel"]
+        if entry["kind"] == "bad":
+            bad = self.bad.setdefault(kernel, {})
+            key = (entry["hash"], thresholds_key(entry.get("thresholds")))
+            if key in bad:
+                return False
+            bad[key] = entry["kill"]
+            return True
+
+        elites = self.elites.setdefault(kernel, [])
+        if any(e["hash"] == entry["hash"] for e in elites):
+            return False
+        if len(elites) >= self.size and entry["latency_cycles"] >= elites[-1]["latency_cycles"]:
+            return False
+        elites.append(entry)
+        elites.sort(key=lambda e: e["latency_cycles"])
+        del elites[self.size:]
+        return True
+
+    def add(
+        self,
+        kernel: str,
+        loop_dirs: list,
+        status: dict,
+        qor: dict | None,
+        feedback: dict | None = None,
+        thresholds: dict | None = None,
+    ) -> bool:
+        """
+        Offer an evaluated configuration; returns True if the archive changed.
+        thresholds are the kill limits in effect (see known_bad).
+        """
+        kill = status.get("kill") or {}
+        if status["status"] == "completed" and qor and qor.get("latency_cycles") is not None:
+            entry = {
+                "kind": "elite",
+                "latency_cycles": qor["latency_cycles"],
+                "qor": qor,
+                "feedback": dict(feedback) if feedback else None,
+            }
+        elif status["status"] == "killed" and kill and not kill.get("timed") and kill.get("policy") != "archive":
+            entry = {"kind": "bad", "kill": kill, "thresholds": thresholds}
+        else:
+            return False
+        entry.update(kernel=kernel, hash=config_hash(loop_dirs), loop_dirs=loop_dirs)
+
+        with self._lock:
+            changed = self._insert(entry)
+            if changed and self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+        return changed
+
+    def best(self, kernel: str) -> dict | None:
+        with self._lock:
+            elites = self.elites.get(kernel)
+            return dict(elites[0]) if elites else None
+
+    def known_bad(
+        self,
+        kernel: str,
+        loop_dirs: list,
+        thresholds: dict | None = None,
+    ) -> dict | None:
+        """
+        Kill reason recorded for this configuration, if it is known to fail under
+        the same kill thresholds.
+        """
+        with self._lock:
+            return self.bad.get(kernel, {}).get((config_hash(loop_dirs), thresholds_key(thresholds)))
+
+    def prompt_entries(self, kernel: str) -> list:
+        """
+        The prompt_top best configurations of kernel, compact for the agent prompt.
+        """
+        with self._lock:
+            elites = list(self.elites.get(kernel, [])[:self.prompt_top])
+        return [
+            {
+                "loop_dirs": e["loop_dirs"],
+                "qor": {k: v for k, v in e["qor"].items() if k == "latency_cycles" or k.endswith("_util")},
+            }
+            for e in elites
+        ]
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark of log classification throughput (lines/second).
+
+Compares the original seven-regex chain against LogClassifier on a recorded
+vitis_hls log (e.g. an EP_*/logs/*.log of a large unroll), or on a synthetic log
+with a realistic message mix when no log is given:
+
+    python bench_logparse.py [--log path/to/run.log] [--lines 200000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+
+from log_classifier import LOOP_LABEL_PAT, default_classifier
+
+LEGACY_PATTERNS = [
+    ("instr_count_compile", re.compile(r"INFO:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the 'Compile/Link' phase of compilation")),
+    ("instr_count_warn", re.compile(r"WARNING:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the '([^']+)' phase of compilation")),
+    ("implied_unroll", re.compile(rf"INFO:\s*\[HLS 214-291\].*Loop '{LOOP_LABEL_PAT}' is marked as complete unroll implied by the pipeline pragma")),
+    ("complete_unroll_factor", re.compile(rf"INFO:\s*\[HLS 214-186\].*Unrolling loop '{LOOP_LABEL_PAT}'.*completely with a factor of (\d+)")),
+    ("ii_mem_port_violation", re.compile(r"WARNING:\s*\[HLS 200-885\].*II Violation.*limited memory ports")),
+    ("ii_loop_dep_violation", re.compile(r"WARNING:\s*\[HLS 200-880\].*II Violation.*carried dependence constraint")),
+    ("pipe_result", re.compile(r"INFO:\s*\[HLS 200-1470\].*Pipelining result\s*:\s*Target II\s*=\s*(\d+),\s*Final II\s*=\s*(\d+),\s*Depth\s*=\s*(\d+)")),
+]
+
+def legacy_classify(line: str):
+    for name, pattern in LEGACY_PATTERNS:
+        if pattern.search(line):
+            return {"type": name, "message": line.strip()}
+    return None
+
+# (weight, template) pairs loosely following the mix seen in large-unroll logs
+SYNTHETIC_MIX = [
+    (40, "INFO: [HLS 214-186] Unrolling loop 'L{a}' (../kernel.c:{b}:{c}) in function 'kernel' completely with a factor of {d} (../kernel.c:{b}:{c})"),
+    (20, "INFO: [HLS 214-131] Inlining function 'f{a}' into 'kernel' (../kernel.c:{b}:{c})"),
+    (10, "INFO: [HLS 200-885] The II Violation in module 'kernel_Pipeline_L{a}' (loop 'L{a}'): Unable to schedule 'load' operation on array 'A' due to limited memory ports."),
+    (10, "WARNING: [HLS 200-885] The II Violation in module 'kernel_Pipeline_L{a}' (loop 'L{a}'): Unable to schedule 'load' operation 0 bit ('A_load_{b}') on array 'A' due to limited memory ports (II = {c})."),
+    (8, "INFO: [SCHED 204-61] Pipelining loop 'L{a}'."),
+    (5, "INFO: [HLS 200-1470] Pipelining result : Target II = 1, Final II = {d}, Depth = {b}, loop 'L{a}'"),
+    (4, "INFO: [HLS 200-111] Finished Architecture Synthesis: CPU user time: {c}.{d} seconds. Elapsed time: {b} seconds; current allocated memory: {a}.000 MB."),
+    (2, "WARNING: [HLS 200-880] The II Violation in module 'kernel' (loop 'L{a}'): Unable to enforce a carried dependence constraint (II = 1, distance = 1, offset = 1) between 'store' operation and 'load' operation."),
+    (1, "INFO: [HLS 200-1995] There were {b},{c:03d} instructions in the design after the 'Compile/Link' phase of compilation. See the Design Size Report for more details: report/csynth_design_size.rpt"),
+    (30, "   {a}  |  {b}  |  {c}  | {d} |"),
+]
+
+def synthetic_log(n_lines: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    weights = [w for w, _ in SYNTHETIC_MIX]
+    templates = [t for _, t in SYNTHETIC_MIX]
+    lines = []
+    for template in rng.choices(templates, weights=weights, k=n_lines):
+        lines.append(template.format(
+            a=rng.randrange(10), b=rng.randrange(1000), c=rng.randrange(100), d=rng.randrange(1, 64),
+        ) + "\n")
+    return lines
+
+def throughput(classify, lines: list, repeat: int) -> tuple:
+    best = float("inf")
+    hits = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = 0
+        for line in lines:
+            if classify(line) is not None:
+                hits += 1
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best, hits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--log", type=Path, default=None, help="recorded vitis_hls log (default: synthetic)")
+    parser.add_argument("--lines", type=int, default=200_000, help="synthetic log length")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.log is not None:
+        lines = args.log.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+        source = str(args.log)
+    else:
+        lines = synthetic_log(args.lines)
+        source = "synthetic"
+
+    classifier = default_classifier()
+
+    # both engines must agree line by line (on the classes the legacy chain knows)
+    # before their speed means anything
+    legacy_types = {name for name, _ in LEGACY_PATTERNS}
+    for line in lines:
+        new = classifier.classify(line)
+        old = legacy_classify(line)
+        new_type = new["type"] if new is not None and new["type"] in legacy_types else None
+        assert new_type == (old and old["type"]), line
+
+    legacy_lps, _ = throughput(legacy_classify, lines, args.repeat)
+    table_lps, table_hits = throughput(classifier.classify, lines, args.repeat)
+
+    print(f"log: {source} ({len(lines):,} lines, {table_hits:,} classified)")
+    print(f"legacy regex chain : {legacy_lps:>12,.0f} lines/s")
+    print(f"LogClassifier      : {table_lps:>12,.0f} lines/s ({table_lps / legacy_lps:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Benchmarks of the orchestration around the LM and vitis_hls, runnable on any Linux
+box: trajectories over the kernels of sources_BASE run against the replayed (or,
+without a recording, synthetic) LM and fake_vitis_hls.py.
+
+    python bench_orchestration.py [--recording DIR] [--kernels ...] [--bench overhead logparse kill scaling]
+
+overhead  time per synthesized design spent outside the LM, vitis_hls and slot waits
+logparse  log lines/s through Trajectory.synthesize_design (pipe, classifier, sink,
+          kill monitor) next to the bare LogClassifier
+kill      delay between the line that trips a count threshold (or the end of a
+          wall-clock budget) and the end of the killed run
+scaling   makespan of all kernels against --jobs at a fixed synthesis time and LM latency
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_logparse import synthetic_log, throughput
+from episode import Trajectory
+from kill_policy import DEFAULT_KILL_CONFIG
+from log_classifier import default_classifier
+from replay import Recording
+from run import kernel_top_map
+from scheduler import run_episode
+from telemetry import Telemetry
+
+FAKE_HLS = Path(__file__).resolve().parent / "fake_vitis_hls.py"
+NO_COUNT_KILLS = {"counts": {key: None for key in DEFAULT_KILL_CONFIG["counts"]}}
+TRIGGER = "WARNING: [HLS 200-885] The II Violation in module 'kernel_Pipeline_L0' (loop 'L0'): Unable to schedule 'load' operation on array 'A' due to limited memory ports (II = 1).\n"
+
+@contextlib.contextmanager
+def fake_env(**env):
+    """
+    Set FAKE_HLS_* variables for the fake tool (inherited by every launch).
+    """
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update({k: str(v) for k, v in env.items() if v is not None})
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+@contextlib.contextmanager
+def quiet():
+    # trajectories pprint every turn
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def run_kernels(
+    kernels: list,
+    recording: Recording,
+    run_dir: Path,
+    jobs: int,
+    **traj_kwargs,
+) -> tuple:
+    """
+    One trajectory per kernel; returns (makespan, telemetry summary).
+    """
+    telemetry = Telemetry(run_dir / "telemetry.jsonl")
+    start = time.perf_counter()
+    with quiet():
+        results = run_episode(
+            episode_no=0,
+            kernel_top_map={k: kernel_top_map[k] for k in kernels},
+            max_jobs=jobs,
+            run_dir=run_dir,
+            telemetry=telemetry,
+            hls_command=[sys.executable, str(FAKE_HLS)],
+            replay=recording,
+            **traj_kwargs,
+        )
+    makespan = time.perf_counter() - start
+    telemetry.close()
+    failed = [k for k, err in results.items() if err is not None]
+    if failed:
+        raise RuntimeError(f"trajectories failed: {failed}\n{results[failed[0]]}")
+    return makespan, telemetry.summary()
+
+def bench_overhead(args, recording: Recording, tmp: Path) -> dict:
+    with fake_env(FAKE_HLS_SPEED=0):
+        makespan, summary = run_kernels(args.kernels, recording, tmp / "overhead", jobs=args.jobs or os.cpu_count())
+
+    def seconds(span):
+        return summary.get(span, {}).get("seconds", 0.0)
+
+    designs = summary["hls"]["count"]
+    outside = seconds("trajectory") - seconds("llm") - seconds("hls") - seconds("synth_slot_wait")
+    return {
+        "kernels": len(args.kernels),
+        "designs": designs,
+        "makespan_s": round(makespan, 3),
+        "overhead_ms_per_design": round(1000 * outside / designs, 3),
+        "breakdown_ms_per_design": {
+            span: round(1000 * seconds(span) / designs, 3)
+            for span in ("render", "report_parse", "file_move", "hls", "llm")
+        },
+    }
+
+def bench_logparse(args, recording: Recording, tmp: Path) -> dict:
+    lines = []
+    if args.recording is not None:
+        for log in sorted((Path(args.recording) / "synth").glob("*.log.gz")):
+            with gzip.open(log, "rt", encoding="utf-8") as f:
+                lines += [record.split("\t", 1)[1] for record in f]
+    if not lines:
+        lines = synthetic_log(args.lines)
+    log_path = tmp / "logparse.log"
+    log_path.write_text("".join(lines), encoding="utf-8")
+
+    kernel = args.kernels[0]
+    traj = Trajectory(
+        work_dir=tmp / "logparse",
+        hls_command=[sys.executable, str(FAKE_HLS)],
+        kill_config=NO_COUNT_KILLS,  # every line must go through
+        log_compression="gzip",
+    )
+    src = Path(tmp / "logparse/EP_0/sources" / f"{kernel}_0_0.c")
+    src.parent.mkdir(parents=True, exist_ok=True)
+    src.write_text("void f() {}\n", encoding="utf-8")
+
+    rates = []
+    with fake_env(FAKE_HLS_LOG=log_path):
+        for r in range(args.repeat):
+            start = time.perf_counter()
+            with quiet():
+                status = traj.synthesize_design(episode_no=0, turn_no=f"0_{r}", kernel=kernel, top_fxn=kernel_top_map[kernel])
+            assert status["status"] == "completed", status
+            rates.append(len(lines) / (time.perf_counter() - start))
+    classifier_lps, hits = throughput(default_classifier().classify, lines, args.repeat)
+    return {
+        "lines": len(lines),
+        "classified": hits,
+        "synthesize_design_lines_per_s": round(max(rates)),
+        "classifier_lines_per_s": round(classifier_lps),
+    }
+
+def bench_kill(args, recording: Recording, tmp: Path) -> dict:
+    kernel = args.kernels[0]
+    log_path = tmp / "kill.log"
+    filler = [line for line in synthetic_log(5000) if "[HLS 200-885]" not in line]
+    log_path.write_text("".join(filler) + TRIGGER * 3, encoding="utf-8")
+
+    def reactions(kill_config: dict, log: Path | str, trigger_t) -> list:
+        traj = Trajectory(
+            work_dir=tmp / "kill",
+            hls_command=[sys.executable, str(FAKE_HLS)],
+            kill_config=kill_config,
+        )
+        src = tmp / "kill/EP_0/sources" / f"{kernel}_0_0.c"
+        src.parent.mkdir(parents=True, exist_ok=True)
+        src.write_text("void f() {}\n", encoding="utf-8")
+
+        delays = []
+        with fake_env(FAKE_HLS_LOG=log, FAKE_HLS_SLEEP=60):
+            for r in range(args.repeat):
+                start = time.perf_counter()
+                with quiet():
+                    status = traj.synthesize_design(episode_no=0, turn_no=f"0_{r}", kernel=kernel, top_fxn=kernel_top_map[kernel])
+                elapsed = time.perf_counter() - start
+                assert status["status"] == "killed", status
+                delays.append(elapsed - trigger_t(tmp / f"kill/EP_0/logs/{kernel}_0_0_{r}.log.events.jsonl"))
+        return delays
+
+    def last_event_t(events_path: Path) -> float:
+        # offset of the event that tripped the threshold, relative to the start of the run
+        events = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines()]
+        return [e["t"] for e in events if e["type"] != "status"][-1]
+
+    count_kill = reactions({}, log_path, last_event_t)
+    wall_clock_kill = reactions({**NO_COUNT_KILLS, "wall_clock_s": 1.0}, "", lambda _: 1.0)
+
+    def stats(delays):
+        return {"median_ms": round(1000 * statistics.median(delays), 1), "max_ms": round(1000 * max(delays), 1)}
+
+    return {"count_threshold": stats(count_kill), "wall_clock_budget": stats(wall_clock_kill)}
+
+def bench_scaling(args, recording: Recording, tmp: Path) -> dict:
+    recording.synthetic_latency_s = args.lm_latency
+    rows = []
+    with fake_env(FAKE_HLS_SLEEP=args.synth_time, FAKE_HLS_SPEED=1):
+        for jobs in args.scaling_jobs:
+            makespan, summary = run_kernels(args.kernels, recording, tmp / f"scaling_{jobs}", jobs=jobs)
+            rows.append({
+                "jobs": jobs,
+                "makespan_s": round(makespan, 3),
+                "designs": summary["hls"]["count"],
+                "slot_wait_s": round(summary.get("synth_slot_wait", {}).get("seconds", 0.0), 3),
+            })
+    recording.synthetic_latency_s = 0.0
+    for row in rows:
+        row["speedup"] = round(rows[0]["makespan_s"] / row["makespan_s"], 2)
+        row["efficiency"] = round(row["speedup"] * rows[0]["jobs"] / row["jobs"], 2)
+    return {"synth_time_s": args.synth_time, "lm_latency_s": args.lm_latency, "runs": rows}
+
+BENCHMARKS = {
+    "overhead": bench_overhead,
+    "logparse": bench_logparse,
+    "kill": bench_kill,
+    "scaling": bench_scaling,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--recording", default=None, help="run.py --record directory (default: synthetic LM and reports)")
+    parser.add_argument("--kernels", nargs="+", default=list(kernel_top_map))
+    parser.add_argument("--jobs", type=int, default=None, help="vitis_hls slots of the overhead benchmark (default: cpu count)")
+    parser.add_argument("--lines", type=int, default=200_000, help="synthetic log length of the logparse benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--synth-time", type=float, default=0.05, help="seconds per fake synthesis in the scaling benchmark")
+    parser.add_argument("--lm-latency", type=float, default=0.02, help="seconds per synthetic LM call in the scaling benchmark")
+    parser.add_argument("--scaling-jobs", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--json", default=None, help="also write the results here")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_orchestration_") as tmp:
+        tmp = Path(tmp)
+        recording = Recording(args.recording if args.recording is not None else tmp / "no_recording")
+        replay_dir = str(Path(args.recording).resolve()) if args.recording is not None else None
+        with fake_env(FAKE_HLS_REPLAY=replay_dir):
+            for name in args.bench:
+                results[name] = BENCHMARKS[name](args, recording, tmp)
+                print(f"{name}: {json.dumps(results[name], indent=2)}", flush=True)
+
+    if args.json is not None:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
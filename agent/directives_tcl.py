@@ -0,0 +1,81 @@
+import functools
+import re
+
+from loop_analysis import COMMENT_RE
+from slot_template import unroll_factor
+
+FUNC_RE = re.compile(r"\b([A-Za-z_]\w*)\s*\([^;{}()]*(?:\([^()]*\)[^;{}()]*)*\)\s*\{")
+LOOP_LABEL_RE = re.compile(r"\b([A-Za-z_]\w*)\s*:\s*(?=for\b|while\b|do\b)")
+C_CONTROL = {"if", "for", "while", "switch", "do", "else", "return", "sizeof"}
+
+@functools.lru_cache(maxsize=128)
+def loop_locations(src: str) -> dict:
+    """
+    Directive location ("<function>/<label>") of every labeled loop in src.
+    """
+    text = COMMENT_RE.sub(lambda m: " " * len(m.group(0)), src)
+
+    # top-level function bodies: (name, body start, body end)
+    functions = []
+    depth = 0
+    i = 0
+    while i < len(text):
+        if depth == 0:
+            m = FUNC_RE.match(text, i) if text[i].isalpha() or text[i] == "_" else None
+            if m is not None and m.group(1) not in C_CONTROL and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] == "_")):
+                start = m.end() - 1
+                depth = 1
+                j = start + 1
+                while j < len(text) and depth:
+                    depth += {"{": 1, "}": -1}.get(text[j], 0)
+                    j += 1
+                functions.append((m.group(1), start, j))
+                i = j
+                continue
+        depth += {"{": 1, "}": -1}.get(text[i], 0)
+        i += 1
+
+    locations = {}
+    for name, start, end in functions:
+        for m in LOOP_LABEL_RE.finditer(text, start, end):
+            locations[m.group(1)] = f"{name}/{m.group(1)}"
+    return locations
+
+def directives_tcl(
+    src_base: str,
+    top_fxn: str,
+    loop_dirs: list,
+    mem_dirs: list | None = None,
+) -> tuple:
+    """
+    The set_directive_* equivalent of rendering loop_dirs and mem_dirs into the
+    source: pipeline/unroll directives on the slot's loop label, array partitions
+    on the top function. Returns (script, unknown slots).
+    """
+    locations = loop_locations(src_base)
+    lines = []
+    unknown = []
+    for d in loop_dirs or []:
+        pragma = d.get("pragma")
+        if pragma not in ("pipeline", "unroll"):
+            continue
+        label = d.get("slot", "").split("__")[-1]
+        if label not in locations:
+            unknown.append(d.get("slot"))
+            continue
+        params = d.get("params") or {}
+        if pragma == "pipeline":
+            lines.append(f'set_directive_pipeline -II {params.get("II", 1)} "{locations[label]}"')
+        else:
+            lines.append(f'set_directive_unroll -factor {unroll_factor(d)} "{locations[label]}"')
+
+    for d in mem_dirs or []:
+        assert d["pragma"] == "array_partition"
+        lines.append(
+            f"set_directive_array_partition "
+            f"-type {d.get('type')} "
+            f"-factor {d.get('factor')} "
+            f"-dim {d.get('dim')} "
+            f'"{top_fxn}" {d.get("variable")}'
+        )
+    return "\n".join(lines) + "\n", unknown
@@ -2,11 +2,39 @@ from pprint import pprint
 import dspy
 from pathlib import Path
 import subprocess
-import re
 import os
 import signal
+import threading
+import json
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from contextlib import nullcontext
 
 from agents import LoopAgent, MemoryAgent
+from synth_cache import SynthCache, tool_identity
+from log_classifier import LogClassifier, default_classifier
+from kill_policy import PHASE_ORDER, FrontEndDone, build_kill_monitor, kernel_kill_config, kill_reason
+from loop_analysis import analyze, screen
+from mem_partition import partition_directives
+from slot_template import compile_template
+from directives_tcl import directives_tcl
+from log_sink import LogSink
+from qor_report import attach_target_ii, load_report, summarize
+from surrogate import Surrogate
+from hls_worker import HLSWorkerPool
+from synth_queue import WORKER_LOST, QueuedJob, SynthQueue
+from mem_guard import MemoryGuard
+from retention import RetentionPolicy
+from journal import Journal
+from telemetry import PhaseClock, RSSSampler, Telemetry, lm_usage
+from replay import LogTap, Recording, RecordingAgent, ReplayAgent
+from lm_client import LMClient
+from feedback_summary import INSTR_RE, estimate_tokens, summarize_excerpts
+from archive import EliteArchive, config_hash
+from results_db import ResultsDB
+from turn_budget import TurnBudget
 
 MODEL = "openai/gpt-4.1-mini"
 # TEMP = 1
@@ -14,15 +42,140 @@ MODEL = "openai/gpt-4.1-mini"
 # MAX_TOKENS = 30000
 CACHE = False
 
+SYN_TCL = Path(__file__).resolve().parent / "syn.tcl"
+SYN_FRONTEND_TCL = Path(__file__).resolve().parent / "syn_frontend.tcl"
+SYN_FLOW_TCL = Path(__file__).resolve().parent / "syn_flow.tcl"
+SYN_MULTI_TCL = Path(__file__).resolve().parent / "syn_multi.tcl"
+
 class Trajectory(dspy.Module):
-    def __init__(self):
+    def __init__(
+        self,
+        work_dir: str | Path = ".",
+        synth_slots: threading.Semaphore | None = None,
+        mem_guard: MemoryGuard | None = None,
+        synth_cache: SynthCache | None = None,
+        log_classifier: LogClassifier | None = None,
+        kill_config: dict | None = None,
+        log_compression: str | None = None,
+        log_events: bool = True,
+        n_candidates: int = 1,
+        candidate_temperature: float = 1.0,
+        share_candidates: bool = False,
+        surrogate: Surrogate | None = None,
+        surrogate_keep: int | None = None,
+        mem_partition: str = "rules",
+        hls_command: list | None = None,
+        hls_workers: HLSWorkerPool | None = None,
+        synth_queue: SynthQueue | None = None,
+        directive_mode: str = "source",
+        retention: RetentionPolicy | None = None,
+        resume: bool = False,
+        telemetry: Telemetry | None = None,
+        record: Recording | None = None,
+        replay: Recording | None = None,
+        lm_client: LMClient | None = None,
+        rollout_id: int | str = 0,
+        feedback_budget: int | None = 1000,
+        archive: EliteArchive | None = None,
+        results_db: ResultsDB | None = None,
+        turn_budget: TurnBudget | None = None,
+        low_fidelity: bool = False,
+        lofi_until: str = PHASE_ORDER[-1],
+        lofi_max_instructions: int | None = None,
+    ):
         super().__init__()
+        # every path (EP_* dirs, vitis projects) is rooted here so that parallel
+        # trajectories never share a {kernel}_{episode}_{turn} project directory
+        self.work_dir = Path(work_dir)
+        # shared semaphore bounding the number of concurrent vitis_hls processes
+        self.synth_slots = synth_slots
+        # shared memory admission control and RSS watchdog of the local vitis_hls runs
+        self.mem_guard = mem_guard
+        # content-addressed store of previous synthesis results (optional)
+        self.synth_cache = synth_cache
+        # message classes extracted from the vitis_hls log stream
+        self.log_classifier = log_classifier or default_classifier()
+        # early-kill thresholds and time budgets (see kill_policy.DEFAULT_KILL_CONFIG)
+        self.kill_config = kill_config
+        # vitis_hls logs: None/"gzip"/"zstd", plus a JSONL sidecar of classified events
+        self.log_compression = log_compression
+        self.log_events = log_events
+        # directive sets proposed and synthesized per turn; the best one advances and,
+        # with share_candidates, the others are fed back as alternatives
+        self.n_candidates = n_candidates
+        self.candidate_temperature = candidate_temperature
+        self.share_candidates = share_candidates
+        # learned QoR model shared by all trajectories: every result trains it, and with
+        # several candidates per turn only the (at most surrogate_keep) ones predicted
+        # to beat the current best are synthesized
+        self.surrogate = surrogate
+        self.surrogate_keep = surrogate_keep
+        # "rules": derive array_partition directives from the array subscripts and ask
+        # the MemoryAgent only about what the rules cannot analyze; "llm": always ask it
+        if mem_partition not in ("rules", "llm"):
+            raise ValueError(f"unknown mem_partition {mem_partition!r}, expected 'rules' or 'llm'")
+        self.mem_partition = mem_partition
+        # vitis_hls executable (or a stand-in with the same interface); with hls_workers,
+        # jobs run on resident workers instead of one vitis_hls launch per turn
+        self.hls_command = hls_command or ["vitis_hls"]
+        self.hls_workers = hls_workers
+        # or they are queued for worker daemons on other build hosts (see synth_queue.py)
+        self.synth_queue = synth_queue
+        # "source": every candidate is a rewritten C file synthesized as its own project;
+        # "tcl": candidates are set_directive_* scripts over the unchanged base source,
+        # synthesized as the solutions of one project per turn (one-shot vitis_hls only)
+        if directive_mode not in ("source", "tcl"):
+            raise ValueError(f"unknown directive_mode {directive_mode!r}, expected 'source' or 'tcl'")
+        self.directive_mode = directive_mode
+        # where projects are built and what of them is kept in EP_*/results (default:
+        # build in work_dir, keep everything)
+        self.retention = retention or RetentionPolicy(keep="all")
+        # every finished turn is journaled to EP_*/journal.jsonl; with resume, forward
+        # continues after the last journaled turn instead of starting over
+        self.resume = resume
+        # timing/resource spans (LLM calls, rendering, vitis_hls runs and phases, report
+        # parsing, file moves); records nothing unless it has an output path
+        self.telemetry = telemetry or Telemetry()
+        # record LM responses and vitis_hls runs to a replay.Recording, or answer the
+        # agents from one (vitis_hls is replayed by fake_vitis_hls.py, see replay.py)
+        self.record = record
+        # every agent call goes through lm_client (shared concurrency cap, rate-limit
+        # backoff, optional response cache); rollout_id keeps the sampled candidates
+        # of parallel trajectories apart in the cache
+        self.lm_client = lm_client or LMClient()
+        self.rollout_id = rollout_id
+        # the log excerpts in the agent feedback are aggregated per loop label and
+        # trimmed to about feedback_budget tokens (None: raw excerpt lists)
+        self.feedback_budget = feedback_budget
+        # best and known-bad configurations per kernel shared by all trajectories:
+        # trajectories start from the best one, show the top ones to the agent and
+        # skip the known-bad ones without synthesizing them
+        self.archive = archive
+        # every journaled turn is also stored in this database (trajectory rollout_id)
+        self.results_db = results_db
+        # shared turn budget: stop on convergence, hand the unused turns to the
+        # trajectories that are still improving (None: always T turns)
+        self.turn_budget = turn_budget
+        # run every candidate through the front end first (syn_frontend.tcl, stopped
+        # after the lofi_until phase) and fully synthesize only those that pass it:
+        # no kill policy tripped and at most lofi_max_instructions instructions
+        self.low_fidelity = low_fidelity
+        self.lofi_until = lofi_until
+        self.lofi_max_instructions = lofi_max_instructions
         self.loop_agent = dspy.ChainOfThought(LoopAgent)
         self.memory_agent = dspy.ChainOfThought(MemoryAgent)
 
         lm = dspy.LM(model=MODEL, cache=CACHE)
         self.loop_agent.set_lm(lm)
         self.memory_agent.set_lm(lm)
+        self.lm_temperature = lm.kwargs.get("temperature")
+        
+        if replay is not None:
+            self.loop_agent = ReplayAgent(replay, "LoopAgent")
+            self.memory_agent = ReplayAgent(replay, "MemoryAgent")
+        elif record is not None:
+            self.loop_agent = RecordingAgent(self.loop_agent, record, "LoopAgent")
+            self.memory_agent = RecordingAgent(self.memory_agent, record, "MemoryAgent")
 
     def refactor_loops(
         self,
@@ -33,34 +186,7 @@ class Trajectory(dspy.Module):
         Given the original source code and the proposed loop directives,
         return the source code with pragmas inserted at the appropriate slots
         """
-        out = []
-        lines = src.splitlines()
-
-        directives = {d["slot"]: d for d in dirs}
-
-        for line in lines:
-            
-            if "// @slot" in line:
-                slot = line.split("// @slot")[1].strip()
-                directive = directives.get(slot, {})
-                pragma = directive.get("pragma")
-                params = directive.get("params", {})
-
-                if pragma == "pipeline":
-                    ii = params.get("II", 1)
-                    pragma_line = f"#pragma HLS pipeline II={ii}"
-                elif pragma == "unroll":
-                    factor = params.get("factor", 1)
-                    pragma_line = f"#pragma HLS unroll factor={factor}"
-                else:
-                    pragma_line = ""  # No pragma
-
-                if pragma_line:
-                    out.append(pragma_line)
-            else:
-                out.append(line)
-
-        return "\n".join(out)
+        return compile_template(src).render(dirs)
     
     def refactor_mem(
         self,
@@ -72,161 +198,195 @@ class Trajectory(dspy.Module):
         Given the source code refactored with loop directives,
         return the source code with memory partitioning directives
         """
-        out = []
-        lines = src.splitlines()
-        
-        for line in lines:
-            out.append(line)
-            
-            if line.strip().startswith(f"void {top_fxn}("):
-                for d in dirs:
-                    assert d["pragma"] == "array_partition"
-                    
-                    pragma_line = (
-                        f"#pragma HLS array_partition "
-                        f"variable={d.get('variable')} "
-                        f"type={d.get('type')} "
-                        f"factor={d.get('factor')} "
-                        f"dim={d.get('dim')}"
-                    )
-                    
-                    out.append(pragma_line)
-            
-        return "\n".join(out)
-    
-    LOOP_LABEL_PAT = r"L(?:\d+)(?:_L\d+)*"
-    
-    # detect instruction count explosion during compilation
-    INFO_INSTR_COUNT_COMPILE_RE = re.compile(r"INFO:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the 'Compile/Link' phase of compilation")
-    WARN_INSTR_COUNT_OTHER_RE = re.compile(r"WARNING:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the '([^']+)' phase of compilation")
-    
-    # detect II violations of memory ports (often diagnosed by implied unrolls)
-    INFO_IMPLIED_UNROLL_RE = re.compile(rf"INFO:\s*\[HLS 214-291\].*Loop '{LOOP_LABEL_PAT}' is marked as complete unroll implied by the pipeline pragma")
-    INFO_COMPLETE_UNROLL_FACTOR_RE = re.compile(rf"INFO:\s*\[HLS 214-186\].*Unrolling loop '{LOOP_LABEL_PAT}'.*completely with a factor of (\d+)")
-    WARN_II_MEM_PORT_VIOL_RE = re.compile(r"WARNING:\s*\[HLS 200-885\].*II Violation.*limited memory ports")
-    
-    # detect II violations of loop dependencies
-    WARN_II_LOOP_DEP_VIOL_RE = re.compile(r"WARNING:\s*\[HLS 200-880\].*II Violation.*carried dependence constraint")
-    INFO_PIPE_RESULT_RE = re.compile(r"INFO:\s*\[HLS 200-1470\].*Pipelining result\s*:\s*Target II\s*=\s*(\d+),\s*Final II\s*=\s*(\d+),\s*Depth\s*=\s*(\d+)")
+        return compile_template(src, top_fxn).render([], dirs)
     
     def _parse_synthesis_output(self, line: str):
-        if self.INFO_INSTR_COUNT_COMPILE_RE.search(line):
-            return {"type": "instr_count_compile", "message": line.strip()}
-        
-        if self.WARN_INSTR_COUNT_OTHER_RE.search(line):
-            return {"type": "instr_count_warn", "message": line.strip()}
-        
-        if self.INFO_IMPLIED_UNROLL_RE.search(line):
-            return {"type": "implied_unroll", "message": line.strip()}
-        
-        if self.INFO_COMPLETE_UNROLL_FACTOR_RE.search(line):
-            return {"type": "complete_unroll_factor", "message": line.strip()}
-        
-        if self.WARN_II_MEM_PORT_VIOL_RE.search(line):
-            return {"type": "ii_mem_port_violation", "message": line.strip()}
-        
-        if self.WARN_II_LOOP_DEP_VIOL_RE.search(line):
-            return {"type": "ii_loop_dep_violation", "message": line.strip()}
-        
-        if self.INFO_PIPE_RESULT_RE.search(line):
-            return {"type": "pipe_result", "message": line.strip()}
-        
-        return None
+        return self.log_classifier.classify(line)
     
     class EarlyKill(Exception):
         pass
 
+    def _kill_group(self, proc: subprocess.Popen):
+        if isinstance(proc, QueuedJob):
+            # the worker running the job kills its own process group
+            proc.cancel()
+            return
+
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+
+    def _trip(
+        self,
+        proc: subprocess.Popen,
+        monitor,
+        reason: dict,
+    ):
+        """
+        Stop a run for an outside reason (memory guard); reported like a watchdog kill
+        """
+        monitor.trip(reason)
+        self._kill_group(proc)
+
+    def _watchdog(
+        self,
+        proc: subprocess.Popen,
+        monitor,
+        done: threading.Event,
+        interval: float = 1.0,
+    ):
+        """
+        Evaluate the time-based kill policies while the synthesis loop is blocked
+        on the log stream; killing the process group ends that stream.
+        """
+        while not done.wait(interval):
+            if monitor.on_tick() is not None:
+                self._kill_group(proc)
+                return
+
     def synthesize_design(
         self,
         episode_no: int,
-        turn_no: int,
+        turn_no: int | str,
         kernel: str,
-        top_fxn: str
+        top_fxn: str,
+        frontend_only: bool = False,
     ) -> dict:
-        log_path = Path(f"./EP_{episode_no}/logs/{kernel}_{episode_no}_{turn_no}.log")
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        """
+        Synthesize EP_n/sources/{kernel}_{n}_{turn}.c; with frontend_only, run the
+        low-fidelity stage instead (always as a local one-shot run, never cached,
+        its project is discarded): "completed" then means the front end passed.
+        """
+        log_name = f"{kernel}_{episode_no}_{turn_no}" + (".lofi" if frontend_only else "")
+        log_path = self.work_dir / f"EP_{episode_no}/logs/{log_name}.log"
+        proj_dst = self.work_dir / f"EP_{episode_no}/results/{kernel}_{episode_no}_{turn_no}"
 
-        cmd = ["vitis_hls", "syn.tcl", str(episode_no), str(turn_no), kernel, top_fxn]
+        # identical rendered source + tool setup => identical result, skip vitis_hls
+        cache_key = None
+        if self.synth_cache is not None and not frontend_only:
+            src_path = self.work_dir / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c"
+            cache_key = self.synth_cache.key(
+                src=src_path.read_text(encoding="utf-8"),
+                top_fxn=top_fxn,
+                tcl=SYN_TCL.read_text(encoding="utf-8") + SYN_FLOW_TCL.read_text(encoding="utf-8"),
+                tool=tool_identity(self.hls_command),
+                thresholds=kernel_kill_config(kernel, self.kill_config)["counts"],
+            )
+            cached = self.synth_cache.get(cache_key, proj_dst=proj_dst)
+            if cached is not None:
+                with LogSink(log_path, compression=self.log_compression, events=self.log_events) as log:
+                    log.write(f"[CACHE_HIT] {cache_key}\n")
+                    log.status(cached["status"])
+                self.retention.track(proj_dst, log.path, log.events_path)
+                return cached["status"]
+
+        script = SYN_FRONTEND_TCL if frontend_only else SYN_TCL
+        cmd = [*self.hls_command, str(script), str(episode_no), str(turn_no), kernel, top_fxn]
         
         env = os.environ.copy()
         env["PYTHONUNBUFFERED"] = "1"
         
-        with open(log_path, "w", buffering=1) as log:
-            proc = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                env=env,
-                start_new_session=True,
-            )
+        build_dir = self.retention.build_dir(self.work_dir, episode_no)
+        monitor = build_kill_monitor(kernel, self.kill_config)
+        if frontend_only:
+            monitor.policies.append(FrontEndDone(self.lofi_until, self.lofi_max_instructions))
+        watchdog_done = threading.Event()
+        hls_workers = None if frontend_only else self.hls_workers
+        synth_queue = None if frontend_only else self.synth_queue
+        
+        phases = PhaseClock(self.telemetry, turn_no=turn_no)
+        # remote runs (synth_queue) are not this host's memory
+        admission = None
+        if self.mem_guard is not None and synth_queue is None:
+            admission = self.mem_guard.admission(kernel)
+        
+        with (
+            self.telemetry.acquire(self.synth_slots or nullcontext(), "synth_slot_wait"),
+            self.telemetry.acquire(admission or nullcontext(), "mem_admission_wait"),
+            self.telemetry.span("hls", turn_no=turn_no, fidelity="low" if frontend_only else "full") as hls_span,
+            LogSink(log_path, compression=self.log_compression, events=self.log_events) as log,
+        ):
+            if hls_workers is not None:
+                proc = hls_workers.submit(episode_no, turn_no, kernel, top_fxn, build_dir)
+            elif synth_queue is not None:
+                ship = "reports" if self.retention.keep == "reports" else "project"
+                proc = synth_queue.submit(episode_no, turn_no, kernel, top_fxn, build_dir, ship=ship)
+            else:
+                proc = subprocess.Popen(
+                    cmd, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env=env,
+                    cwd=build_dir,
+                    start_new_session=True,
+                )
+            
+            if admission is not None:
+                admission.attach(proc.pid, partial(self._trip, proc, monitor))
+            tap = LogTap() if self.record is not None and not frontend_only else None
+            # peak memory of the whole vitis_hls process group (local runs only)
+            rss = RSSSampler(proc.pid, interval=1.0 if self.telemetry.enabled and proc.pid is not None else None)
+            rss.start()
+            phases.start()
+            monitor.start()
+            if monitor.ticking:
+                threading.Thread(
+                    target=self._watchdog,
+                    args=(proc, monitor, watchdog_done),
+                    daemon=True,
+                ).start()
             
             try:
                 assert proc.stdout is not None
                 
-                instr_count_compile = []
-                instr_count_warn = []
-                instr_count_warn_count = 0
-                
-                implied_unroll = []
-                complete_unroll_factor = []
-                ii_mem_port_viol = []
-                ii_mem_port_viol_count = 0
-                
-                ii_loop_dep_viol = []
-                ii_loop_dep_viol_count = 0
-                pipe_result = []
+                log_excerpts = self.log_classifier.empty_excerpts()
+                counts = log_excerpts["counts"]
                 
                 for line in proc.stdout:
                     # print(line, end="")
                     log.write(line)
+                    if line.startswith(WORKER_LOST):
+                        # a queued job restarts from scratch on another worker
+                        log_excerpts = self.log_classifier.empty_excerpts()
+                        counts = log_excerpts["counts"]
+                        monitor.start()
+                        phases.start()
+                        if tap is not None:
+                            tap = LogTap()
+                        continue
+                    if tap is not None:
+                        tap.write(line)
+                    monitor.mark_output()
                     detect = self._parse_synthesis_output(line)
-                    if detect is not None:
-                        if detect["type"] == "instr_count_compile":
-                            instr_count_compile.append(detect["message"])
-                        elif detect["type"] == "instr_count_warn":
-                            instr_count_warn.append(detect["message"])
-                            instr_count_warn_count += 1
-                        elif detect["type"] == "implied_unroll":
-                            implied_unroll.append(detect["message"])
-                        elif detect["type"] == "complete_unroll_factor":
-                            complete_unroll_factor.append(detect["message"])
-                        elif detect["type"] == "ii_mem_port_violation":
-                            ii_mem_port_viol.append(detect["message"])
-                            ii_mem_port_viol_count += 1
-                        elif detect["type"] == "ii_loop_dep_violation":
-                            ii_loop_dep_viol.append(detect["message"])
-                            ii_loop_dep_viol_count += 1
-                        elif detect["type"] == "pipe_result":
-                            pipe_result.append(detect["message"])
-                        
-                    if instr_count_warn_count >= 3:  # heuristic: if we see 3 instruction count warnings, it's likely a real issue and we can stop the synthesis early to save time
-                        raise self.EarlyKill("Instruction count explosion detected.")
+                    if detect is None:
+                        continue
+                    self.log_classifier.record(log_excerpts, detect)
+                    log.event(detect)
+                    phases.on_event(detect)
                     
-                    if ii_mem_port_viol_count >= 3:  # heuristic: if we see 3 II violation messages, it's likely a real issue and we can stop the synthesis early to save time
-                        raise self.EarlyKill("Memory port II violations detected.")
+                    # e.g. 3 instruction count warnings or 3 memory-port II violations are
+                    # likely a real issue, so we can stop the synthesis early to save time
+                    reason = monitor.on_event(detect, counts)
+                    if reason is not None:
+                        raise self.EarlyKill(reason)
                     
                 rc = proc.wait()
                 
-                log_excerpts = {
-                    "info": {
-                        "instr_count_compile": instr_count_compile,
-                        "implied_unroll": implied_unroll,
-                        "complete_unroll_factor": complete_unroll_factor,
-                        "pipe_result": pipe_result,
-                    },
-                    "warnings": {
-                        "instr_count_warn": instr_count_warn,
-                        "ii_mem_port_viol": ii_mem_port_viol,
-                        "ii_loop_dep_viol": ii_loop_dep_viol,
-                    },
-                    "counts": {
-                        "instr_count_warn_count": instr_count_warn_count,
-                        "ii_mem_port_viol_count": ii_mem_port_viol_count,
-                        "ii_loop_dep_viol_count": ii_loop_dep_viol_count,
-                    }
-                }
+                # the watchdog killed the run on a time budget
+                if monitor.tripped is not None:
+                    raise self.EarlyKill(monitor.tripped)
                 
                 if rc == 0:
                     status = {
@@ -241,213 +401,947 @@ class Trajectory(dspy.Module):
                     }
                     
             except self.EarlyKill as e:
-                try:
-                    os.killpg(proc.pid, signal.SIGTERM)
-                except ProcessLookupError:
-                    pass
+                self._kill_group(proc)
 
-                try:
-                    proc.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    try:
-                        os.killpg(proc.pid, signal.SIGKILL)
-                    except ProcessLookupError:
-                        pass
-                    proc.wait()
-
-                log_excerpts = {
-                    "info": {
-                        "instr_count_compile": instr_count_compile,
-                        "implied_unroll": implied_unroll,
-                        "complete_unroll_factor": complete_unroll_factor,
-                        "pipe_result": pipe_result,
-                    },
-                    "warnings": {
-                        "instr_count_warn": instr_count_warn,
-                        "ii_mem_port_viol": ii_mem_port_viol,
-                        "ii_loop_dep_viol": ii_loop_dep_viol,
-                    },
-                    "counts": {
-                        "instr_count_warn_count": instr_count_warn_count,
-                        "ii_mem_port_viol_count": ii_mem_port_viol_count,
-                        "ii_loop_dep_viol_count": ii_loop_dep_viol_count,
+                reason = e.args[0]
+                if reason["code"] == "frontend_done":
+                    # low-fidelity run through the front end: a pass
+                    log.write(f"\n[FRONT_END_DONE] after the '{reason['phase']}' phase\n")
+                    status = {
+                        "status": "completed",
+                        "log_excerpts": log_excerpts
                     }
-                }
-                
-                log.write(f"\n[EARLY_KILL] {e}\n")
-                status = {
-                    "status": "killed",
-                    "reason": str(e),
-                    "log_excerpts": log_excerpts
-                }
+                else:
+                    log.write(f"\n[EARLY_KILL] {reason['message']} ({reason['code']})\n")
+                    status = {
+                        "status": "killed",
+                        "reason": reason["message"],
+                        "kill": reason,
+                        "log_excerpts": log_excerpts
+                    }
+            finally:
+                watchdog_done.set()
+                rss.stop()
+                if hls_workers is not None:
+                    hls_workers.release(proc)
+                elif synth_queue is not None:
+                    synth_queue.release(proc)
+            
+            log.status(status)
+            phases.finish(status=status["status"])
+            hls_span.update(status=status["status"], peak_rss_bytes=rss.peak)
+        self.retention.track(log.path, log.events_path)
+        
+        if frontend_only:
+            shutil.rmtree(build_dir / f"{kernel}_{episode_no}_{turn_no}_lofi", ignore_errors=True)
+            return status
             
-        # move project to results
-        proj_src = Path(f"./{kernel}_{episode_no}_{turn_no}")
-        proj_dst = Path(f"./EP_{episode_no}/results/{kernel}_{episode_no}_{turn_no}")
-        proj_dst.parent.mkdir(parents=True, exist_ok=True)
+        # move project (or what the retention policy keeps of it) to results
+        proj_src = build_dir / f"{kernel}_{episode_no}_{turn_no}"
         if proj_src.exists():
-            proj_src.rename(proj_dst)
+            with self.telemetry.span("file_move", turn_no=turn_no):
+                self.retention.store(kernel, proj_src, proj_dst)
+        
+        if tap is not None:
+            src = (self.work_dir / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c").read_bytes()
+            self.record.record_synthesis(
+                hashlib.sha256(src).hexdigest(), tap.lines, status, tap.elapsed_s,
+                report_dir=proj_dst / "solution1/syn/report",
+            )
+        
+        if cache_key is not None:
+            qor = None
+            if status["status"] == "completed":
+                qor = self.retrieve_qor(episode_no=episode_no, turn_no=turn_no, kernel=kernel, pipe_result=self._pipe_result(status))
+            self.synth_cache.put(cache_key, status, qor=qor, proj_dir=proj_dst, kernel=kernel, top_fxn=top_fxn)
         
         return status
 
-    def retrieve_qor(
+    def synthesize_solutions(
         self,
         episode_no: int,
         turn_no: int,
         kernel: str,
+        top_fxn: str,
+        solutions: list,
+        cache_keys: dict | None = None,
     ) -> dict:
+        """
+        Synthesize the directive scripts EP_n/directives/{kernel}_{n}_{turn}_{i}.tcl
+        (i in solutions) as solutions of one project over the unchanged base source.
+        Every solution gets its own log, kill monitor, results directory
+        ({kernel}_{n}_{turn}_{i}, laid out like a single-solution project) and cache
+        entry. An early kill or crash ends the whole vitis_hls run, so the solutions
+        not reached yet are resumed in a new run. Returns {solution: status}.
+        """
+        log_dir = self.work_dir / f"EP_{episode_no}/logs"
+        results_dir = self.work_dir / f"EP_{episode_no}/results"
+        proj = f"{kernel}_{episode_no}_{turn_no}"
+        src_rel = f"EP_{episode_no}/sources/{kernel}_{episode_no}_0.c"
+
+        statuses = {}
+        pending = list(solutions)
+        for i in solutions:
+            cached = None
+            if self.synth_cache is not None and cache_keys is not None:
+                cached = self.synth_cache.get(cache_keys[i], proj_dst=results_dir / f"{proj}_{i}")
+            if cached is not None:
+                with LogSink(log_dir / f"{proj}_{i}.log", compression=self.log_compression, events=self.log_events) as log:
+                    log.write(f"[CACHE_HIT] {cache_keys[i]}\n")
+                    log.status(cached["status"])
+                self.retention.track(results_dir / f"{proj}_{i}", log.path, log.events_path)
+                statuses[i] = cached["status"]
+                pending.remove(i)
+
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
         
-        util_patt = re.compile(r'\((?:~)?(\d+)%\)')
-        
-        rpt_path = Path(f"./EP_{episode_no}/results/{kernel}_{episode_no}_{turn_no}/solution1/syn/report/csynth.rpt")
-        if not rpt_path.exists():
-            return None
-        
-        with rpt_path.open("r", encoding="utf-8") as rpt:
-            lines = rpt.readlines()
-            for line in lines:
-                line = line.strip()
+        build_dir = self.retention.build_dir(self.work_dir, episode_no)
+        ran = []
+        logs = []  # every log of the run, accounted by the retention policy at the end
+        taps = {}  # solution -> LogTap, when recording
+        while pending:
+            cmd = [*self.hls_command, str(SYN_MULTI_TCL), str(episode_no), str(turn_no), kernel, top_fxn, src_rel, *map(str, pending)]
+            monitor = build_kill_monitor(kernel, self.kill_config)
+            watchdog_done = threading.Event()
+            current = None  # solution being synthesized
+            log = None
+            status = None
+            
+            phases = PhaseClock(self.telemetry, turn_no=turn_no)
+            admission = self.mem_guard.admission(kernel) if self.mem_guard is not None else None
+            
+            with (
+                self.telemetry.acquire(self.synth_slots or nullcontext(), "synth_slot_wait"),
+                self.telemetry.acquire(admission or nullcontext(), "mem_admission_wait"),
+                self.telemetry.span("hls", turn_no=turn_no, solutions=len(pending)) as hls_span,
+                LogSink(log_dir / f"{proj}.log", compression=self.log_compression, events=False) as turn_log,
+            ):
+                logs.append(turn_log)
+                proc = subprocess.Popen(
+                    cmd, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env=env,
+                    cwd=build_dir,
+                    start_new_session=True,
+                )
                 
-                if line.startswith("|+"):
-                    
-                    latency_cycles = line.split("|")[4].strip()
-                    
-                    bram_tot = line.split("|")[10].strip().split()[0]
-                    if bram_tot != "-":
-                        bram_util = util_patt.search(line.split("|")[10].strip()).group(1)
-                    else:
-                        bram_tot = None
-                        bram_util = None
+                if admission is not None:
+                    admission.attach(proc.pid, partial(self._trip, proc, monitor))
+                rss = RSSSampler(proc.pid, interval=1.0 if self.telemetry.enabled else None)
+                rss.start()
+                monitor.start()
+                if monitor.ticking:
+                    threading.Thread(
+                        target=self._watchdog,
+                        args=(proc, monitor, watchdog_done),
+                        daemon=True,
+                    ).start()
+                
+                try:
+                    for line in proc.stdout:
+                        if line.startswith("@@SOLUTION_BEGIN"):
+                            current = int(line.split()[1])
+                            log = LogSink(log_dir / f"{proj}_{current}.log", compression=self.log_compression, events=self.log_events)
+                            logs.append(log)
+                            log_excerpts = self.log_classifier.empty_excerpts()
+                            if self.record is not None:
+                                taps[current] = LogTap()
+                            phases.start(solution=current)
+                            monitor.start()
+                            continue
+                        if line.startswith("@@SOLUTION_END"):
+                            rc = int(line.split()[2])
+                            if rc == 0:
+                                status = {"status": "completed", "log_excerpts": log_excerpts}
+                            else:
+                                status = {"status": "failed", "reason": "Vitis HLS solution failed", "log_excerpts": log_excerpts}
+                            log.status(status)
+                            log.close()
+                            phases.finish(status=status["status"])
+                            statuses[current] = status
+                            pending.remove(current)
+                            ran.append(current)
+                            current, log, status = None, None, None
+                            continue
                         
-                    dsp_tot = line.split("|")[11].strip().split()[0]
-                    if dsp_tot != "-":
-                        dsp_util = util_patt.search(line.split("|")[11].strip()).group(1)
-                    else:
-                        dsp_tot = None
-                        dsp_util = None
+                        (log or turn_log).write(line)
+                        monitor.mark_output()
+                        if current is None:
+                            continue
+                        if current in taps:
+                            taps[current].write(line)
+                        detect = self._parse_synthesis_output(line)
+                        if detect is None:
+                            continue
+                        self.log_classifier.record(log_excerpts, detect)
+                        log.event(detect)
+                        phases.on_event(detect)
                         
-                    ff_tot = line.split("|")[12].strip().split()[0]
-                    if ff_tot != "-":
-                        ff_util = util_patt.search(line.split("|")[12].strip()).group(1)
-                    else:
-                        ff_tot = None
-                        ff_util = None
+                        reason = monitor.on_event(detect, log_excerpts["counts"])
+                        if reason is not None:
+                            raise self.EarlyKill(reason)
                     
-                    lut_tot = line.split("|")[13].strip().split()[0]
-                    if lut_tot != "-":
-                        lut_util = util_patt.search(line.split("|")[13].strip()).group(1)
-                    else:
-                        lut_tot = None
-                        lut_util = None
+                    rc = proc.wait()
                     
-            return {
-                "latency_cycles": int(latency_cycles) if latency_cycles is not None else None,
-                # "bram_tot": int(bram_tot) if bram_tot is not None else None,
-                # "dsp_tot": int(dsp_tot) if dsp_tot is not None else None,
-                # "ff_tot": int(ff_tot) if ff_tot is not None else None,
-                # "lut_tot": int(lut_tot) if lut_tot is not None else None,
-                # "bram_util": float(bram_util) if bram_util is not None else None,
-                # "dsp_util": float(dsp_util) if dsp_util is not None else None,
-                # "ff_util": float(ff_util) if ff_util is not None else None,
-                # "lut_util": float(lut_util) if lut_util is not None else None,
-            }
+                    # the watchdog killed the run on a time budget
+                    if monitor.tripped is not None and current is not None:
+                        raise self.EarlyKill(monitor.tripped)
+                
+                except self.EarlyKill as e:
+                    self._kill_group(proc)
+                    
+                    reason = e.args[0]
+                    log.write(f"\n[EARLY_KILL] {reason['message']} ({reason['code']})\n")
+                    status = {
+                        "status": "killed",
+                        "reason": reason["message"],
+                        "kill": reason,
+                        "log_excerpts": log_excerpts
+                    }
+                finally:
+                    watchdog_done.set()
+                    rss.stop()
+                
+                # the run ended inside a solution (early kill or crash): close it, the
+                # remaining ones are resumed in the next run
+                if current is not None:
+                    if status is None:
+                        status = {
+                            "status": "failed",
+                            "reason": f"Vitis HLS exited with code {proc.wait()}",
+                            "log_excerpts": log_excerpts
+                        }
+                    log.status(status)
+                    log.close()
+                    phases.finish(status=status["status"])
+                    statuses[current] = status
+                    pending.remove(current)
+                    ran.append(current)
+                elif pending:
+                    # died before reaching any (further) solution, do not retry forever
+                    for i in pending:
+                        statuses[i] = {
+                            "status": "failed",
+                            "reason": f"Vitis HLS exited with code {proc.wait()}",
+                            "log_excerpts": self.log_classifier.empty_excerpts()
+                        }
+                    pending = []
+                hls_span.update(peak_rss_bytes=rss.peak)
+        
+        # lay every solution out as its own single-solution project in results
+        results_dir.mkdir(parents=True, exist_ok=True)
+        proj_src = build_dir / proj
+        for i in ran:
+            sol_src = proj_src / f"solution{i}"
+            sol_dst = results_dir / f"{proj}_{i}" / "solution1"
+            if sol_src.exists():
+                with self.telemetry.span("file_move", turn_no=f"{turn_no}_{i}"):
+                    self.retention.store(kernel, sol_src, sol_dst, report_subdir=Path("syn/report"))
+            
+            if self.synth_cache is not None and cache_keys is not None:
+                qor = None
+                if statuses[i]["status"] == "completed":
+                    qor = self.retrieve_qor(episode_no=episode_no, turn_no=f"{turn_no}_{i}", kernel=kernel, pipe_result=self._pipe_result(statuses[i]))
+                self.synth_cache.put(cache_keys[i], statuses[i], qor=qor, proj_dir=sol_dst.parent, kernel=kernel, top_fxn=top_fxn)
+        if proj_src.exists():
+            if self.retention.keep == "all":
+                shutil.move(proj_src, results_dir / proj)
+                self.retention.track(results_dir / proj)
+            else:
+                shutil.rmtree(proj_src, ignore_errors=True)
+        self.retention.track(*{path for log in logs for path in (log.path, log.events_path)})
+        
+        src = (self.work_dir / src_rel).read_bytes()
+        for i, tap in taps.items():
+            script = (self.work_dir / f"EP_{episode_no}/directives/{proj}_{i}.tcl").read_bytes()
+            self.record.record_synthesis(
+                hashlib.sha256(src + b"\n" + script).hexdigest(), tap.lines, statuses[i], tap.elapsed_s,
+                report_dir=results_dir / f"{proj}_{i}/solution1/syn/report",
+            )
+        
+        return statuses
 
-    def forward(
+    def retrieve_report(
         self,
         episode_no: int,
+        turn_no: int,
         kernel: str,
+        pipe_result: list | None = None,
+    ) -> dict | None:
+        """
+        Full parsed synthesis report (module/loop hierarchy with latency, II, trip
+        counts and resources); memoized next to the report on first access
+        """
+        rpt_dir = self.work_dir / f"EP_{episode_no}/results/{kernel}_{episode_no}_{turn_no}/solution1/syn/report"
+        report = load_report(rpt_dir)
+        if report is not None and pipe_result:
+            attach_target_ii(report, pipe_result)
+        return report
+
+    def retrieve_qor(
+        self,
+        episode_no: int,
+        turn_no: int,
+        kernel: str,
+        pipe_result: list | None = None,
+    ) -> dict:
+        """
+        Design-level QoR; pipe_result (the "Pipelining result" messages of the run,
+        see _pipe_result) adds the achieved vs target II of the pipelined loops
+        """
+        with self.telemetry.span("report_parse", turn_no=turn_no):
+            return summarize(self.retrieve_report(episode_no=episode_no, turn_no=turn_no, kernel=kernel, pipe_result=pipe_result))
+
+    @staticmethod
+    def _pipe_result(status: dict) -> list:
+        return status.get("log_excerpts", {}).get("info", {}).get("pipe_result", [])
+
+    def _feedback(
+        self,
+        status: dict,
+        qor: dict | None,
+    ) -> dict:
+        log_excerpts = status.get("log_excerpts", {})
+        feedback = {
+            "status": status["status"],
+            "reason": status.get("reason", ""),
+            "counts": log_excerpts.get("counts", {}),
+            "qor": qor,
+        }
+        if status.get("unknown_slots"):
+            feedback["unknown_slots"] = status["unknown_slots"]
+        if status.get("missing_slots"):
+            feedback["missing_slots"] = status["missing_slots"]
+        if status.get("front_end"):
+            feedback["front_end"] = status["front_end"]
+        if self.feedback_budget is None:
+            feedback["info"] = log_excerpts.get("info", {})
+            feedback["warnings"] = log_excerpts.get("warnings", {})
+        else:
+            budget = max(0, self.feedback_budget - estimate_tokens(feedback))
+            feedback.update(summarize_excerpts(log_excerpts, budget_tokens=budget))
+        return feedback
+
+    @staticmethod
+    def _front_end(status: dict) -> dict:
+        """
+        Instruction count after each front-end phase of a low-fidelity run
+        """
+        log_excerpts = status.get("log_excerpts", {})
+        lines = [
+            *log_excerpts.get("info", {}).get("instr_count_compile", []),
+            *log_excerpts.get("warnings", {}).get("instr_count_warn", []),
+            *log_excerpts.get("phases", {}).get("instr_count_phase", []),
+        ]
+        counts = {}
+        for line in lines:
+            m = INSTR_RE.search(line)
+            if m is not None:
+                counts[m.group(2)] = int(m.group(1).replace(",", ""))
+        order = {phase: i for i, phase in enumerate(PHASE_ORDER)}
+        counts = dict(sorted(counts.items(), key=lambda item: order.get(item[0], len(order))))
+        return {"instructions": counts} if counts else {}
+
+    def propose_loop_dirs(
+        self,
+        src_base: str,
+        loop_dirs_curr: list,
+        feedback_curr: dict,
+        turn: int,
+    ) -> list:
+        """
+        Ask the LoopAgent for n_candidates directive sets (concurrently); the first
+        uses the LM defaults, the others are sampled at candidate_temperature
+        """
+        def propose(i: int) -> list:
+            # with an LM cache, only the first candidate of turn 1 (same kernel and
+            # base feedback for every trajectory) is shared; from then on each
+            # trajectory keys its calls by rollout_id, or synthesis being
+            # deterministic would make all trajectories of a kernel identical copies
+            config = None
+            rollout = None if turn == 1 else str(self.rollout_id)
+            if i > 0:
+                config = {"temperature": self.candidate_temperature}
+                rollout = f"{self.rollout_id}:{i}"
+            with self.telemetry.span("llm", agent="LoopAgent", candidate=i) as span:
+                pred = self.lm_client.call(
+                    self.loop_agent, LoopAgent,
+                    inputs={"src_base": src_base, "loop_dirs_curr": loop_dirs_curr, "feedback_curr": feedback_curr},
+                    config=config, model=MODEL, temperature=self.lm_temperature, rollout=rollout,
+                )
+                span.update(lm_usage(pred), cached=getattr(pred, "cached", False))
+            return pred.loop_dirs_next
+
+        if self.n_candidates == 1:
+            return [propose(0)]
+        with ThreadPoolExecutor(max_workers=self.n_candidates) as pool:
+            return list(pool.map(propose, range(self.n_candidates)))
+
+    def ask_memory_agent(
+        self,
+        src_base: str,
+        loop_dirs: list,
+        unresolved: list | None = None,
+    ) -> list:
+        """
+        unresolved: what the partition rules gave up on, when the agent is their
+        fallback (recorded on the telemetry span)
+        """
+        with self.telemetry.span("llm", agent="MemoryAgent", unresolved=unresolved) as span:
+            pred = self.lm_client.call(
+                self.memory_agent, MemoryAgent,
+                inputs={"src_base": src_base, "loop_dirs_curr": loop_dirs},
+                model=MODEL, temperature=self.lm_temperature,
+            )
+            span.update(lm_usage(pred), cached=getattr(pred, "cached", False))
+        return pred.mem_dirs_next
+
+    def derive_mem_dirs(
+        self,
         top_fxn: str,
         src_base: str,
-    ):
-        turn_no = 0
-        loop_dirs_curr = []
+        loop_dirs: list,
+    ) -> list:
+        """
+        array_partition directives legalizing the unrolls of loop_dirs
+        """
+        if self.mem_partition == "llm":
+            return self.ask_memory_agent(src_base=src_base, loop_dirs=loop_dirs)
 
-        # retrieve and save base source
-        src_base_path = Path(f"./EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c")
-        src_base_path.parent.mkdir(parents=True, exist_ok=True)
-        src_base_path.write_text(src_base, encoding="utf-8")
+        mem_dirs, unresolved = partition_directives(src_base, top_fxn, loop_dirs)
+        if not unresolved:
+            return mem_dirs
         
-        # synthesize base design with Vitis HLS
-        status_curr = self.synthesize_design(
-            episode_no=episode_no,
-            turn_no=turn_no,
-            kernel=kernel,
-            top_fxn=top_fxn,
-        )
-        # pprint(status_curr)
+        # fall back to the MemoryAgent, keeping its directives only for the arrays (or
+        # whole unrolls) the rules gave up on
+        arrays = {u["array"] for u in unresolved}
+        covered = {(d["variable"], d["dim"]) for d in mem_dirs}
+        for d in self.ask_memory_agent(src_base=src_base, loop_dirs=loop_dirs, unresolved=unresolved) or []:
+            if (None in arrays or d.get("variable") in arrays) and (d.get("variable"), d.get("dim")) not in covered:
+                mem_dirs.append(d)
+        return mem_dirs
+
+    def _kill_thresholds(self, kernel: str) -> dict:
+        """
+        Limits the design-reason kills of kernel depend on, for the known-bad
+        configurations of the archive
+        """
+        cfg = kernel_kill_config(kernel, self.kill_config)
+        return {
+            "counts": cfg["counts"],
+            "max_static_unroll": cfg["max_static_unroll"],
+            "lofi_max_instructions": self.lofi_max_instructions if self.low_fidelity else None,
+            "job_mem_limit_bytes": self.mem_guard.job_limit_bytes if self.mem_guard is not None else None,
+        }
+
+    def screen_candidate(
+        self,
+        episode_no: int,
+        turn_no: int | str,
+        kernel: str,
+        src_base: str,
+        loop_dirs: list,
+    ) -> dict | None:
+        """
+        Static feasibility screen (see loop_analysis.screen) and lookup of the
+        known-bad configurations in the archive; returns a "killed" status if the
+        directive set is rejected, None otherwise
+        """
+        reason = None
+        tag = "STATIC_SCREEN"
+        known_bad = self.archive.known_bad(kernel, loop_dirs, self._kill_thresholds(kernel)) if self.archive is not None else None
+        if known_bad is not None:
+            reason = kill_reason("archive", "known_bad", f"configuration known to fail: {known_bad['message']}", known=known_bad)
+            tag = "KNOWN_BAD"
+        else:
+            max_unroll = kernel_kill_config(kernel, self.kill_config)["max_static_unroll"]
+            if max_unroll is not None:
+                reason = screen(analyze(src_base), loop_dirs, max_unroll=max_unroll)
+        if reason is None:
+            return None
+
+        log_path = self.work_dir / f"EP_{episode_no}/logs/{kernel}_{episode_no}_{turn_no}.log"
+        status = {
+            "status": "killed",
+            "reason": reason["message"],
+            "kill": reason,
+            "log_excerpts": self.log_classifier.empty_excerpts(),
+        }
+        with LogSink(log_path, compression=self.log_compression, events=self.log_events) as log:
+            log.write(f"[{tag}] {reason['message']} ({reason['code']})\n")
+            log.status(status)
+        self.retention.track(log.path, log.events_path)
+        return status
+
+    def evaluate_candidate(
+        self,
+        episode_no: int,
+        turn_no: int | str,
+        kernel: str,
+        top_fxn: str,
+        src_base: str,
+        loop_dirs_next: list,
+        mem_dirs_next: list,
+        src_next: str,
+        slot_check: dict,
+    ) -> dict:
+        """
+        Save and synthesize one directive set rendered by evaluate_candidates
+        """
+        src_next_path = self.work_dir / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c"
+        src_next_path.parent.mkdir(parents=True, exist_ok=True)
+        src_next_path.write_text(src_next, encoding="utf-8")
+    
+        # only designs that get through the front end are worth a full synthesis
+        front_end = None
+        status_next = None
+        if self.low_fidelity:
+            status_lofi = self.synthesize_design(
+                episode_no=episode_no,
+                turn_no=turn_no,
+                kernel=kernel,
+                top_fxn=top_fxn,
+                frontend_only=True,
+            )
+            front_end = self._front_end(status_lofi)
+            if status_lofi["status"] != "completed":
+                status_next = {**status_lofi, "fidelity": "low"}
         
-        # retrieve QoR for base design
-        qor_curr = None
-        if status_curr["status"] == "completed":
-            qor_curr = self.retrieve_qor(
+        # synthesize refactored design with Vitis HLS
+        if status_next is None:
+            status_next = self.synthesize_design(
                 episode_no=episode_no,
                 turn_no=turn_no,
                 kernel=kernel,
+                top_fxn=top_fxn,
             )
-            # pprint(qor_curr)
+            if front_end:
+                status_next = {**status_next, "front_end": front_end}
+        if slot_check["unknown"]:
+            # directives for slots that do not exist were dropped, tell the agent
+            status_next = {**status_next, "unknown_slots": slot_check["unknown"]}
+        if slot_check["missing"]:
+            # and slots without a directive were rendered without a pragma
+            status_next = {**status_next, "missing_slots": slot_check["missing"]}
+        pprint(status_next)
+    
+        # retrieve QoR for refactored design
+        qor_next = None
+        if status_next["status"] == "completed":
+            qor_next = self.retrieve_qor(
+                episode_no=episode_no,
+                turn_no=turn_no,
+                kernel=kernel,
+                pipe_result=self._pipe_result(status_next),
+            )
+            pprint(qor_next)
+        
+        if self.surrogate is not None:
+            self.surrogate.record(kernel, src_base, loop_dirs_next, status_next, qor_next)
+        if self.archive is not None:
+            self.archive.add(kernel, loop_dirs_next, status_next, qor_next, self._feedback(status_next, qor_next), self._kill_thresholds(kernel))
         
-        log_excerpts = status_curr.get("log_excerpts", {})
-        feedback_curr = {
-            "status": status_curr["status"],
-            "reason": status_curr.get("reason", ""),
-            "info": log_excerpts.get("info", {}),
-            "warnings": log_excerpts.get("warnings", {}),
-            "counts": log_excerpts.get("counts", {}),   
-            "qor": qor_curr,
+        return {
+            "turn_no": turn_no,
+            "loop_dirs": loop_dirs_next,
+            "mem_dirs": mem_dirs_next,
+            "src_sha256": hashlib.sha256(src_next.encode("utf-8")).hexdigest(),
+            "status": status_next,
+            "qor": qor_next,
         }
-        pprint(feedback_curr)
+
+    def evaluate_candidates(
+        self,
+        episode_no: int,
+        turn_no: int,
+        kernel: str,
+        top_fxn: str,
+        src_base: str,
+        loop_dirs_batch: list,
+    ) -> list:
+        """
+        Screen, legalize and render a batch of directive sets, then synthesize the
+        ones that pass concurrently (the shared synth_slots still bound the number of
+        vitis_hls processes). With more than one candidate, each gets its own
+        project, {kernel}_{episode}_{turn}_{candidate}; duplicate directive sets are
+        synthesized once.
+        """
+        unique = {}
+        for loop_dirs in loop_dirs_batch:
+            unique.setdefault(json.dumps(loop_dirs, sort_keys=True, default=str), loop_dirs)
+        cand_turns = [turn_no] if len(loop_dirs_batch) == 1 else [f"{turn_no}_{c}" for c in range(len(unique))]
+
+        # reject directive sets that would obviously blow up before spending any
+        # LLM or synthesis time on them
+        candidates = []
+        passed = []
+        for cand_turn, loop_dirs_next in zip(cand_turns, unique.values()):
+            rejected = self.screen_candidate(
+                episode_no=episode_no,
+                turn_no=cand_turn,
+                kernel=kernel,
+                src_base=src_base,
+                loop_dirs=loop_dirs_next,
+            )
+            if rejected is not None:
+                pprint(rejected)
+                if self.archive is not None:
+                    self.archive.add(kernel, loop_dirs_next, rejected, None, thresholds=self._kill_thresholds(kernel))
+            else:
+                passed.append(len(candidates))
+            candidates.append({
+                "turn_no": cand_turn,
+                "loop_dirs": loop_dirs_next,
+                "mem_dirs": [],
+                "src_sha256": None,
+                "status": rejected,
+                "qor": None,
+            })
+        if not passed:
+            return candidates
+
+        # legalize loop optimizations with memory directives (the MemoryAgent
+        # fallback is an LLM call, so one thread per candidate)
+        loop_dirs_passed = [candidates[c]["loop_dirs"] for c in passed]
+        with ThreadPoolExecutor(max_workers=len(passed)) as pool:
+            mem_dirs_passed = list(pool.map(
+                lambda loop_dirs: self.derive_mem_dirs(top_fxn=top_fxn, src_base=src_base, loop_dirs=loop_dirs),
+                loop_dirs_passed,
+            ))
+
+        # slot-annotated source compiled once per kernel, the batch rendered in one call
+        template = compile_template(src_base, top_fxn)
+        with self.telemetry.span("render", turn_no=turn_no, candidates=len(passed)):
+            rendered = template.render_batch(loop_dirs_passed, mem_dirs_passed)
+
+        with ThreadPoolExecutor(max_workers=len(passed)) as pool:
+            futures = {
+                c: pool.submit(
+                    self.evaluate_candidate, episode_no, candidates[c]["turn_no"], kernel, top_fxn, src_base,
+                    candidates[c]["loop_dirs"], mem_dirs, src_next, slot_check,
+                )
+                for c, mem_dirs, (src_next, slot_check) in zip(passed, mem_dirs_passed, rendered)
+            }
+            for c, future in futures.items():
+                candidates[c] = future.result()
+        return candidates
+
+    def evaluate_solutions(
+        self,
+        episode_no: int,
+        turn_no: int,
+        kernel: str,
+        top_fxn: str,
+        src_base: str,
+        loop_dirs_batch: list,
+    ) -> list:
+        """
+        directive_mode "tcl" counterpart of evaluate_candidates: every directive set
+        becomes a set_directive_* script and all of them are synthesized as solutions
+        of one project over the unchanged base source
+        """
+        unique = {}
+        for loop_dirs in loop_dirs_batch:
+            unique.setdefault(json.dumps(loop_dirs, sort_keys=True, default=str), loop_dirs)
+
+        candidates = []
+        cache_keys = {}
+        for c, loop_dirs_next in enumerate(unique.values()):
+            cand_turn = f"{turn_no}_{c}"
+            candidate = {"turn_no": cand_turn, "loop_dirs": loop_dirs_next, "mem_dirs": [], "src_sha256": None, "status": None, "qor": None}
+            candidates.append(candidate)
+
+            candidate["status"] = self.screen_candidate(
+                episode_no=episode_no,
+                turn_no=cand_turn,
+                kernel=kernel,
+                src_base=src_base,
+                loop_dirs=loop_dirs_next,
+            )
+            if candidate["status"] is not None:
+                pprint(candidate["status"])
+                if self.archive is not None:
+                    self.archive.add(kernel, loop_dirs_next, candidate["status"], None, thresholds=self._kill_thresholds(kernel))
+                continue
+
+            candidate["mem_dirs"] = self.derive_mem_dirs(top_fxn=top_fxn, src_base=src_base, loop_dirs=loop_dirs_next)
+            with self.telemetry.span("render", turn_no=cand_turn):
+                script, unknown = directives_tcl(src_base, top_fxn, loop_dirs_next, candidate["mem_dirs"])
+                script_path = self.work_dir / f"EP_{episode_no}/directives/{kernel}_{episode_no}_{cand_turn}.tcl"
+                script_path.parent.mkdir(parents=True, exist_ok=True)
+                script_path.write_text(script, encoding="utf-8")
+            candidate["unknown_slots"] = unknown
+            candidate["src_sha256"] = hashlib.sha256((src_base + "\n" + script).encode("utf-8")).hexdigest()
+
+            if self.synth_cache is not None:
+                cache_keys[c] = self.synth_cache.key(
+                    src=src_base + "\n" + script,
+                    top_fxn=top_fxn,
+                    tcl=SYN_MULTI_TCL.read_text(encoding="utf-8") + SYN_FLOW_TCL.read_text(encoding="utf-8"),
+                    tool=tool_identity(self.hls_command),
+                    thresholds=kernel_kill_config(kernel, self.kill_config)["counts"],
+                )
+
+        solutions = [c for c, candidate in enumerate(candidates) if candidate["status"] is None]
+        statuses = {}
+        if solutions:
+            statuses = self.synthesize_solutions(
+                episode_no=episode_no,
+                turn_no=turn_no,
+                kernel=kernel,
+                top_fxn=top_fxn,
+                solutions=solutions,
+                cache_keys=cache_keys if self.synth_cache is not None else None,
+            )
+
+        for c in solutions:
+            candidate = candidates[c]
+            candidate["status"] = statuses[c]
+            unknown = candidate.pop("unknown_slots")
+            if unknown:
+                candidate["status"] = {**candidate["status"], "unknown_slots": unknown}
+            pprint(candidate["status"])
+
+            if candidate["status"]["status"] == "completed":
+                candidate["qor"] = self.retrieve_qor(
+                    episode_no=episode_no,
+                    turn_no=candidate["turn_no"],
+                    kernel=kernel,
+                    pipe_result=self._pipe_result(candidate["status"]),
+                )
+                pprint(candidate["qor"])
+
+            if self.surrogate is not None:
+                self.surrogate.record(kernel, src_base, candidate["loop_dirs"], candidate["status"], candidate["qor"])
+            if self.archive is not None:
+                self.archive.add(
+                    kernel, candidate["loop_dirs"], candidate["status"], candidate["qor"],
+                    self._feedback(candidate["status"], candidate["qor"]), self._kill_thresholds(kernel),
+                )
+
+        return candidates
+
+    @staticmethod
+    def select_best(candidates: list) -> dict:
+        """
+        Lowest latency among completed candidates; if none completed, the first
+        candidate (the one proposed at the LM's default temperature)
+        """
+        completed = [
+            c for c in candidates
+            if c["status"]["status"] == "completed" and c["qor"] and c["qor"].get("latency_cycles") is not None
+        ]
+        if completed:
+            return min(completed, key=lambda c: c["qor"]["latency_cycles"])
+        return candidates[0]
+
+    def _discard_turn(
+        self,
+        episode_no: int,
+        kernel: str,
+        turn_no: int,
+    ):
+        """
+        Remove the projects and results a crashed run left behind for turn_no, so
+        that the turn can be run again from scratch
+        """
+        build_dir = self.retention.build_dir(self.work_dir, episode_no)
+        for base in (self.work_dir / f"EP_{episode_no}/results", build_dir):
+            for pattern in (f"{kernel}_{episode_no}_{turn_no}", f"{kernel}_{episode_no}_{turn_no}_*"):
+                for path in base.glob(pattern):
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def _record_turn(
+        self,
+        journal: Journal,
+        episode_no: int,
+        kernel: str,
+        record: dict,
+    ):
+        journal.append(record)
+        if self.results_db is not None:
+            self.results_db.record_turn(kernel, episode_no, self.rollout_id, record)
+        if self.turn_budget is not None:
+            self._observe_turn(record)
+
+    def _observe_turn(self, record: dict):
+        self.turn_budget.observe(
+            str(self.work_dir),
+            record["best_latency"],
+            [config_hash(c["loop_dirs"]) for c in record["candidates"]],
+        )
+
+    def _next_turn(self, t: int, T: int) -> bool:
+        if self.turn_budget is None:
+            return t <= T
+        return self.turn_budget.next_turn(str(self.work_dir), t)
+
+    def forward(
+        self,
+        episode_no: int,
+        kernel: str,
+        top_fxn: str,
+        src_base: str,
+    ):
+        journal = Journal(self.work_dir / f"EP_{episode_no}/journal.jsonl")
+        records = []
+        if self.resume:
+            records = journal.recover()
+        else:
+            journal.reset()
         
-        T = 4 # number of turns per trajectory
-        for t in range(1, T+1):
-            print(f"\n=== TURN {t} ===")
-            loop_dirs_next = self.loop_agent(src_base=src_base, loop_dirs_curr=loop_dirs_curr, feedback_curr=feedback_curr).loop_dirs_next
-            pprint(loop_dirs_next)
+        if self.turn_budget is not None:
+            self.turn_budget.open(str(self.work_dir))
+            for record in records:
+                self._observe_turn(record)
         
-            # refactor source with loop directives
-            src_next = self.refactor_loops(src=src_base, dirs=loop_dirs_next)
+        if records:
+            # continue after the last journaled turn
+            last = records[-1]
+            loop_dirs_curr = last["loop_dirs_curr"]
+            feedback_curr = last["feedback_curr"]
+            best_latency = last["best_latency"]
+            start = last["turn"] + 1
+            print(f"resuming {kernel} after turn {last['turn']}")
+        else:
+            turn_no = 0
+            loop_dirs_curr = []
+            if self.resume:
+                self._discard_turn(episode_no, kernel, turn_no)
+
+            # retrieve and save base source
+            src_base_path = self.work_dir / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c"
+            src_base_path.parent.mkdir(parents=True, exist_ok=True)
+            src_base_path.write_text(src_base, encoding="utf-8")
             
-            # legalize loop optimizations with memory directives
-            mem_dirs_next = self.memory_agent(src_base=src_base, loop_dirs_curr=loop_dirs_next).mem_dirs_next
-            if mem_dirs_next:
-                src_next = self.refactor_mem(
-                    top_fxn=top_fxn,
-                    src=src_next,
-                    dirs=mem_dirs_next,
+            # synthesize base design with Vitis HLS
+            status_curr = self.synthesize_design(
+                episode_no=episode_no,
+                turn_no=turn_no,
+                kernel=kernel,
+                top_fxn=top_fxn,
+            )
+            # pprint(status_curr)
+            
+            # retrieve QoR for base design
+            qor_curr = None
+            if status_curr["status"] == "completed":
+                qor_curr = self.retrieve_qor(
+                    episode_no=episode_no,
+                    turn_no=turn_no,
+                    kernel=kernel,
+                    pipe_result=self._pipe_result(status_curr),
                 )
+                # pprint(qor_curr)
+            
+            if self.surrogate is not None:
+                self.surrogate.record(kernel, src_base, loop_dirs_curr, status_curr, qor_curr)
+            best_latency = (qor_curr or {}).get("latency_cycles")
             
-            # save refactored source
-            src_next_path = Path(f"./EP_{episode_no}/sources/{kernel}_{episode_no}_{t}.c")
-            src_next_path.parent.mkdir(parents=True, exist_ok=True)
-            src_next_path.write_text(src_next, encoding="utf-8")
+            feedback_curr = self._feedback(status_curr, qor_curr)
+            seed = None
+            if self.archive is not None:
+                self.archive.add(kernel, loop_dirs_curr, status_curr, qor_curr, feedback_curr, self._kill_thresholds(kernel))
+                elite = self.archive.best(kernel) if self.archive.seed else None
+                if elite is not None and (best_latency is None or elite["latency_cycles"] < best_latency):
+                    # start from the best configuration any trajectory (or run) has found
+                    print(f"seeding {kernel} from the archive ({elite['latency_cycles']} cycles)")
+                    loop_dirs_curr = elite["loop_dirs"]
+                    feedback_curr = dict(elite["feedback"] or {}) or self._feedback({"status": "completed"}, elite["qor"])
+                    best_latency = elite["latency_cycles"]
+                    seed = {"config_hash": config_hash(loop_dirs_curr), "latency_cycles": best_latency}
+                feedback_curr["elites"] = self.archive.prompt_entries(kernel)
+            pprint(feedback_curr)
+            
+            # the candidate is the base design itself; a seed from the archive only
+            # replaces the state the next turn starts from
+            self._record_turn(journal, episode_no, kernel, {
+                "turn": turn_no,
+                "candidates": [{
+                    "turn_no": turn_no,
+                    "loop_dirs": [],
+                    "mem_dirs": [],
+                    "src_sha256": hashlib.sha256(src_base.encode("utf-8")).hexdigest(),
+                    "status": status_curr,
+                    "qor": qor_curr,
+                }],
+                "best": 0,
+                "loop_dirs_curr": loop_dirs_curr,
+                "feedback_curr": feedback_curr,
+                "best_latency": best_latency,
+                "seed": seed,
+            })
+            start = 1
         
-            # synthesize refactored design with Vitis HLS
-            status_next = self.synthesize_design(
+        T = 4 # number of turns per trajectory (the base budget with a turn_budget)
+        if self.turn_budget is not None:
+            T = self.turn_budget.base_turns
+        t = start
+        while self._next_turn(t, T):
+            print(f"\n=== TURN {t} ===")
+            if self.resume:
+                self._discard_turn(episode_no, kernel, t)
+            loop_dirs_batch = self.propose_loop_dirs(src_base=src_base, loop_dirs_curr=loop_dirs_curr, feedback_curr=feedback_curr, turn=t)
+            pprint(loop_dirs_batch if len(loop_dirs_batch) > 1 else loop_dirs_batch[0])
+            
+            if self.surrogate is not None and len(loop_dirs_batch) > 1:
+                ranked = self.surrogate.rank(
+                    kernel=kernel,
+                    src_base=src_base,
+                    loop_dirs_batch=loop_dirs_batch,
+                    best_latency=best_latency,
+                    keep=self.surrogate_keep,
+                )
+                print(f"surrogate kept {len(ranked)}/{len(loop_dirs_batch)} candidates")
+                loop_dirs_batch = [loop_dirs for loop_dirs, _ in ranked]
+            
+            evaluate = self.evaluate_solutions if self.directive_mode == "tcl" else self.evaluate_candidates
+            candidates = evaluate(
                 episode_no=episode_no,
                 turn_no=t,
                 kernel=kernel,
                 top_fxn=top_fxn,
+                src_base=src_base,
+                loop_dirs_batch=loop_dirs_batch,
             )
-            pprint(status_next)
-        
-            # retrieve QoR for refactored design
-            qor_next = None
-            if status_next["status"] == "completed":
-                qor_next = self.retrieve_qor(
-                    episode_no=episode_no,
-                    turn_no=t,
-                    kernel=kernel,
-                )
-                pprint(qor_next)
+            best = self.select_best(candidates)
+            if best["qor"] and best["qor"].get("latency_cycles") is not None:
+                if best_latency is None or best["qor"]["latency_cycles"] < best_latency:
+                    best_latency = best["qor"]["latency_cycles"]
             
-            loop_dirs_curr = loop_dirs_next
-            feedback_curr = {
-                "status": status_next["status"],
-                "reason": status_next.get("reason", ""),
-                "info": status_next.get("log_excerpts", {}).get("info", {}),
-                "warnings": status_next.get("log_excerpts", {}).get("warnings", {}),
-                "counts": status_next.get("log_excerpts", {}).get("counts", {}),
-                "qor": qor_next,
-            }
+            loop_dirs_curr = best["loop_dirs"]
+            feedback_curr = self._feedback(best["status"], best["qor"])
+            if self.share_candidates and len(candidates) > 1:
+                # let the agent learn from the candidates that were not advanced too
+                feedback_curr["alternatives"] = [
+                    {
+                        "loop_dirs": c["loop_dirs"],
+                        "status": c["status"]["status"],
+                        "reason": c["status"].get("reason", ""),
+                        "counts": c["status"].get("log_excerpts", {}).get("counts", {}),
+                        "qor": c["qor"],
+                    }
+                    for c in candidates if c is not best
+                ]
+            if self.archive is not None:
+                feedback_curr["elites"] = self.archive.prompt_entries(kernel)
+            
+            self._record_turn(journal, episode_no, kernel, {
+                "turn": t,
+                "candidates": candidates,
+                "best": candidates.index(best),
+                "loop_dirs_curr": loop_dirs_curr,
+                "feedback_curr": feedback_curr,
+                "best_latency": best_latency,
+            })
+            t += 1
+        
+        # nothing of the scratch build directory is needed past the last turn
+        self.retention.release(self.work_dir)
         
 # one episode is composed of many trajectories per kernel (K kernels with T trajectories each, all running in parallel)
 # one trajectory is composed of many turns of design sampling and synthesis (t turns per trajectory, running sequentially)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Stand-in for vitis_hls with the same command-line and worker protocol, for
+exercising the synthesis plumbing on machines without the tool:
+
+    fake_vitis_hls.py syn.tcl <episode_no> <turn_no> <kernel> <top_fxn>
+    fake_vitis_hls.py syn_frontend.tcl <episode_no> <turn_no> <kernel> <top_fxn>
+    fake_vitis_hls.py syn_worker.tcl        (jobs on stdin, see syn_worker.tcl)
+    fake_vitis_hls.py syn_multi.tcl <episode_no> <turn_no> <kernel> <top_fxn> <src> <solution>...
+
+Every job prints a short log, optionally followed by the contents of
+FAKE_HLS_LOG, and writes <kernel>_<episode_no>_<turn_no>/solution1/syn/report/
+csynth.rpt (a copy of FAKE_HLS_RPT, or a minimal report whose latency is derived
+from the rendered source and directives). FAKE_HLS_SLEEP adds a delay per job,
+and FAKE_HLS_CRASH_AFTER=n makes the tool die in the middle of its n-th job or
+solution. The low-fidelity syn_frontend.tcl prints the same log into the project
+<kernel>_<episode_no>_<turn_no>_lofi, without a report.
+
+With FAKE_HLS_REPLAY=<recording dir> (see replay.py), designs found in the
+recording replay their recorded run instead: the log is streamed at
+FAKE_HLS_SPEED times the recorded pace (default 1, 0 for as fast as possible),
+followed by the recorded report and exit status.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+BANNER = [
+    "INFO: [HLS 200-10] Running 'fake_vitis_hls'",
+    "INFO: [HLS 200-10] For user 'fake' on host 'fake'",
+]
+
+REPORT = """
+================================================================
+== Synthesis Summary Report of '{top}'
+================================================================
++ Performance & Resource Estimates:
+
+    PS: '+' for module; 'o' for loop; '*' for dataflow
+    +------+------+------+---------+-----------+----------+---------+------+----------+---------+----------+------------+------------+-----+
+    |Modules| Issue|      | Latency |  Latency  | Iteration|         | Trip |          |         |          |            |            |     |
+    |& Loops| Type | Slack| (cycles)|    (ns)   |  Latency | Interval| Count| Pipelined|  BRAM   |    DSP   |     FF     |     LUT    | URAM|
+    +------+------+------+---------+-----------+----------+---------+------+----------+---------+----------+------------+------------+-----+
+    |+ {top}|     -|  0.00|  {latency}|  {latency_ns}|         -|  {interval}|     -|        no|  {bram} (~0%)|  {dsp} (~0%)|  {ff} (~0%)|  {lut} (~0%)|    -|
+    +------+------+------+---------+-----------+----------+---------+------+----------+---------+----------+------------+------------+-----+
+"""
+
+def emit(line: str):
+    print(line, flush=True)
+
+def replay(
+    report_dir: Path,
+    inputs: list,
+) -> int | None:
+    """
+    Replay the recorded run of the design made of inputs; returns its exit code, or
+    None if it was not recorded.
+    """
+    if not os.environ.get("FAKE_HLS_REPLAY"):
+        return None
+    synth_dir = Path(os.environ["FAKE_HLS_REPLAY"]) / "synth"
+    design_sha = hashlib.sha256(b"\n".join(p.read_bytes() for p in inputs)).hexdigest()
+    if not (synth_dir / f"{design_sha}.log.gz").exists():
+        emit(f"WARNING: [REPLAY] design {design_sha[:12]} was not recorded, synthesizing a fake report")
+        return None
+
+    speed = float(os.environ.get("FAKE_HLS_SPEED", "1"))
+    start = time.monotonic()
+    with gzip.open(synth_dir / f"{design_sha}.log.gz", "rt", encoding="utf-8") as f:
+        for record in f:
+            t, line = record.split("\t", 1)
+            if speed > 0:
+                delay = float(t) / speed - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            print(line, end="", flush=True)
+
+    if (synth_dir / design_sha).is_dir():
+        report_dir.mkdir(parents=True, exist_ok=True)
+        for report in (synth_dir / design_sha).iterdir():
+            shutil.copyfile(report, report_dir / report.name)
+    meta = json.loads((synth_dir / f"{design_sha}.json").read_text())
+    if meta["status"] != "completed":
+        # failed, or killed at this point of the log (which should kill the replay too)
+        emit(f"ERROR: [REPLAY] recorded run ended here: {meta['status']} {meta['reason']}")
+        return 1
+    return 0
+
+def write_report(
+    report_dir: Path,
+    inputs: list,
+    top_fxn: str,
+):
+    report_dir.mkdir(parents=True, exist_ok=True)
+
+    if os.environ.get("FAKE_HLS_RPT"):
+        text = Path(os.environ["FAKE_HLS_RPT"]).read_text()
+    else:
+        # deterministic per design inputs, so identical designs get identical QoR
+        digest = hashlib.sha256(b"".join(p.read_bytes() for p in inputs if p.exists())).digest()
+        latency = 1000 + int.from_bytes(digest[:3], "big") % 500000
+        text = REPORT.format(
+            top=top_fxn,
+            latency=latency,
+            latency_ns=f"{latency * 4.0:.3e}",
+            interval=latency + 1,
+            bram=digest[3] % 64,
+            dsp=digest[4],
+            ff=1000 + digest[5] * 40,
+            lut=2000 + digest[6] * 60,
+        )
+    (report_dir / "csynth.rpt").write_text(text)
+
+def csynth(
+    report_dir: Path,
+    inputs: list,
+    top_fxn: str,
+    crash: bool = False,
+    report: bool = True,
+):
+    emit("INFO: [HLS 200-1510] Running: csynth_design")
+    if crash:
+        os._exit(139)
+
+    if os.environ.get("FAKE_HLS_LOG"):
+        with open(os.environ["FAKE_HLS_LOG"]) as f:
+            for line in f:
+                print(line, end="", flush=True)
+    time.sleep(float(os.environ.get("FAKE_HLS_SLEEP", "0")))
+
+    if report:
+        write_report(report_dir, inputs, top_fxn)
+    emit("INFO: [HLS 200-111] Finished Command csynth_design")
+
+def run_job(
+    episode_no: str,
+    turn_no: str,
+    kernel: str,
+    top_fxn: str,
+    work_dir: Path,
+    crash: bool = False,
+    frontend: bool = False,
+):
+    proj = work_dir / (f"{kernel}_{episode_no}_{turn_no}" + ("_lofi" if frontend else ""))
+    src = work_dir / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c"
+
+    rc = replay(proj / "solution1/syn/report", [src])
+    if rc is not None:
+        return rc
+    emit(f"INFO: [HLS 200-1510] Running: open_project {proj.name}")
+    emit(f"INFO: [HLS 200-10] Adding design file '{src.relative_to(work_dir)}' to the project")
+    csynth(proj / "solution1/syn/report", [src], top_fxn, crash=crash, report=not frontend)
+    return 0
+
+def run_solutions(
+    episode_no: str,
+    turn_no: str,
+    kernel: str,
+    top_fxn: str,
+    src: str,
+    solutions: list,
+):
+    crash_after = int(os.environ.get("FAKE_HLS_CRASH_AFTER", "0"))
+    proj = Path(f"{kernel}_{episode_no}_{turn_no}")
+
+    emit(f"INFO: [HLS 200-1510] Running: open_project {proj}")
+    emit(f"INFO: [HLS 200-10] Adding design file '{src}' to the project")
+    for n, i in enumerate(solutions, start=1):
+        emit(f"@@SOLUTION_BEGIN {i}")
+        emit(f"INFO: [HLS 200-1510] Running: open_solution solution{i} -flow_target vivado")
+        directives = Path(f"EP_{episode_no}/directives/{kernel}_{episode_no}_{turn_no}_{i}.tcl")
+        rc = 0
+        if directives.exists():
+            rc = replay(proj / f"solution{i}/syn/report", [Path(src), directives])
+            if rc is None:
+                rc = 0
+                csynth(proj / f"solution{i}/syn/report", [Path(src), directives], top_fxn, crash=n == crash_after)
+        else:
+            emit(f"ERROR: [SOLUTION] couldn't read file \"{directives}\": no such file or directory")
+            rc = 1
+        emit(f"@@SOLUTION_END {i} {rc}")
+
+def worker():
+    crash_after = int(os.environ.get("FAKE_HLS_CRASH_AFTER", "0"))
+    n = 0
+    emit("@@WORKER_READY")
+    for line in sys.stdin:
+        fields = line.strip().split(" ", 6)
+        if fields[0] == "quit":
+            break
+        if fields[0] != "job" or len(fields) != 7:
+            emit(f"@@ERROR unknown command: {line.strip()}")
+            continue
+
+        job_id, episode_no, turn_no, kernel, top_fxn, work_dir = fields[1:]
+        n += 1
+        try:
+            rc = run_job(episode_no, turn_no, kernel, top_fxn, Path(work_dir.strip("{}")), crash=n == crash_after)
+        except Exception as e:
+            emit(f"ERROR: [WORKER] {e}")
+            rc = 1
+        emit(f"@@JOB_DONE {job_id} {rc}")
+
+if __name__ == "__main__":
+    for line in BANNER:
+        emit(line)
+
+    script = Path(sys.argv[1]).name
+    if script == "syn_worker.tcl":
+        worker()
+    elif script == "syn_multi.tcl":
+        run_solutions(*sys.argv[2:7], solutions=sys.argv[7:])
+    else:
+        if len(sys.argv) != 6:
+            emit("Usage: vitis_hls syn.tcl <episode_no> <turn_no> <kernel> <top_fxn>")
+            sys.exit(1)
+        sys.exit(run_job(*sys.argv[2:6], work_dir=Path.cwd(), frontend=script == "syn_frontend.tcl"))
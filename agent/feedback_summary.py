@@ -0,0 +1,112 @@
+import json
+import math
+import re
+
+from log_classifier import LOOP_LABEL_PAT
+
+LOOP_RE = re.compile(rf"[Ll]oop '({LOOP_LABEL_PAT})'")
+PIPE_RE = re.compile(r"Target II\s*=\s*(\d+),\s*Final II\s*=\s*(\d+),\s*Depth\s*=\s*(\d+)")
+FACTOR_RE = re.compile(r"with a factor of (\d+)")
+INSTR_RE = re.compile(r"There were ([\d,]+) instructions in the design after the '([^']+)' phase")
+
+# per-loop message counts, as phrased for the agent
+VIOLATIONS = {
+    "ii_mem_port_viol": "memory-port II violation",
+    "ii_loop_dep_viol": "dependence II violation",
+}
+
+def estimate_tokens(obj) -> int:
+    # ~4 characters per token of JSON-ish prompt text
+    return len(json.dumps(obj, default=str)) // 4
+
+def aggregate_loops(log_excerpts: dict) -> tuple:
+    """
+    Fold the info/warnings excerpts into per-loop facts. Returns (loops, messages):
+    loops maps a loop label to {"implied_unroll", "unroll_factor", "pipe", "counts"},
+    messages maps every remaining (loop-less) message to its number of occurrences.
+    """
+    loops = {}
+    messages = {}
+    for section in ("warnings", "info"):
+        for key, lines in log_excerpts.get(section, {}).items():
+            for line in lines:
+                m = LOOP_RE.search(line)
+                if m is None:
+                    instr = INSTR_RE.search(line)
+                    if instr is not None:
+                        level = "WARNING: " if section == "warnings" else ""
+                        line = f"{level}{instr.group(1)} instructions after the '{instr.group(2)}' phase"
+                    messages[line] = messages.get(line, 0) + 1
+                    continue
+
+                loop = loops.setdefault(m.group(1), {"implied_unroll": False, "unroll_factor": None, "pipe": None, "counts": {}})
+                if key == "implied_unroll":
+                    loop["implied_unroll"] = True
+                elif key == "complete_unroll_factor" and FACTOR_RE.search(line):
+                    loop["unroll_factor"] = max(loop["unroll_factor"] or 0, int(FACTOR_RE.search(line).group(1)))
+                elif key == "pipe_result" and PIPE_RE.search(line):
+                    loop["pipe"] = tuple(int(g) for g in PIPE_RE.search(line).groups())
+                else:
+                    loop["counts"][key] = loop["counts"].get(key, 0) + 1
+    return loops, messages
+
+def describe_loop(loop: dict) -> str:
+    """
+    e.g. "target II 1, final II 3, depth 12; 2 dependence II violations"
+    """
+    parts = []
+    if loop["implied_unroll"]:
+        parts.append("complete unroll implied by the pipeline pragma")
+    if loop["unroll_factor"]:
+        parts.append(f"unrolled completely with a factor of {loop['unroll_factor']}")
+    if loop["pipe"] is not None:
+        parts.append("target II {}, final II {}, depth {}".format(*loop["pipe"]))
+    for key, n in loop["counts"].items():
+        what = VIOLATIONS.get(key, key)
+        parts.append(f"{n} {what}{'s' if n > 1 and key in VIOLATIONS else ''}")
+    return "; ".join(parts)
+
+def severity(loop: dict) -> float:
+    score = 10 * sum(loop["counts"].values())
+    if loop["pipe"] is not None:
+        score += 5 * (loop["pipe"][1] - loop["pipe"][0])
+    if loop["implied_unroll"]:
+        score += 5
+    if loop["unroll_factor"]:
+        score += math.log2(loop["unroll_factor"])
+    return score
+
+def summarize_excerpts(
+    log_excerpts: dict,
+    budget_tokens: int,
+) -> dict:
+    """
+    {"loops": {label: description}, "messages": [...]} for the agent prompt, most
+    severe loops first, trimmed to roughly budget_tokens; what does not fit is
+    counted under "omitted" (the full excerpts stay in the run's status and log).
+    """
+    loops, messages = aggregate_loops(log_excerpts)
+    ranked = sorted(loops.items(), key=lambda item: (-severity(item[1]), item[0]))
+    lines = [f"{message} (x{n})" if n > 1 else message for message, n in messages.items()]
+
+    summary = {"loops": {}, "messages": []}
+    used = estimate_tokens(summary)
+    for label, loop in ranked:
+        text = describe_loop(loop)
+        cost = estimate_tokens({label: text})
+        if used + cost > budget_tokens:
+            break
+        summary["loops"][label] = text
+        used += cost
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > budget_tokens:
+            break
+        summary["messages"].append(line)
+        used += cost
+
+    omitted_loops = len(ranked) - len(summary["loops"])
+    omitted_messages = len(lines) - len(summary["messages"])
+    if omitted_loops or omitted_messages:
+        summary["omitted"] = {"loops": omitted_loops, "messages": omitted_messages}
+    return summary
@@ -0,0 +1,215 @@
+import itertools
+import os
+import signal
+import subprocess
+import threading
+from pathlib import Path
+
+WORKER_TCL = Path(__file__).resolve().parent / "syn_worker.tcl"
+
+READY = "@@WORKER_READY"
+DONE = "@@JOB_DONE"
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class HLSWorker:
+    """
+    One resident vitis_hls process running syn_worker.tcl. Jobs are written to its
+    stdin one line at a time; its stdout carries the log of the current job up to
+    the "@@JOB_DONE <id> <rc>" sentinel. Started in its own session, so the whole
+    process group can be killed like a one-shot vitis_hls run.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(
+        self,
+        command: list,
+        cwd: str | Path,
+        startup_timeout: float = 600.0,
+    ):
+        self.cwd = Path(cwd)
+        self.cwd.mkdir(parents=True, exist_ok=True)
+        self.jobs = 0
+
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
+        self.proc = subprocess.Popen(
+            [*command, str(WORKER_TCL)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+            cwd=self.cwd,
+            start_new_session=True,
+        )
+
+        # startup banner, license checkout, ... up to the ready sentinel
+        timer = threading.Timer(startup_timeout, self.kill)
+        timer.start()
+        try:
+            for line in self.proc.stdout:
+                if line.startswith(READY):
+                    break
+            else:
+                raise WorkerError(f"vitis_hls worker exited during startup (code {self.proc.wait()})")
+        finally:
+            timer.cancel()
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def submit(
+        self,
+        episode_no: int,
+        turn_no: int | str,
+        kernel: str,
+        top_fxn: str,
+        work_dir: str | Path,
+    ) -> "WorkerJob":
+        job_id = next(self._ids)
+        work_dir = Path(work_dir).resolve()
+        self.proc.stdin.write(f"job {job_id} {episode_no} {turn_no} {kernel} {top_fxn} {{{work_dir}}}\n")
+        self.proc.stdin.flush()
+        self.jobs += 1
+        return WorkerJob(self, job_id)
+
+    def kill(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def close(self, timeout: float = 10.0):
+        if self.alive:
+            try:
+                self.proc.stdin.write("quit\n")
+                self.proc.stdin.flush()
+                self.proc.wait(timeout=timeout)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self.kill()
+        self.kill()
+        self.proc.wait()
+
+
+class WorkerJob:
+    """
+    A job running on an HLSWorker, with the subset of the subprocess.Popen interface
+    used by Trajectory.synthesize_design (pid, stdout, wait), so early kills and the
+    watchdog work unchanged; killing a job kills its worker.
+    """
+
+    def __init__(self, worker: HLSWorker, job_id: int):
+        self.worker = worker
+        self.job_id = job_id
+        self.rc = None
+        self.finished = False
+        self.stdout = self._lines()
+
+    @property
+    def pid(self) -> int:
+        return self.worker.pid
+
+    def _lines(self):
+        for line in self.worker.proc.stdout:
+            if line.startswith(DONE):
+                parts = line.split()
+                if len(parts) == 3 and parts[1] == str(self.job_id):
+                    self.rc = int(parts[2])
+                    self.finished = True
+                    return
+            yield line
+
+    def wait(self, timeout: float | None = None) -> int:
+        if self.finished:
+            return self.rc
+        # killed or crashed mid-job: the worker's own exit code, never a success
+        rc = self.worker.proc.wait(timeout=timeout)
+        return rc or 1
+
+
+class HLSWorkerPool:
+    """
+    Pool of resident vitis_hls workers shared by all trajectories. Workers are
+    started on demand (at most size at a time), reused across jobs and replaced
+    after max_jobs jobs (bounding leaks in the long-lived tool) or whenever a job
+    does not end cleanly (early kill, crash).
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_jobs: int = 50,
+        command: list | None = None,
+        root: str | Path = "./hls_workers",
+        startup_timeout: float = 600.0,
+    ):
+        self.max_jobs = max_jobs
+        self.command = command or ["vitis_hls"]
+        self.root = Path(root)
+        self.startup_timeout = startup_timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._n_started = itertools.count()
+
+    def _spawn(self) -> HLSWorker:
+        cwd = self.root / f"worker_{next(self._n_started)}"
+        return HLSWorker(self.command, cwd=cwd, startup_timeout=self.startup_timeout)
+
+    def submit(
+        self,
+        episode_no: int,
+        turn_no: int | str,
+        kernel: str,
+        top_fxn: str,
+        work_dir: str | Path,
+    ) -> WorkerJob:
+        """
+        Start a job on an idle worker (blocking while all size workers are busy);
+        every job must be handed back with release().
+        """
+        self._slots.acquire()
+        try:
+            worker = None
+            with self._lock:
+                while self._idle and worker is None:
+                    worker = self._idle.pop()
+                    if not worker.alive:
+                        worker.close()
+                        worker = None
+            if worker is not None:
+                try:
+                    return worker.submit(episode_no, turn_no, kernel, top_fxn, work_dir)
+                except OSError:  # died while idle
+                    worker.close()
+            return self._spawn().submit(episode_no, turn_no, kernel, top_fxn, work_dir)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, job: WorkerJob):
+        worker = job.worker
+        try:
+            if job.finished and worker.alive and worker.jobs < self.max_jobs:
+                with self._lock:
+                    self._idle.append(worker)
+            else:
+                worker.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+class Journal:
+    """
+    Append-only JSONL record of a trajectory, one record per finished turn:
+    {"turn", "candidates": [{turn_no, loop_dirs, mem_dirs, src_sha256, status,
+    qor}], "best", "loop_dirs_curr", "feedback_curr", "best_latency"}. The
+    last three are the state the next turn starts from; on turn 0 they may come
+    from an archive elite instead of the base design, which "seed" then records
+    ({config_hash, latency_cycles}).
+
+    Every record is flushed and fsync'ed before the next turn starts, so after a
+    crash the journal holds exactly the turns that completed; a torn last line
+    (crash while writing) is dropped by recover().
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def recover(self) -> list:
+        """
+        Records of the completed turns, truncating a torn tail so that new records
+        can be appended.
+        """
+        records = []
+        valid = 0
+        with self._lock:
+            try:
+                with self.path.open("rb") as f:
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break
+                        try:
+                            records.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            break
+                        valid += len(line)
+            except FileNotFoundError:
+                return []
+            if valid < self.path.stat().st_size:
+                os.truncate(self.path, valid)
+        return records
+
+    def append(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self):
+        with self._lock:
+            self.path.unlink(missing_ok=True)
@@ -0,0 +1,318 @@
+import copy
+import re
+import time
+
+# order in which vitis_hls reports the instruction count after each compilation phase
+# ([HLS 200-1995] "There were N instructions in the design after the '<phase>' phase")
+PHASE_ORDER = [
+    "Compile/Link",
+    "Unroll/Inline (step 1)",
+    "Unroll/Inline (step 2)",
+    "Unroll/Inline (step 3)",
+    "Unroll/Inline (step 4)",
+    "Array/Struct (step 1)",
+    "Array/Struct (step 2)",
+    "Array/Struct (step 3)",
+    "Array/Struct (step 4)",
+    "Array/Struct (step 5)",
+    "Performance (step 1)",
+    "Performance (step 2)",
+    "Performance (step 3)",
+    "Performance (step 4)",
+    "HW Transforms (step 1)",
+    "HW Transforms (step 2)",
+]
+
+PHASE_RE = re.compile(r"after the '([^']+)' phase")
+INSTR_COUNT_RE = re.compile(r"There were ([\d,]+) instructions")
+
+DEFAULT_KILL_CONFIG = {
+    # log_excerpts["counts"] key -> number of messages that triggers a kill
+    "counts": {
+        "instr_count_warn_count": 3,
+        "ii_mem_port_viol_count": 3,
+    },
+    # total seconds a single vitis_hls run may take (None: unlimited)
+    "wall_clock_s": None,
+    # seconds a single compilation phase may take, keyed by phase name or a prefix
+    # of it (e.g. "Unroll/Inline" covers every Unroll/Inline step)
+    "phase_budgets_s": {},
+    # seconds without a single new log line before the run is considered stuck
+    "no_progress_s": None,
+    # largest loop body replication (implied complete unrolls x unroll factors) a
+    # directive set may have before it is rejected without synthesis (None: no screen)
+    "max_static_unroll": 1024,
+    # per-kernel overrides of any of the above, e.g. {"2mm": {"wall_clock_s": 1800}}
+    "kernels": {},
+}
+
+# human-readable reasons for the count thresholds, as seen by the LoopAgent
+COUNT_REASONS = {
+    "instr_count_warn_count": ("instr_count_explosion", "Instruction count explosion detected."),
+    "ii_mem_port_viol_count": ("ii_mem_port_violations", "Memory port II violations detected."),
+}
+
+def kill_reason(
+    policy: str,
+    code: str,
+    message: str,
+    timed: bool = False,
+    **detail,
+) -> dict:
+    """
+    Machine-readable kill reason. timed marks reasons that depend on wall-clock
+    time (and therefore host load) rather than on the design alone.
+    """
+    return {"policy": policy, "code": code, "message": message, "timed": timed, **detail}
+
+
+class KillPolicy:
+    """
+    Base class of early-kill rules. on_event is called for every classified log
+    event, on_tick periodically from a watchdog thread (only if ticking is True);
+    either returns a kill_reason() dict to stop the run, or None.
+    """
+
+    ticking = False
+
+    def start(self, now: float):
+        pass
+
+    def on_event(self, event: dict, counts: dict, now: float) -> dict | None:
+        return None
+
+    def on_tick(self, now: float, last_output: float) -> dict | None:
+        return None
+
+
+class CountThreshold(KillPolicy):
+    def __init__(self, count_key: str, limit: int):
+        self.count_key = count_key
+        self.limit = limit
+        self.code, self.message = COUNT_REASONS.get(
+            count_key, (f"{count_key}_exceeded", f"Too many {count_key} messages.")
+        )
+
+    def on_event(self, event, counts, now):
+        count = counts.get(self.count_key, 0)
+        if count >= self.limit:
+            return kill_reason("count_threshold", self.code, self.message, count_key=self.count_key, count=count, limit=self.limit)
+        return None
+
+
+class WallClockTimeout(KillPolicy):
+    ticking = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = None
+
+    def start(self, now):
+        self.started = now
+
+    def on_tick(self, now, last_output):
+        elapsed = now - self.started
+        if elapsed > self.seconds:
+            return kill_reason(
+                "wall_clock", "wall_clock_timeout",
+                f"Synthesis exceeded the wall-clock budget of {self.seconds:.0f}s.",
+                timed=True, elapsed_s=round(elapsed, 1), limit_s=self.seconds,
+            )
+        return None
+
+
+class PhaseBudget(KillPolicy):
+    """
+    Per-phase time budgets. Phase boundaries come from the [HLS 200-1995]
+    instruction count messages; the phase currently running is the one that
+    follows the last reported phase in PHASE_ORDER.
+    """
+
+    ticking = True
+
+    def __init__(self, budgets: dict):
+        self.budgets = budgets
+        self.phase = PHASE_ORDER[0]
+        self.phase_start = None
+
+    def _budget(self, phase: str | None) -> float | None:
+        if phase is None:
+            return None
+        if phase in self.budgets:
+            return self.budgets[phase]
+        for prefix, budget in self.budgets.items():
+            if phase.startswith(prefix):
+                return budget
+        return None
+
+    def _check(self, phase, elapsed):
+        budget = self._budget(phase)
+        if budget is not None and elapsed > budget:
+            return kill_reason(
+                "phase_budget", "phase_budget_exceeded",
+                f"The '{phase}' phase exceeded its budget of {budget:.0f}s.",
+                timed=True, phase=phase, elapsed_s=round(elapsed, 1), limit_s=budget,
+            )
+        return None
+
+    def start(self, now):
+        self.phase = PHASE_ORDER[0]
+        self.phase_start = now
+
+    def on_event(self, event, counts, now):
+        m = PHASE_RE.search(event["message"])
+        if m is None:
+            return None
+
+        done = m.group(1)
+        reason = self._check(done, now - self.phase_start)
+        try:
+            self.phase = PHASE_ORDER[PHASE_ORDER.index(done) + 1]
+        except (ValueError, IndexError):
+            self.phase = None
+        self.phase_start = now
+        return reason
+
+    def on_tick(self, now, last_output):
+        return self._check(self.phase, now - self.phase_start)
+
+
+class NoProgress(KillPolicy):
+    ticking = True
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def on_tick(self, now, last_output):
+        idle = now - last_output
+        if idle > self.seconds:
+            return kill_reason(
+                "no_progress", "no_progress",
+                f"No synthesis output for {idle:.0f}s.",
+                timed=True, idle_s=round(idle, 1), limit_s=self.seconds,
+            )
+        return None
+
+
+class FrontEndDone(KillPolicy):
+    """
+    Ends a low-fidelity run (syn_frontend.tcl) once the front end is through: at
+    the instruction count reported after phase until, with a "frontend_done"
+    reason that is a pass, not a failure. A design that grows beyond
+    max_instructions in any front-end phase is rejected right there.
+    """
+
+    def __init__(
+        self,
+        until: str = PHASE_ORDER[-1],
+        max_instructions: int | None = None,
+    ):
+        self.until = until
+        self.max_instructions = max_instructions
+
+    def on_event(self, event, counts, now):
+        phase = PHASE_RE.search(event["message"])
+        instr = INSTR_COUNT_RE.search(event["message"])
+        if phase is None or instr is None:
+            return None
+
+        n = int(instr.group(1).replace(",", ""))
+        if self.max_instructions is not None and n > self.max_instructions:
+            return kill_reason(
+                "low_fidelity", "frontend_instructions",
+                f"The design grew to {n} instructions in the '{phase.group(1)}' phase (limit {self.max_instructions}).",
+                phase=phase.group(1), instructions=n, limit=self.max_instructions,
+            )
+        if phase.group(1) == self.until:
+            return kill_reason("low_fidelity", "frontend_done", "Front end done.", phase=phase.group(1), instructions=n)
+        return None
+
+
+class KillMonitor:
+    """
+    Runs a set of policies against one vitis_hls run. The synthesis loop reports
+    output lines (mark_output) and classified events (on_event); the watchdog
+    thread calls on_tick. The first reason returned by any policy sticks.
+    """
+
+    def __init__(self, policies: list):
+        self.policies = policies
+        self.tick_policies = [p for p in policies if p.ticking]
+        self.last_output = None
+        self.tripped = None
+
+    @property
+    def ticking(self) -> bool:
+        return bool(self.tick_policies)
+
+    def start(self):
+        now = time.monotonic()
+        self.last_output = now
+        self.tripped = None
+        for policy in self.policies:
+            policy.start(now)
+
+    def mark_output(self):
+        self.last_output = time.monotonic()
+
+    def on_event(self, event: dict, counts: dict) -> dict | None:
+        now = time.monotonic()
+        for policy in self.policies:
+            reason = policy.on_event(event, counts, now)
+            if reason is not None:
+                self.tripped = self.tripped or reason
+                return self.tripped
+        return None
+
+    def trip(self, reason: dict) -> dict:
+        """
+        Stop the run for an outside reason (e.g. memory pressure on the host).
+        """
+        self.tripped = self.tripped or reason
+        return self.tripped
+
+    def on_tick(self) -> dict | None:
+        now = time.monotonic()
+        for policy in self.tick_policies:
+            reason = policy.on_tick(now, self.last_output)
+            if reason is not None:
+                self.tripped = self.tripped or reason
+                return self.tripped
+        return None
+
+
+def kernel_kill_config(
+    kernel: str,
+    config: dict | None = None,
+) -> dict:
+    """
+    Resolve the effective kill configuration of kernel: defaults, overridden by the
+    top level of config, overridden by config["kernels"][kernel].
+    """
+    config = config or {}
+    resolved = copy.deepcopy(DEFAULT_KILL_CONFIG)
+    for layer in (config, config.get("kernels", {}).get(kernel, {})):
+        for key, value in layer.items():
+            if key == "kernels":
+                continue
+            if isinstance(value, dict) and isinstance(resolved.get(key), dict):
+                resolved[key].update(value)
+            else:
+                resolved[key] = value
+    return resolved
+
+def build_kill_monitor(
+    kernel: str,
+    config: dict | None = None,
+) -> KillMonitor:
+    cfg = kernel_kill_config(kernel, config)
+
+    policies = [CountThreshold(key, limit) for key, limit in cfg["counts"].items() if limit is not None]
+    if cfg["wall_clock_s"] is not None:
+        policies.append(WallClockTimeout(cfg["wall_clock_s"]))
+    if cfg["phase_budgets_s"]:
+        policies.append(PhaseBudget(cfg["phase_budgets_s"]))
+    if cfg["no_progress_s"] is not None:
+        policies.append(NoProgress(cfg["no_progress_s"]))
+
+    return KillMonitor(policies)
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+class LMCache:
+    """
+    Persistent store of agent responses, shared by all trajectories (and runs).
+
+    An entry is keyed by the hash of everything that determines an LM answer:
+    the signature (name, instructions and output fields), the inputs, the model
+    and the sampling temperature. Sampled calls (temperature > 0) also carry a
+    rollout id, so that the n-th sampled candidate of a prompt is reproduced on a
+    re-run instead of every candidate collapsing onto the first cached answer.
+    Each entry is one JSON file <root>/<key[:2]>/<key>.json; entries are evicted
+    least-recently-used first once the store exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 512 * 2**20,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = sum(p.stat().st_size for p in self.root.glob("*/*.json"))
+
+    @staticmethod
+    def key(
+        signature: str,
+        inputs: dict,
+        model: str,
+        temperature: float | None,
+        rollout: str | None = None,
+    ) -> str:
+        text = json.dumps(
+            {"signature": signature, "inputs": inputs, "model": model, "temperature": temperature, "rollout": rollout},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        """
+        Cached outputs for key, or None on a miss.
+        """
+        entry = self._entry(key)
+        try:
+            outputs = json.loads(entry.read_text(encoding="utf-8"))["outputs"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+        # touch for LRU eviction
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        return outputs
+
+    def put(
+        self,
+        key: str,
+        outputs: dict,
+        **info,
+    ):
+        entry = self._entry(key)
+        if entry.exists():
+            return
+        text = json.dumps({"key": key, "created": time.time(), "outputs": outputs, **info}, default=str)
+
+        # publish with a single rename so concurrent readers never see a partial entry
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.parent / f".tmp-{uuid.uuid4().hex}"
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(entry)
+
+        with self._lock:
+            self._total += len(text.encode("utf-8"))
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """
+        Drop least-recently-used entries until the store fits in 90% of max_bytes
+        (so that eviction does not run on every put of a full cache).
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in self.root.glob("*/*.json"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry))
+                total += st.st_size
+
+            for _, size, entry in sorted(entries):
+                if total <= 0.9 * self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= size
+            self._total = total
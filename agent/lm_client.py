@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+import dspy
+
+from lm_cache import LMCache
+from replay import AGENT_OUTPUTS
+
+def is_rate_limit(exc: BaseException) -> bool:
+    """
+    Provider rate limit (litellm.RateLimitError, HTTP 429, ...), as opposed to any
+    other failure, which is not retried here.
+    """
+    if "RateLimit" in type(exc).__name__:
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429
+
+def signature_text(signature) -> str:
+    return f"{signature.__name__}\n{signature.__doc__ or ''}"
+
+
+class LMClient:
+    """
+    Gate between the trajectories and the LM provider, shared by all trajectories.
+
+    At most max_concurrency agent calls are in flight at any time. A call that hits
+    a rate limit is retried with exponential backoff (plus jitter), and the backoff
+    holds back every other call too, so parallel trajectories slow down together
+    instead of hammering the provider. With a cache, identical calls (see
+    LMCache.key) are answered from disk without touching the provider.
+
+    call() blocks the calling thread: trajectories and their candidate fan-out
+    are threads, so the cap is a plain semaphore shared by all of them.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        cache: LMCache | None = None,
+        max_retries: int = 6,
+        backoff_s: float = 2.0,
+        max_backoff_s: float = 120.0,
+    ):
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self._resume_at = 0.0  # no call starts before this time.monotonic() value
+
+    def _wait_backoff(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def _back_off(self, attempt: int) -> float:
+        delay = min(self.max_backoff_s, self.backoff_s * 2**attempt) * random.uniform(0.5, 1.0)
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def call(
+        self,
+        predictor,
+        signature,
+        inputs: dict,
+        config: dict | None = None,
+        model: str | None = None,
+        temperature: float | None = None,
+        rollout: str | None = None,
+    ):
+        """
+        predictor(**inputs, config=config), through the cache and the concurrency cap.
+        temperature is the sampling temperature in effect (config's, else the LM's);
+        rollout distinguishes repeated samples of the same prompt in the cache.
+        Returns the prediction; .cached is set on cache hits.
+        """
+        key = None
+        if self.cache is not None:
+            temperature = (config or {}).get("temperature", temperature)
+            key = LMCache.key(signature_text(signature), inputs, model, temperature, rollout)
+            outputs = self.cache.get(key)
+            if outputs is not None:
+                pred = dspy.Prediction(**outputs)
+                pred.cached = True
+                return pred
+
+        kwargs = {"config": config} if config else {}
+        for attempt in range(self.max_retries + 1):
+            self._wait_backoff()
+            try:
+                with self._slots or nullcontext():
+                    pred = predictor(**inputs, **kwargs)
+                break
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                delay = self._back_off(attempt)
+                print(f"LM rate limited ({type(e).__name__}), backing off {delay:.1f}s")
+
+        if key is not None:
+            outputs = {name: getattr(pred, name, None) for name in AGENT_OUTPUTS[signature.__name__]}
+            self.cache.put(key, outputs, signature=signature.__name__, model=model)
+        return pred
@@ -0,0 +1,129 @@
+import re
+
+LOOP_LABEL_PAT = r"L(?:\d+)(?:_L\d+)*"
+
+class LogClassifier:
+    """
+    Single-pass classifier for Vitis HLS log lines.
+
+    Every interesting message carries an "[HLS xxx-yyyy]" message ID, so instead of
+    trying every pattern on every line the classifier slices out the ID with two
+    str.find calls and only runs the (few) patterns registered for that ID.
+    Lines without an ID, or with an ID nobody registered, cost a substring scan.
+
+    Each message class also declares where its matches go in the log excerpts
+    handed to the agents ("info"/"warnings" section, excerpt key, optional counter),
+    so new classes are added with register() and need no changes elsewhere.
+    """
+
+    ID_START = "[HLS "
+
+    def __init__(self):
+        self._dispatch = {}  # msg_id -> [(name, compiled pattern), ...]
+        self._layout = {}  # name -> (section, key, count_key)
+
+    def register(
+        self,
+        name: str,
+        msg_id: str,
+        pattern: str,
+        section: str = "info",
+        key: str | None = None,
+        count_key: str | None = None,
+    ):
+        """
+        Register a message class. msg_id is the bare ID (e.g. "200-1995"); pattern
+        is matched against the full line. Matches are collected under
+        log_excerpts[section][key] (default: name) and, if count_key is given,
+        counted under log_excerpts["counts"][count_key].
+        """
+        if name in self._layout:
+            raise ValueError(f"message class {name!r} is already registered")
+        self._dispatch.setdefault(msg_id, []).append((name, re.compile(pattern)))
+        self._layout[name] = (section, key or name, count_key)
+
+    def classify(self, line: str) -> dict | None:
+        start = line.find(self.ID_START)
+        if start < 0:
+            return None
+        start += len(self.ID_START)
+        end = line.find("]", start)
+        if end < 0:
+            return None
+
+        candidates = self._dispatch.get(line[start:end])
+        if candidates is None:
+            return None
+
+        for name, pattern in candidates:
+            m = pattern.search(line)
+            if m is not None:
+                return {"type": name, "message": line.strip(), "groups": m.groups()}
+        return None
+
+    def empty_excerpts(self) -> dict:
+        excerpts = {"info": {}, "warnings": {}, "counts": {}}
+        for section, key, count_key in self._layout.values():
+            excerpts.setdefault(section, {})[key] = []
+            if count_key is not None:
+                excerpts["counts"][count_key] = 0
+        return excerpts
+
+    def record(
+        self,
+        excerpts: dict,
+        event: dict,
+    ):
+        section, key, count_key = self._layout[event["type"]]
+        excerpts[section][key].append(event["message"])
+        if count_key is not None:
+            excerpts["counts"][count_key] += 1
+
+
+def default_classifier() -> LogClassifier:
+    classifier = LogClassifier()
+
+    # detect instruction count explosion during compilation
+    classifier.register(
+        "instr_count_compile", "200-1995",
+        r"INFO:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the 'Compile/Link' phase of compilation",
+    )
+    classifier.register(
+        "instr_count_warn", "200-1995",
+        r"WARNING:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the '([^']+)' phase of compilation",
+        section="warnings", count_key="instr_count_warn_count",
+    )
+    # remaining phase boundaries, kept apart from the agent feedback (used for phase budgets)
+    classifier.register(
+        "instr_count_phase", "200-1995",
+        r"INFO:\s*\[HLS 200-1995\].*There were ([\d,]+) instructions in the design after the '([^']+)' phase of compilation",
+        section="phases",
+    )
+
+    # detect II violations of memory ports (often diagnosed by implied unrolls)
+    classifier.register(
+        "implied_unroll", "214-291",
+        rf"INFO:\s*\[HLS 214-291\].*Loop '{LOOP_LABEL_PAT}' is marked as complete unroll implied by the pipeline pragma",
+    )
+    classifier.register(
+        "complete_unroll_factor", "214-186",
+        rf"INFO:\s*\[HLS 214-186\].*Unrolling loop '{LOOP_LABEL_PAT}'.*completely with a factor of (\d+)",
+    )
+    classifier.register(
+        "ii_mem_port_violation", "200-885",
+        r"WARNING:\s*\[HLS 200-885\].*II Violation.*limited memory ports",
+        section="warnings", key="ii_mem_port_viol", count_key="ii_mem_port_viol_count",
+    )
+
+    # detect II violations of loop dependencies
+    classifier.register(
+        "ii_loop_dep_violation", "200-880",
+        r"WARNING:\s*\[HLS 200-880\].*II Violation.*carried dependence constraint",
+        section="warnings", key="ii_loop_dep_viol", count_key="ii_loop_dep_viol_count",
+    )
+    classifier.register(
+        "pipe_result", "200-1470",
+        r"INFO:\s*\[HLS 200-1470\].*Pipelining result\s*:\s*Target II\s*=\s*(\d+),\s*Final II\s*=\s*(\d+),\s*Depth\s*=\s*(\d+)",
+    )
+
+    return classifier
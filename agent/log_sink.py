@@ -0,0 +1,115 @@
+import gzip
+import json
+import time
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for compression="zstd"
+    zstandard = None
+
+SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+class LogSink:
+    """
+    Low-overhead sink for one vitis_hls log.
+
+    Lines are collected in memory and written out in chunks of roughly chunk_size
+    characters, optionally gzip/zstd-compressed on the fly, so a run that prints
+    hundreds of thousands of lines costs a handful of write calls instead of one
+    per line. Classified events go to a JSONL sidecar (<log>.events.jsonl), one
+    compact record per event with its offset in seconds from the start of the run,
+    so downstream consumers never need to re-read the raw log.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        compression: str | None = None,
+        events: bool = True,
+        chunk_size: int = 1 << 20,
+    ):
+        if compression not in SUFFIXES:
+            raise ValueError(f"unknown log compression {compression!r}, expected one of {list(SUFFIXES)}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd log compression requires the 'zstandard' package")
+
+        self.path = Path(str(path) + SUFFIXES[compression])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.start = time.monotonic()
+
+        self._raw = open(self.path, "wb")
+        if compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=3)
+        elif compression == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=3).stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+        self._pending = []
+        self._pending_chars = 0
+
+        self.events_path = None
+        self._events = None
+        self._pending_events = []
+        if events:
+            self.events_path = Path(str(path) + ".events.jsonl")
+            self._events = open(self.events_path, "w", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, line: str):
+        self._pending.append(line)
+        self._pending_chars += len(line)
+        if self._pending_chars >= self.chunk_size:
+            self.flush()
+
+    def event(self, event: dict):
+        if self._events is None:
+            return
+        record = {
+            "t": round(time.monotonic() - self.start, 3),
+            "type": event["type"],
+            "groups": event.get("groups", ()),
+            "message": event["message"],
+        }
+        self._pending_events.append(json.dumps(record, separators=(",", ":")))
+
+    def status(self, status: dict):
+        """
+        Close the event stream with the outcome of the run.
+        """
+        if self._events is None:
+            return
+        record = {
+            "t": round(time.monotonic() - self.start, 3),
+            "type": "status",
+            "status": status["status"],
+            "reason": status.get("reason", ""),
+            "kill": status.get("kill"),
+        }
+        self._pending_events.append(json.dumps(record, separators=(",", ":")))
+
+    def flush(self):
+        if self._pending:
+            self._stream.write("".join(self._pending).encode("utf-8", "replace"))
+            self._pending = []
+            self._pending_chars = 0
+        if self._pending_events:
+            self._events.write("\n".join(self._pending_events) + "\n")
+            self._pending_events = []
+
+    def close(self):
+        if self._raw.closed:
+            return
+        self.flush()
+        if self._stream is not self._raw:
+            self._stream.close()
+        if not self._raw.closed:
+            self._raw.close()
+        if self._events is not None:
+            self._events.close()
@@ -0,0 +1,396 @@
+import ast
+import functools
+import math
+import re
+
+from kill_policy import kill_reason
+from slot_template import unroll_factor
+
+SLOT_RE = re.compile(r"//\s*@slot\s+(\S+)")
+COMMENT_RE = re.compile(r"/\*.*?\*/|//[^\n]*", re.S)
+PREPROC_RE = re.compile(r"^\s*#[^\n]*", re.M)
+FOR_RE = re.compile(r"\bfor\s*\(")
+LABEL_RE = re.compile(r"([A-Za-z_]\w*)\s*:\s*$")
+IDENT_RE = re.compile(r"[A-Za-z_]\w*")
+CAST_RE = re.compile(r"\(\s*(?:(?:unsigned|signed|const)\s+)*(?:char|short|int|long|float|double)\s*\)")
+INT_SUFFIX_RE = re.compile(r"\b(\d+)[uUlL]+\b")
+ASSIGN_RE = re.compile(r"(?:\b(?:int|long|unsigned|char|short)\s+)*\b([A-Za-z_]\w*)\s*=(?!=)\s*([^;]+);")
+DECL_RE = re.compile(r"\b(?:unsigned\s+|signed\s+|const\s+)*(?:double|float|int|char|short|long|\w+_t)\s+([A-Za-z_]\w*)\s*((?:\[\s*\d+\s*\])+)")
+CMP_RE = re.compile(r"^(.*?)(<=|>=|!=|<|>)(.*)$")
+
+C_KEYWORDS = {"int", "long", "char", "short", "unsigned", "signed", "double", "float", "const", "sizeof", "L"}
+
+##########################
+### expression helpers ###
+##########################
+
+def _strip_casts(expr: str) -> str:
+    expr = CAST_RE.sub("", expr)
+    return INT_SUFFIX_RE.sub(r"\1", expr).strip()
+
+def _strip_parens(expr: str) -> str:
+    expr = expr.strip()
+    while expr.startswith("(") and _match(expr, 0, "(", ")") == len(expr) - 1:
+        expr = expr[1:-1].strip()
+    return expr
+
+def _eval_int(expr: str) -> int | None:
+    """
+    Evaluate a constant C integer expression (casts and suffixes ignored).
+    """
+    try:
+        tree = ast.parse(_strip_casts(expr), mode="eval")
+    except SyntaxError:
+        return None
+
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            v = ev(node.operand)
+            return -v if isinstance(node.op, ast.USub) else v
+        if isinstance(node, ast.BinOp):
+            a, b = ev(node.left), ev(node.right)
+            if isinstance(node.op, ast.Add):
+                return a + b
+            if isinstance(node.op, ast.Sub):
+                return a - b
+            if isinstance(node.op, ast.Mult):
+                return a * b
+            if isinstance(node.op, (ast.Div, ast.FloorDiv)):
+                return int(a / b)  # C truncates toward zero
+            if isinstance(node.op, ast.Mod):
+                return a % b
+        raise ValueError
+
+    try:
+        return ev(tree)
+    except (ValueError, ZeroDivisionError, RecursionError):
+        return None
+
+def _match(text: str, i: int, open_ch: str, close_ch: str) -> int:
+    """
+    Index of the bracket closing the one opened at text[i] (len(text) if unbalanced).
+    """
+    depth = 0
+    for j in range(i, len(text)):
+        c = text[j]
+        if c == open_ch:
+            depth += 1
+        elif c == close_ch:
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(text)
+
+def _statement_end(text: str, i: int, end: int) -> int:
+    """
+    Index just past the statement starting at text[i] (a braced block or up to ';').
+    """
+    while i < end and text[i].isspace():
+        i += 1
+    if i < end and text[i] == "{":
+        return _match(text, i, "{", "}") + 1
+    m = FOR_RE.match(text, i)
+    if m is not None:
+        header_end = _match(text, m.end() - 1, "(", ")")
+        return _statement_end(text, header_end + 1, end)
+    depth = 0
+    for j in range(i, end):
+        c = text[j]
+        if c in "([{":
+            depth += 1
+        elif c in ")]}":
+            depth -= 1
+        elif c == ";" and depth == 0:
+            return j + 1
+    return end
+
+def _identifiers(expr: str) -> set:
+    return {tok for tok in IDENT_RE.findall(expr) if tok not in C_KEYWORDS}
+
+###################
+### trip counts ###
+###################
+
+def trip_count(init: str, cond: str, step: str) -> tuple:
+    """
+    (loop variable, constant trip count or None) of a for (init; cond; step) header.
+    """
+    init, cond, step = init.strip(), cond.strip(), step.strip()
+
+    m = re.match(r"^(?:\w+\s+)*([A-Za-z_]\w*)\s*=\s*(.+)$", init)
+    if m is None:
+        return None, None
+    var = m.group(1)
+    start = _eval_int(m.group(2))
+    if start is None:
+        return var, None
+
+    # for (i = 8; --i;) runs 7 times, for (i = 8; i--;) runs 8 times
+    if not step:
+        if _strip_parens(_strip_casts(cond)) in (f"--{var}", f"{var}--"):
+            return var, max(start - (1 if cond.startswith("--") else 0), 0)
+        return var, None
+
+    if re.fullmatch(rf"(\+\+\s*{var}|{var}\s*\+\+)", step):
+        inc = 1
+    elif re.fullmatch(rf"(--\s*{var}|{var}\s*--)", step):
+        inc = -1
+    else:
+        sm = re.fullmatch(rf"{var}\s*([+-])=\s*(.+)", step) or re.fullmatch(rf"{var}\s*=\s*{var}\s*([+-])\s*(.+)", step)
+        if sm is None:
+            return var, None
+        inc = _eval_int(sm.group(2))
+        if inc is None or inc == 0:
+            return var, None
+        inc = inc if sm.group(1) == "+" else -inc
+
+    cm = CMP_RE.match(_strip_casts(cond))
+    if cm is None:
+        return var, None
+    lhs, op, rhs = _strip_parens(cm.group(1)), cm.group(2), _strip_parens(cm.group(3))
+    if rhs == var and lhs != var:
+        lhs, rhs = rhs, lhs
+        op = {"<": ">", ">": "<", "<=": ">=", ">=": "<=", "!=": "!="}[op]
+    if lhs != var:
+        return var, None
+    bound = _eval_int(rhs)
+    if bound is None:
+        return var, None
+
+    if op == "<" and inc > 0:
+        n = math.ceil((bound - start) / inc)
+    elif op == "<=" and inc > 0:
+        n = (bound - start) // inc + 1
+    elif op == ">" and inc < 0:
+        n = math.ceil((start - bound) / -inc)
+    elif op == ">=" and inc < 0:
+        n = (start - bound) // -inc + 1
+    elif op == "!=" and (bound - start) % inc == 0:
+        n = (bound - start) // inc
+    else:
+        return var, None
+    return var, max(n, 0)
+
+#######################
+### loop nest model ###
+#######################
+
+class LoopNest:
+    """
+    Static model of a slot-annotated kernel: the loop forest (labeled and
+    unlabeled loops) with constant trip counts, the array accesses made directly
+    in each loop body and the loop variables each subscript depends on, the
+    declared array shapes, and the @slot markers.
+
+    Loops are plain dicts: {"label", "var", "trip_count", "children", "accesses",
+    "parent"}; accesses are {"array", "indices", "vars", "write"} where vars holds,
+    per dimension, the enclosing loop variables the subscript depends on (through
+    simple scalar assignments such as i_row = i * 64).
+    """
+
+    def __init__(self, src: str):
+        self.slots = SLOT_RE.findall(src)
+        text = PREPROC_RE.sub("", COMMENT_RE.sub(" ", src))
+        self.arrays = {name: [int(d) for d in re.findall(r"\d+", dims)] for name, dims in DECL_RE.findall(text)}
+        self.roots = []
+        self.loops = {}  # label -> loop
+        self._parse(text, 0, len(text), None, {})
+
+    def _parse(self, text: str, start: int, end: int, parent: dict | None, derived: dict):
+        # loops directly inside [start, end): (for match, header end, body end)
+        found = []
+        pos = start
+        while True:
+            m = FOR_RE.search(text, pos, end)
+            if m is None:
+                break
+            header_end = _match(text, m.end() - 1, "(", ")")
+            body_end = _statement_end(text, header_end + 1, end)
+            found.append((m, header_end, body_end))
+            pos = body_end
+
+        if parent is not None:
+            # the loop's own statements, without the bodies of nested loops
+            own = []
+            prev = start
+            for m, _, body_end in found:
+                own.append(text[prev:m.start()])
+                prev = body_end
+            own.append(text[prev:end])
+            own = " ".join(own)
+
+            loop_vars = {loop["var"] for loop in self.enclosing(parent) + [parent] if loop["var"]}
+
+            # scalars computed from loop variables (i_row = i * 64, _in_j = 58 - j, ...)
+            for name, expr in ASSIGN_RE.findall(own):
+                if name in loop_vars:
+                    continue
+                deps = set()
+                for ident in _identifiers(expr):
+                    deps |= derived.get(ident, {ident} & loop_vars)
+                derived[name] = deps
+
+            parent["accesses"].extend(self._accesses(own, loop_vars, derived))
+
+        children = self.roots if parent is None else parent["children"]
+        for m, header_end, body_end in found:
+            parts = text[m.end():header_end].split(";")
+            lm = LABEL_RE.search(text, max(start, m.start() - 64), m.start())
+            var, trips = trip_count(*parts) if len(parts) == 3 else (None, None)
+            loop = {
+                "label": lm.group(1) if lm else None,
+                "var": var,
+                "trip_count": trips,
+                "children": [],
+                "accesses": [],
+                "parent": parent,
+            }
+            children.append(loop)
+            if loop["label"] is not None:
+                self.loops[loop["label"]] = loop
+            self._parse(text, header_end + 1, body_end, loop, dict(derived))
+
+    def _accesses(self, text: str, loop_vars: set, derived: dict) -> list:
+        accesses = []
+        for m in IDENT_RE.finditer(text):
+            name = m.group(0)
+            if name not in self.arrays:
+                continue
+            i = m.end()
+            while i < len(text) and text[i].isspace():
+                i += 1
+            indices = []
+            while i < len(text) and text[i] == "[":
+                close = _match(text, i, "[", "]")
+                indices.append(text[i + 1:close].strip())
+                i = close + 1
+            if not indices:
+                continue
+
+            rest = text[i:i + 3].lstrip()
+            write = bool(re.match(r"(=(?!=)|[+\-*/|&^]=)", rest))
+            dims = []
+            for index in indices:
+                deps = set()
+                for ident in _identifiers(index):
+                    deps |= derived.get(ident, {ident} & loop_vars)
+                dims.append(deps)
+            accesses.append({"array": name, "indices": indices, "vars": dims, "write": write})
+        return accesses
+
+    def walk(self, loops: list | None = None):
+        for loop in self.roots if loops is None else loops:
+            yield loop
+            yield from self.walk(loop["children"])
+
+    def enclosing(self, loop: dict) -> list:
+        """
+        Loops enclosing loop, outermost first (loop itself excluded).
+        """
+        chain = []
+        node = loop["parent"]
+        while node is not None:
+            chain.append(node)
+            node = node["parent"]
+        return chain[::-1]
+
+    def max_inner_product(self, loop: dict) -> int | None:
+        """
+        Largest product of trip counts along any path strictly inside loop, i.e. the
+        number of copies of the innermost body when loop is pipelined (None if a
+        nested trip count is not a constant).
+        """
+        best = 1
+        for child in loop["children"]:
+            if child["trip_count"] is None:
+                return None
+            inner = self.max_inner_product(child)
+            if inner is None:
+                return None
+            best = max(best, child["trip_count"] * inner)
+        return best
+
+    def estimate(self, loop_dirs: list) -> dict:
+        """
+        Estimate the hardware replication implied by a loop directive set: loops
+        nested in a pipelined loop are completely unrolled, unroll pragmas elsewhere
+        replicate by their factor. Returns {"replication": largest number of copies
+        of any loop body, "pipelined": {label: implied complete unroll},
+        "variable_trip": [labels of pipelined loops over non-constant inner loops]}.
+        """
+        pipelined = set()
+        unroll = {}
+        for d in loop_dirs or []:
+            label = d.get("slot", "").split("__")[-1]
+            if label not in self.loops:
+                continue
+            if d.get("pragma") == "pipeline":
+                pipelined.add(label)
+            elif d.get("pragma") == "unroll":
+                trips = self.loops[label]["trip_count"]
+                factor = int(unroll_factor(d))
+                unroll[label] = min(factor, trips) if trips else factor
+
+        implied = {}
+        variable = []
+        for label in sorted(pipelined):
+            inner = self.max_inner_product(self.loops[label])
+            if inner is None:
+                variable.append(label)
+            implied[label] = inner
+
+        replication = 1
+        stack = [(loop, 1, False) for loop in self.roots]
+        while stack:
+            loop, mult, in_pipeline = stack.pop()
+            if in_pipeline:
+                factor = loop["trip_count"] or 1
+            else:
+                factor = unroll.get(loop["label"], 1)
+            mult *= factor
+            replication = max(replication, mult)
+            child_in_pipeline = in_pipeline or loop["label"] in pipelined
+            stack.extend((child, mult, child_in_pipeline) for child in loop["children"])
+
+        return {"replication": replication, "pipelined": implied, "variable_trip": variable}
+
+
+@functools.lru_cache(maxsize=128)
+def analyze(src: str) -> LoopNest:
+    return LoopNest(src)
+
+def screen(
+    nest: LoopNest,
+    loop_dirs: list,
+    max_unroll: int | None = 1024,
+) -> dict | None:
+    """
+    Pre-synthesis feasibility screen. Returns a kill_reason() dict if the directive
+    set would obviously blow up in Vitis HLS, None if it is worth synthesizing.
+    """
+    est = nest.estimate(loop_dirs)
+
+    if est["variable_trip"]:
+        label = est["variable_trip"][0]
+        return kill_reason(
+            "static_screen", "variable_trip_in_pipeline",
+            f"Pipelining {label} requires completely unrolling an inner loop without a constant trip count.",
+            loop=label,
+        )
+
+    if max_unroll is not None and est["replication"] > max_unroll:
+        worst = max(est["pipelined"].items(), key=lambda kv: kv[1] or 0, default=(None, None))
+        if worst[1] is not None and worst[1] > max_unroll:
+            message = f"Pipelining {worst[0]} implies a complete unroll of {worst[1]} inner iterations (limit {max_unroll})."
+        else:
+            message = f"The directives replicate a loop body {est['replication']} times (limit {max_unroll})."
+        return kill_reason(
+            "static_screen", "implied_unroll_too_large", message,
+            loop=worst[0], replication=est["replication"], limit=max_unroll,
+        )
+
+    return None
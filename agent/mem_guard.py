@@ -0,0 +1,195 @@
+import threading
+
+from kill_policy import kill_reason
+from telemetry import groups_rss
+
+GiB = 2**30
+
+def mem_available() -> int | None:
+    """
+    MemAvailable of the host (bytes), None where /proc/meminfo is not readable.
+    """
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Admission:
+    """
+    One vitis_hls run admitted by a MemoryGuard: entering blocks until the run fits
+    in memory, attach() hands over its process group and how to kill it, leaving
+    ends the run's accounting.
+    """
+
+    def __init__(self, guard: "MemoryGuard", kernel: str):
+        self.guard = guard
+        self.kernel = kernel
+        self.reserve = guard.estimate(kernel)
+        self.pgid = None
+        self.kill = None
+        self.rss = 0
+        self.peak = 0
+        self.killed = False
+
+    def attach(self, pgid: int, kill):
+        """
+        kill(reason) stops the run with a kill_policy.kill_reason() dict.
+        """
+        with self.guard._cond:
+            self.pgid = pgid
+            self.kill = kill
+
+    def __enter__(self):
+        self.guard._admit(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.guard._leave(self)
+
+
+class MemoryGuard:
+    """
+    Memory admission control and RSS watchdog for the vitis_hls runs of one host,
+    shared by all trajectories.
+
+    A run is admitted once its expected peak RSS (the peaks seen for its kernel so
+    far, default_job_bytes before the first one) fits both in budget_bytes next to
+    the runs in flight and above min_available_bytes of host MemAvailable; with no
+    run in flight it is always admitted. While runs are in flight, the RSS of their
+    process groups is sampled every interval seconds: a run above job_limit_bytes
+    is killed on its own account, and if the host is under pressure (the runs
+    exceed budget_bytes, or MemAvailable drops below min_available_bytes) the
+    largest run is killed with a "memory_limit" reason, one per sample.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int | None = None,
+        min_available_bytes: int | None = None,
+        job_limit_bytes: int | None = None,
+        default_job_bytes: int = 2 * GiB,
+        interval: float = 1.0,
+    ):
+        self.budget_bytes = budget_bytes
+        self.min_available_bytes = min_available_bytes
+        self.job_limit_bytes = job_limit_bytes
+        self.default_job_bytes = default_job_bytes
+        self.interval = interval
+        self.kills = 0
+        self._cond = threading.Condition()
+        self._runs = set()
+        self._estimates = {}  # kernel -> smoothed peak RSS of its runs
+        self._done = threading.Event()
+        self._thread = None
+
+    def estimate(self, kernel: str) -> int:
+        with self._cond:
+            return self._estimates.get(kernel, self.default_job_bytes)
+
+    def admission(self, kernel: str) -> Admission:
+        return Admission(self, kernel)
+
+    def _committed(self) -> int:
+        # runs that have not grown to their expected size yet still hold it
+        return sum(max(run.rss, run.reserve) for run in self._runs)
+
+    def _fits(self, run: Admission) -> bool:
+        if not self._runs:
+            return True
+        if self.budget_bytes is not None and self._committed() + run.reserve > self.budget_bytes:
+            return False
+        if self.min_available_bytes is not None:
+            available = mem_available()
+            pending = sum(max(0, r.reserve - r.rss) for r in self._runs)
+            if available is not None and available - pending - run.reserve < self.min_available_bytes:
+                return False
+        return True
+
+    def _admit(self, run: Admission):
+        with self._cond:
+            # MemAvailable changes without notice, so re-check every interval
+            while not self._fits(run):
+                self._cond.wait(self.interval)
+            self._runs.add(run)
+
+    def _leave(self, run: Admission):
+        with self._cond:
+            self._runs.discard(run)
+            if run.peak:
+                prev = self._estimates.get(run.kernel)
+                self._estimates[run.kernel] = run.peak if prev is None else (prev + run.peak) // 2
+            self._cond.notify_all()
+
+    def _victims(self) -> list:
+        """
+        (run, reason) pairs to kill after a sample.
+        """
+        victims = []
+        attached = [run for run in self._runs if run.pgid is not None and not run.killed]
+        if self.job_limit_bytes is not None:
+            for run in attached:
+                if run.rss > self.job_limit_bytes:
+                    victims.append((run, kill_reason(
+                        "memory", "job_memory_limit",
+                        f"Memory limit: synthesis grew to {run.rss / GiB:.1f} GiB (limit {self.job_limit_bytes / GiB:.1f} GiB).",
+                        rss_bytes=run.rss, limit_bytes=self.job_limit_bytes,
+                    )))
+        if victims or not attached:
+            return victims
+
+        total = sum(run.rss for run in self._runs)
+        available = mem_available() if self.min_available_bytes is not None else None
+        over_budget = self.budget_bytes is not None and total > self.budget_bytes
+        low_memory = available is not None and available < self.min_available_bytes
+        if over_budget or low_memory:
+            largest = max(attached, key=lambda run: run.rss)
+            # depends on what else runs on the host, like the time budgets
+            victims.append((largest, kill_reason(
+                "memory", "memory_limit",
+                f"Memory limit: the host ran short of memory and this synthesis was the largest "
+                f"running one ({largest.rss / GiB:.1f} GiB).",
+                timed=True, rss_bytes=largest.rss, total_bytes=total, available_bytes=available,
+            )))
+        return victims
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            with self._cond:
+                runs = [run for run in self._runs if run.pgid is not None]
+            if not runs:
+                continue
+            rss = groups_rss({run.pgid for run in runs})
+            with self._cond:
+                for run in runs:
+                    run.rss = rss[run.pgid]
+                    run.peak = max(run.peak, run.rss)
+                victims = self._victims()
+                for run, _ in victims:
+                    run.killed = True
+                self.kills += len(victims)
+            for run, reason in victims:
+                print(f"memory guard: killing a {run.kernel} run: {reason['message']}")
+                run.kill(reason)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
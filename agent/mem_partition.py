@@ -0,0 +1,73 @@
+import re
+
+from loop_analysis import DECL_RE, analyze
+from slot_template import unroll_factor
+
+INDIRECT_RE = re.compile(r"[A-Za-z_]\w*\s*\[")
+
+def top_arrays(src: str, top_fxn: str) -> dict:
+    """
+    Arrays declared as parameters of top_fxn (name -> dims); only those can be
+    partitioned by a pragma placed at the top of the function body.
+    """
+    m = re.search(rf"\bvoid\s+{re.escape(top_fxn)}\s*\(([^)]*)\)", src)
+    if m is None:
+        return {}
+    return {name: [int(d) for d in re.findall(r"\d+", dims)] for name, dims in DECL_RE.findall(m.group(1))}
+
+def partition_directives(
+    src_base: str,
+    top_fxn: str,
+    loop_dirs: list,
+) -> tuple:
+    """
+    Rule-based array_partition directives for a loop directive set, following the
+    MemoryAgent rules: for every loop unrolled by U > 1, each top-level array
+    dimension subscripted by its loop variable is partitioned cyclically by U
+    (capped at the dimension size); several unrolls of one dimension keep the
+    largest factor.
+
+    Returns (mem_dirs, unresolved), where unresolved lists the unrolls or accesses
+    the rules could not handle ({"slot", "array", "reason"}) and that should be left
+    to the MemoryAgent.
+    """
+    nest = analyze(src_base)
+    params = top_arrays(src_base, top_fxn)
+
+    factors = {}  # (array, dim) -> factor
+    unresolved = []
+    for d in loop_dirs or []:
+        if d.get("pragma") != "unroll":
+            continue
+        slot = d.get("slot", "")
+        loop = nest.loops.get(slot.split("__")[-1])
+        if loop is None or loop["var"] is None:
+            unresolved.append({"slot": slot, "array": None, "reason": "unknown loop or loop variable"})
+            continue
+        factor = int(unroll_factor(d))
+        if factor <= 1:
+            continue
+
+        for inner in [loop, *nest.walk(loop["children"])]:
+            for access in inner["accesses"]:
+                dims = [i for i, deps in enumerate(access["vars"]) if loop["var"] in deps]
+                if not dims:
+                    continue
+                if access["array"] not in params:
+                    unresolved.append({"slot": slot, "array": access["array"], "reason": "array is not a parameter of the top function"})
+                    continue
+                if any(INDIRECT_RE.search(access["indices"][i]) for i in dims):
+                    unresolved.append({"slot": slot, "array": access["array"], "reason": "indirect subscript"})
+                    continue
+                shape = params[access["array"]]
+                for i in dims:
+                    size = shape[i] if i < len(shape) else factor
+                    key = (access["array"], i + 1)
+                    factors[key] = max(factors.get(key, 1), min(factor, size))
+
+    mem_dirs = [
+        {"pragma": "array_partition", "variable": array, "type": "cyclic", "factor": factor, "dim": dim}
+        for (array, dim), factor in sorted(factors.items())
+        if factor > 1
+    ]
+    return mem_dirs, unresolved
@@ -0,0 +1,362 @@
+import json
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+MEMO_NAME = "csynth.qor.json"
+MEMO_VERSION = 1
+
+RESOURCES = ("bram", "dsp", "ff", "lut", "uram")
+# csynth.xml tag names of the resources above
+XML_RESOURCES = {"bram": "BRAM_18K", "dsp": "DSP", "ff": "FF", "lut": "LUT", "uram": "URAM"}
+
+UTIL_RE = re.compile(r"\((?:~)?(\d+(?:\.\d+)?)%\)")
+PIPE_RESULT_LOOP_RE = re.compile(r"Target II\s*=\s*(\d+),\s*Final II\s*=\s*(\d+),\s*Depth\s*=\s*(\d+),\s*loop '([^']+)'")
+
+def _int(text: str | None) -> int | None:
+    if text is None:
+        return None
+    text = text.strip().replace(",", "")
+    try:
+        return int(float(text))
+    except ValueError:
+        return None  # "-", "?", "undef", ...
+
+def _float(text: str | None) -> float | None:
+    if text is None:
+        return None
+    try:
+        return float(text.strip().split()[0].lstrip("~"))
+    except (ValueError, IndexError):
+        return None
+
+def _resource_cell(cell: str) -> dict:
+    """
+    "2345 (~1%)" -> {"total": 2345, "util": 1.0}; "-" -> {"total": None, "util": None}
+    """
+    cell = cell.strip()
+    m = UTIL_RE.search(cell)
+    return {
+        "total": _int(cell.split()[0]) if cell else None,
+        "util": float(m.group(1)) if m else None,
+    }
+
+def _node(kind: str, name: str) -> dict:
+    return {"kind": kind, "name": name, "children": []}
+
+###########################
+### csynth.rpt (tables) ###
+###########################
+
+def parse_csynth_rpt(path: str | Path) -> dict:
+    """
+    Parse csynth.rpt in a single pass: the timing summary, the utilization summary
+    and the "Performance & Resource Estimates" table, whose '+'/'o' rows (modules
+    and loops, indented by depth) are rebuilt into a tree.
+    """
+    report = {"source": "csynth.rpt", "top": None, "clock": {}, "resources": {}, "tree": None}
+    section = None
+    stack = []  # [(depth, node)]
+    util_header = None
+    util_rows = {}
+
+    with open(path, "r", encoding="utf-8", errors="replace") as rpt:
+        for line in rpt:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith("+ "):
+                section = line[2:].split(":")[0].strip()
+                continue
+            if line.startswith("== "):
+                section = line.strip("= ").strip()
+                continue
+            if not line.startswith("|"):
+                continue
+
+            cells = line.split("|")
+
+            if section == "Timing":
+                if len(cells) > 3 and cells[1].strip() == "ap_clk":
+                    report["clock"] = {"target_ns": _float(cells[2]), "estimated_ns": _float(cells[3])}
+
+            elif section == "Performance & Resource Estimates":
+                if len(cells) < 15:
+                    continue
+                label = cells[1]
+                stripped = label.lstrip(" ")
+                if stripped[:2] not in ("+ ", "o ", "* "):
+                    continue  # header rows
+
+                depth = len(label) - len(stripped)
+                kind = "loop" if stripped[0] == "o" else "module"
+                node = _node(kind, stripped[2:].strip())
+                node.update({
+                    "issue": None if cells[2].strip() in ("", "-") else cells[2].strip(),
+                    "slack_ns": _float(cells[3]),
+                    "latency_cycles": _int(cells[4]),
+                    "latency_ns": _float(cells[5]),
+                    "iteration_latency": _int(cells[6]),
+                    "interval": _int(cells[7]),
+                    "trip_count": _int(cells[8]),
+                    "pipelined": cells[9].strip() == "yes",
+                })
+                if kind == "module":
+                    node["resources"] = {
+                        res: _resource_cell(cells[10 + i]) for i, res in enumerate(RESOURCES)
+                    }
+                else:
+                    node["ii"] = node["interval"] if node["pipelined"] else None
+                    node["target_ii"] = None
+
+                while stack and stack[-1][0] >= depth:
+                    stack.pop()
+                if stack:
+                    stack[-1][1]["children"].append(node)
+                elif report["tree"] is None:
+                    report["tree"] = node
+                stack.append((depth, node))
+
+            elif section == "Utilization Estimates":
+                name = cells[1].strip()
+                values = [c.strip() for c in cells[2:-1]]
+                if name == "Name" and util_header is None:
+                    util_header = [v.lower().replace("bram_18k", "bram") for v in values]
+                elif name in ("Total", "Available", "Utilization (%)") and name not in util_rows:
+                    util_rows[name] = values
+
+    if util_header is not None:
+        for i, res in enumerate(util_header):
+            if res not in RESOURCES:
+                continue
+            total = _int(util_rows.get("Total", [None] * len(util_header))[i])
+            available = _int(util_rows.get("Available", [None] * len(util_header))[i])
+            report["resources"][res] = {
+                "total": total,
+                "available": available,
+                "util": round(100.0 * total / available, 2) if total is not None and available else None,
+            }
+
+    tree = report["tree"]
+    if tree is not None:
+        report["top"] = tree["name"]
+        # without a utilization summary, fall back to the (rounded) top module row
+        for res, usage in tree["resources"].items():
+            design = report["resources"].setdefault(res, {"total": None, "available": None, "util": None})
+            if design["total"] is None:
+                design["total"] = usage["total"]
+            if design["util"] is None:
+                design["util"] = usage["util"]
+    return report
+
+##############################
+### csynth.xml (preferred) ###
+##############################
+
+def _xml_loops(parent: ET.Element) -> list:
+    loops = []
+    for el in parent:
+        if el.find("TripCount") is None and el.find("Latency") is None:
+            continue
+        pipe_ii = el.findtext("PipelineII")
+        node = _node("loop", el.tag)
+        node.update({
+            "issue": None,
+            "slack_ns": _float(el.findtext("Slack")),
+            "latency_cycles": _int(el.findtext("Latency")),
+            "latency_ns": _float(el.findtext("AbsoluteTimeLatency")),
+            "iteration_latency": _int(el.findtext("IterationLatency")),
+            "interval": _int(pipe_ii),
+            "trip_count": _int(el.findtext("TripCount")),
+            "pipelined": _int(pipe_ii) is not None,
+            "ii": _int(pipe_ii),
+            "target_ii": None,
+        })
+        node["children"] = _xml_loops(el)
+        loops.append(node)
+    return loops
+
+def _xml_module(path: Path) -> tuple:
+    root = ET.parse(path).getroot()
+    perf = root.find("PerformanceEstimates")
+    area = root.find("AreaEstimates")
+
+    name = root.findtext("UserAssignments/TopModelName") or path.name.removesuffix("_csynth.xml")
+    node = _node("module", name)
+    latency = perf.find("SummaryOfOverallLatency") if perf is not None else None
+    node.update({
+        "issue": None,
+        "slack_ns": None,
+        "latency_cycles": _int(latency.findtext("Worst-caseLatency")) if latency is not None else None,
+        "latency_ns": _float(latency.findtext("Worst-caseRealTimeLatency")) if latency is not None else None,
+        "iteration_latency": None,
+        "interval": _int(latency.findtext("Interval-max")) if latency is not None else None,
+        "trip_count": None,
+        "pipelined": False,
+        "resources": {},
+    })
+
+    resources = {}
+    for res, tag in XML_RESOURCES.items():
+        total = _int(area.findtext(f"Resources/{tag}")) if area is not None else None
+        available = _int(area.findtext(f"AvailableResources/{tag}")) if area is not None else None
+        resources[res] = {
+            "total": total,
+            "available": available,
+            "util": round(100.0 * total / available, 2) if total is not None and available else None,
+        }
+        node["resources"][res] = {"total": total, "util": resources[res]["util"]}
+
+    loop_summary = perf.find("SummaryOfLoopLatency") if perf is not None else None
+    if loop_summary is not None:
+        node["children"].extend(_xml_loops(loop_summary))
+
+    clock = {
+        "target_ns": _float(root.findtext("UserAssignments/TargetClockPeriod")),
+        "estimated_ns": _float(perf.findtext("SummaryOfTimingAnalysis/EstimatedClockPeriod")) if perf is not None else None,
+    }
+    return root, node, resources, clock
+
+def parse_csynth_xml(path: str | Path) -> dict:
+    """
+    Parse csynth.xml; sub-modules listed in its RTLDesignHierarchy are read from
+    their <module>_csynth.xml siblings (if present) and attached under their parent.
+    """
+    path = Path(path)
+    root, tree, resources, clock = _xml_module(path)
+
+    def attach(parent_node: dict, instances: ET.Element | None, seen: set):
+        if instances is None:
+            return
+        for inst in instances.findall("Instance"):
+            module = inst.findtext("ModuleName")
+            if not module or module in seen:
+                continue
+            sub_path = path.with_name(f"{module}_csynth.xml")
+            if not sub_path.exists():
+                continue
+            _, sub_node, _, _ = _xml_module(sub_path)
+            sub_node["name"] = module
+            parent_node["children"].append(sub_node)
+            attach(sub_node, inst.find("InstancesList"), seen | {module})
+
+    top = root.find("RTLDesignHierarchy/TopModule")
+    if top is not None:
+        attach(tree, top.find("InstancesList"), {tree["name"]})
+
+    return {"source": "csynth.xml", "top": tree["name"], "clock": clock, "resources": resources, "tree": tree}
+
+##################
+### public API ###
+##################
+
+def _stamp(path: Path) -> list:
+    st = path.stat()
+    return [path.name, st.st_size, st.st_mtime_ns]
+
+def load_report(report_dir: str | Path, memo: bool = True) -> dict | None:
+    """
+    Parse the synthesis report in report_dir (csynth.xml if present, else csynth.rpt).
+    The parsed result is memoized in report_dir/csynth.qor.json, stamped with the
+    size and mtime of the source report, so repeated analyses do not reparse.
+    """
+    report_dir = Path(report_dir)
+    src = report_dir / "csynth.xml"
+    if not src.exists():
+        src = report_dir / "csynth.rpt"
+        if not src.exists():
+            return None
+
+    memo_path = report_dir / MEMO_NAME
+    stamp = _stamp(src)
+    if memo and memo_path.exists():
+        try:
+            cached = json.loads(memo_path.read_text(encoding="utf-8"))
+            if cached.get("version") == MEMO_VERSION and cached.get("stamp") == stamp:
+                return cached["report"]
+        except (json.JSONDecodeError, KeyError):
+            pass
+
+    try:
+        report = parse_csynth_xml(src) if src.suffix == ".xml" else parse_csynth_rpt(src)
+    except ET.ParseError:
+        # truncated xml from a killed run; fall back to the text report
+        rpt = report_dir / "csynth.rpt"
+        if not rpt.exists():
+            return None
+        src = rpt
+        stamp = _stamp(src)
+        report = parse_csynth_rpt(src)
+
+    if memo:
+        try:
+            memo_path.write_text(json.dumps({"version": MEMO_VERSION, "stamp": stamp, "report": report}), encoding="utf-8")
+        except OSError:
+            pass
+    return report
+
+def iter_nodes(report: dict, kind: str | None = None):
+    """
+    Depth-first walk over the module/loop tree, yielding (path, node) where path is
+    the tuple of names from the top module down to node.
+    """
+    if report is None or report.get("tree") is None:
+        return
+    stack = [((report["tree"]["name"],), report["tree"])]
+    while stack:
+        path, node = stack.pop()
+        if kind is None or node["kind"] == kind:
+            yield path, node
+        for child in reversed(node["children"]):
+            stack.append((path + (child["name"],), child))
+
+def loops(report: dict) -> dict:
+    """
+    Index of every loop by label, e.g. {"L4": node, ...}; loops that appear under
+    several modules keep the first (outermost) occurrence.
+    """
+    index = {}
+    for _, node in iter_nodes(report, kind="loop"):
+        index.setdefault(node["name"], node)
+    return index
+
+def attach_target_ii(report: dict, pipe_results: list) -> dict:
+    """
+    The reports only carry the achieved II; the target II comes from the
+    "[HLS 200-1470] Pipelining result" log messages, which name the loop.
+    """
+    index = loops(report)
+    for message in pipe_results or []:
+        m = PIPE_RESULT_LOOP_RE.search(message)
+        if m is None:
+            continue
+        node = index.get(m.group(4))
+        if node is not None:
+            node["target_ii"] = int(m.group(1))
+            node["ii"] = int(m.group(2))
+            node["pipeline_depth"] = int(m.group(3))
+    return report
+
+def summarize(report: dict | None) -> dict | None:
+    """
+    Flat design-level QoR (latency plus resource totals/utilization), and the
+    achieved vs target II of every loop with a target (see attach_target_ii).
+    """
+    if report is None or report.get("tree") is None:
+        return None
+    qor = {"latency_cycles": report["tree"]["latency_cycles"]}
+    for res in ("bram", "dsp", "ff", "lut"):
+        usage = report["resources"].get(res, {})
+        qor[f"{res}_tot"] = usage.get("total")
+    for res in ("bram", "dsp", "ff", "lut"):
+        usage = report["resources"].get(res, {})
+        qor[f"{res}_util"] = usage.get("util")
+    pipelines = {
+        label: {"target_ii": node["target_ii"], "ii": node["ii"]}
+        for label, node in loops(report).items()
+        if node.get("target_ii") is not None
+    }
+    if pipelines:
+        qor["pipelines"] = pipelines
+    return qor
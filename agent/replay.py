@@ -0,0 +1,224 @@
+"""
+Record/replay of the two external dependencies of a trajectory, the LM and
+vitis_hls, so that Trajectory can run without network access or a tool license.
+
+A Recording directory holds
+
+    lm.jsonl             one line per agent call: {"agent", "key", "outputs", "latency_s"}
+    synth/<sha256>.log.gz  the vitis_hls log of one design, "<offset s>\\t<line>" per line
+    synth/<sha256>.json    {"status", "elapsed_s"} of that run
+    synth/<sha256>/        its csynth.xml / csynth.rpt
+
+where <sha256> is the journal's src_sha256 of the design (the rendered source,
+or base source + "\\n" + directive script in directive_mode "tcl").
+
+Recording: Trajectory(record=Recording(dir)) wraps the agents in
+RecordingAgent and stores every synthesized design. Replay:
+Trajectory(replay=Recording(dir)) answers agent calls with ReplayAgent (falling
+back to SyntheticAgent for calls that were never recorded), and
+fake_vitis_hls.py with FAKE_HLS_REPLAY=<dir> streams the recorded logs at
+FAKE_HLS_SPEED times the recorded pace.
+"""
+import gzip
+import hashlib
+import json
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import dspy
+
+from slot_template import compile_template
+
+# output fields of each agent signature, as stored in lm.jsonl
+AGENT_OUTPUTS = {
+    "LoopAgent": ("reasoning", "loop_dirs_next"),
+    "MemoryAgent": ("reasoning", "mem_dirs_next"),
+}
+REPORT_FILES = ("csynth.xml", "csynth.rpt")
+
+def call_key(agent: str, inputs: dict) -> str:
+    """
+    Content key of one agent call (signature, inputs and per-call LM config).
+    """
+    text = json.dumps({"agent": agent, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Recording:
+    """
+    Recorded LM responses and synthesis runs (see the module docstring); safe to
+    share between trajectories. lm_latency_scale scales the recorded LM latency
+    on replay (0: answer immediately); synthetic_latency_s is the latency of the
+    calls answered by SyntheticAgent.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        lm_latency_scale: float = 0.0,
+        synthetic_latency_s: float = 0.0,
+    ):
+        self.root = Path(root)
+        self.synth_dir = self.root / "synth"
+        self.lm_latency_scale = lm_latency_scale
+        self.synthetic_latency_s = synthetic_latency_s
+        self._lock = threading.Lock()
+        self._responses = None  # key -> [(outputs, latency_s), ...]
+
+    def record_lm(
+        self,
+        agent: str,
+        inputs: dict,
+        outputs: dict,
+        latency_s: float,
+    ):
+        record = {"agent": agent, "key": call_key(agent, inputs), "outputs": outputs, "latency_s": round(latency_s, 3)}
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "lm.jsonl", "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def lm_responses(self, key: str) -> list:
+        with self._lock:
+            if self._responses is None:
+                self._responses = {}
+                path = self.root / "lm.jsonl"
+                if path.exists():
+                    with open(path, encoding="utf-8") as f:
+                        for line in f:
+                            record = json.loads(line)
+                            self._responses.setdefault(record["key"], []).append((record["outputs"], record["latency_s"]))
+            return self._responses.get(key, [])
+
+    def record_synthesis(
+        self,
+        design_sha: str,
+        lines: list,
+        status: dict,
+        elapsed_s: float,
+        report_dir: Path | None = None,
+    ):
+        """
+        Store one vitis_hls run: lines are (offset in seconds, line) pairs.
+        """
+        self.synth_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.synth_dir / f".{design_sha}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+            for t, line in lines:
+                f.write(f"{t:.3f}\t{line}" if line.endswith("\n") else f"{t:.3f}\t{line}\n")
+        tmp.replace(self.synth_dir / f"{design_sha}.log.gz")
+
+        if report_dir is not None:
+            dst = self.synth_dir / design_sha
+            dst.mkdir(exist_ok=True)
+            for name in REPORT_FILES:
+                if (report_dir / name).exists():
+                    shutil.copyfile(report_dir / name, dst / name)
+
+        meta = {"status": status["status"], "reason": status.get("reason", ""), "elapsed_s": round(elapsed_s, 3)}
+        (self.synth_dir / f"{design_sha}.json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+class LogTap:
+    """
+    Collects the (offset, line) pairs of one vitis_hls run for Recording.record_synthesis.
+    """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.lines = []
+
+    def write(self, line: str):
+        self.lines.append((time.monotonic() - self.start, line))
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.start
+
+
+class RecordingAgent:
+    """
+    Wraps a dspy predictor, storing every call's outputs and latency.
+    """
+
+    def __init__(self, predictor, recording: Recording, agent: str):
+        self.predictor = predictor
+        self.recording = recording
+        self.agent = agent
+
+    def __call__(self, **inputs):
+        start = time.perf_counter()
+        pred = self.predictor(**inputs)
+        outputs = {name: getattr(pred, name, None) for name in AGENT_OUTPUTS[self.agent]}
+        self.recording.record_lm(self.agent, inputs, outputs, time.perf_counter() - start)
+        return pred
+
+
+class SyntheticAgent:
+    """
+    Stand-in for an agent call nobody recorded: a LoopAgent answer with a random
+    (but reproducible per inputs and call) pipeline/unroll choice for every slot of
+    src_base, and no memory directives.
+    """
+
+    def __init__(self, agent: str, latency_s: float = 0.0):
+        self.agent = agent
+        self.latency_s = latency_s
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, **inputs):
+        key = call_key(self.agent, inputs)
+        with self._lock:
+            n = self._calls[key] = self._calls.get(key, -1) + 1
+        rng = random.Random(f"{key}:{n}")
+        time.sleep(self.latency_s)
+
+        if self.agent == "MemoryAgent":
+            return dspy.Prediction(reasoning="synthetic", mem_dirs_next=[])
+
+        loop_dirs = []
+        for slot in compile_template(inputs["src_base"]).slots:
+            if slot.startswith("__PIPE__"):
+                ii = rng.choice([None, 1, 2])
+                loop_dirs.append({"slot": slot, "pragma": "pipeline" if ii else None, "params": {"II": ii} if ii else {}})
+            else:
+                factor = rng.choice([None, None, 2, 4])
+                loop_dirs.append({"slot": slot, "pragma": "unroll" if factor else None, "params": {"factor": factor} if factor else {}})
+        return dspy.Prediction(reasoning="synthetic", loop_dirs_next=loop_dirs)
+
+
+class ReplayAgent:
+    """
+    Answers agent calls from a Recording. Identical calls (e.g. the sampled
+    candidates of a turn) get the recorded responses in recording order; calls
+    that were never recorded, or asked more often than recorded, go to fallback.
+    """
+
+    def __init__(
+        self,
+        recording: Recording,
+        agent: str,
+        fallback=None,
+    ):
+        self.recording = recording
+        self.agent = agent
+        self.fallback = fallback or SyntheticAgent(agent, latency_s=recording.synthetic_latency_s)
+        self._served = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, **inputs):
+        key = call_key(self.agent, inputs)
+        responses = self.recording.lm_responses(key)
+        with self._lock:
+            n = self._served[key] = self._served.get(key, -1) + 1
+        if n >= len(responses):
+            return self.fallback(**inputs)
+
+        outputs, latency_s = responses[n]
+        time.sleep(latency_s * self.recording.lm_latency_scale)
+        return dspy.Prediction(**outputs)
@@ -0,0 +1,292 @@
+"""
+SQLite store of every evaluated design, one row per candidate of every turn,
+indexed by kernel, episode, trajectory and directive hash, with the queries used
+to analyze a sweep (best-so-far curves, latency/resource Pareto fronts, summaries
+across kernels).
+
+    python results_db.py results.db --ingest runs/    # load the journals of a sweep
+    python results_db.py results.db --summary [--episode N]
+    python results_db.py results.db --curve KERNEL
+    python results_db.py results.db --pareto KERNEL [--resource lut_tot]
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from pprint import pprint
+
+import numpy as np
+
+from archive import config_hash
+
+RESOURCES = ("bram", "dsp", "ff", "lut")
+QOR_COLUMNS = ("latency_cycles",) + tuple(f"{r}_tot" for r in RESOURCES) + tuple(f"{r}_util" for r in RESOURCES)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS designs (
+    kernel TEXT NOT NULL,
+    episode INTEGER NOT NULL,
+    traj INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    turn_no TEXT NOT NULL,
+    selected INTEGER NOT NULL,
+    config_hash TEXT NOT NULL,
+    src_sha256 TEXT,
+    status TEXT NOT NULL,
+    kill_policy TEXT,
+    kill_code TEXT,
+    reason TEXT,
+    {", ".join(f"{c} REAL" for c in QOR_COLUMNS)},
+    loop_dirs TEXT,
+    mem_dirs TEXT,
+    counts TEXT,
+    recorded_at REAL,
+    PRIMARY KEY (kernel, episode, traj, turn_no)
+);
+CREATE INDEX IF NOT EXISTS designs_turn ON designs (kernel, episode, traj, turn);
+CREATE INDEX IF NOT EXISTS designs_hash ON designs (kernel, config_hash);
+CREATE INDEX IF NOT EXISTS designs_latency ON designs (kernel, latency_cycles);
+"""
+
+
+class ResultsDB:
+    """
+    One connection shared by all trajectories of a run (writes are serialized by
+    a lock, one transaction per turn); WAL mode lets other processes query the
+    database while a sweep is writing to it.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_turn(
+        self,
+        kernel: str,
+        episode_no: int,
+        traj_no: int,
+        record: dict,
+    ):
+        """
+        Store the candidates of one journal record (see journal.Journal); a turn
+        that is recorded again (resumed run, re-ingested journal) replaces its rows.
+        """
+        rows = []
+        now = time.time()
+        for c, cand in enumerate(record["candidates"]):
+            status = cand["status"] or {}
+            kill = status.get("kill") or {}
+            qor = cand.get("qor") or {}
+            rows.append((
+                kernel, episode_no, traj_no, record["turn"], str(cand["turn_no"]),
+                int(c == record["best"]),
+                config_hash(cand["loop_dirs"]), cand.get("src_sha256"),
+                status.get("status", "failed"), kill.get("policy"), kill.get("code"), status.get("reason"),
+                *(qor.get(col) for col in QOR_COLUMNS),
+                json.dumps(cand["loop_dirs"], default=str),
+                json.dumps(cand.get("mem_dirs") or [], default=str),
+                json.dumps(status.get("log_excerpts", {}).get("counts", {})),
+                now,
+            ))
+
+        placeholders = ", ".join("?" * len(rows[0]))
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO designs VALUES ({placeholders})", rows)
+
+    def ingest(self, run_dir: str | Path) -> int:
+        """
+        Load every trajectory journal under a scheduler run directory
+        (EP_<n>/<kernel>_T<t>/EP_<n>/journal.jsonl); returns the number of turns.
+        """
+        turns = 0
+        for path in sorted(Path(run_dir).glob("EP_*/*_T*/EP_*/journal.jsonl")):
+            kernel, _, traj_no = path.parent.parent.name.rpartition("_T")
+            episode_no = int(path.parent.name[len("EP_"):])
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn tail of a running or crashed trajectory
+                    self.record_turn(kernel, episode_no, int(traj_no), record)
+                    turns += 1
+        return turns
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def kernels(self) -> list:
+        return [k for (k,) in self._query("SELECT DISTINCT kernel FROM designs ORDER BY kernel")]
+
+    def best_so_far(
+        self,
+        kernel: str,
+        episode_no: int | None = None,
+    ) -> dict:
+        """
+        {traj: array of the best latency found up to each turn (turn 0, the base
+        design, first)}; nan until the first completed design.
+        """
+        rows = self._query(
+            "SELECT traj, turn, MIN(latency_cycles) FROM designs "
+            "WHERE kernel = ? AND (? IS NULL OR episode = ?) AND status = 'completed' "
+            "GROUP BY traj, turn",
+            (kernel, episode_no, episode_no),
+        )
+        last_turn = self._query(
+            "SELECT traj, MAX(turn) FROM designs WHERE kernel = ? AND (? IS NULL OR episode = ?) GROUP BY traj",
+            (kernel, episode_no, episode_no),
+        )
+        curves = {traj: np.full(n + 1, np.nan) for traj, n in last_turn}
+        for traj, turn, latency in rows:
+            curves[traj][turn] = latency
+        return {traj: np.fmin.accumulate(curve) for traj, curve in sorted(curves.items())}
+
+    def pareto_front(
+        self,
+        kernel: str,
+        resource: str = "lut_tot",
+        episode_no: int | None = None,
+    ) -> list:
+        """
+        Completed designs of kernel not dominated in (latency_cycles, resource),
+        by increasing latency.
+        """
+        if resource not in QOR_COLUMNS:
+            raise ValueError(f"unknown resource {resource!r}, expected one of {QOR_COLUMNS}")
+        rows = self._query(
+            f"SELECT latency_cycles, {resource}, episode, traj, turn_no, config_hash, loop_dirs FROM designs "
+            f"WHERE kernel = ? AND (? IS NULL OR episode = ?) AND status = 'completed' "
+            f"AND latency_cycles IS NOT NULL AND {resource} IS NOT NULL",
+            (kernel, episode_no, episode_no),
+        )
+        if not rows:
+            return []
+
+        points = np.array([(r[0], r[1]) for r in rows], dtype=float)
+        order = np.lexsort((points[:, 1], points[:, 0]))
+        resource_sorted = points[order, 1]
+        # a design is on the front iff it uses strictly less of the resource than
+        # every design of lower (or equal) latency before it
+        prev_min = np.concatenate(([np.inf], np.minimum.accumulate(resource_sorted)[:-1]))
+        front = order[resource_sorted < prev_min]
+
+        # one entry per configuration (the same directives may have been evaluated
+        # by several trajectories)
+        seen = set()
+        result = []
+        for i in front:
+            latency, usage, episode, traj, turn_no, h, loop_dirs = rows[i]
+            if h in seen:
+                continue
+            seen.add(h)
+            result.append({
+                "latency_cycles": latency,
+                resource: usage,
+                "episode": episode,
+                "traj": traj,
+                "turn_no": turn_no,
+                "config_hash": h,
+                "loop_dirs": json.loads(loop_dirs),
+            })
+        return result
+
+    def summary(
+        self,
+        episode_no: int | None = None,
+    ) -> dict:
+        """
+        Per-kernel statistics of a sweep, computed over all rows at once: designs
+        evaluated, status counts, base (turn 0) and best latency, speedup of the
+        best design over the base design, and the median latency of the completed
+        designs.
+        """
+        rows = self._query(
+            "SELECT kernel, turn, status, latency_cycles FROM designs WHERE (? IS NULL OR episode = ?)",
+            (episode_no, episode_no),
+        )
+        if not rows:
+            return {}
+
+        kernel_col, turn_col, status_col, latency_col = zip(*rows)
+        kernels, k = np.unique(np.array(kernel_col), return_inverse=True)
+        turn = np.array(turn_col)
+        status = np.array(status_col)
+        latency = np.array([np.nan if v is None else v for v in latency_col], dtype=float)
+        completed = (status == "completed") & ~np.isnan(latency)
+
+        n = len(kernels)
+        designs = np.bincount(k, minlength=n)
+        counts = {s: np.bincount(k, weights=status == s, minlength=n).astype(int) for s in ("completed", "killed", "failed")}
+
+        best = np.full(n, np.inf)
+        np.minimum.at(best, k[completed], latency[completed])
+        base_mask = completed & (turn == 0)
+        base = np.full(n, np.inf)
+        np.minimum.at(base, k[base_mask], latency[base_mask])
+        best[np.isinf(best)] = np.nan
+        base[np.isinf(base)] = np.nan
+        speedup = base / best
+
+        # median per kernel: sort by (kernel, latency) once and index into the groups
+        order = np.lexsort((latency[completed], k[completed]))
+        sorted_k = k[completed][order]
+        sorted_latency = latency[completed][order]
+        starts = np.searchsorted(sorted_k, np.arange(n), side="left")
+        ends = np.searchsorted(sorted_k, np.arange(n), side="right")
+        median = np.full(n, np.nan)
+        has = ends > starts
+        lo = sorted_latency[(starts[has] + ends[has] - 1) // 2]
+        hi = sorted_latency[(starts[has] + ends[has]) // 2]
+        median[has] = (lo + hi) / 2
+
+        def num(x):
+            return None if np.isnan(x) else float(x)
+
+        return {
+            str(kernel): {
+                "designs": int(designs[i]),
+                **{s: int(counts[s][i]) for s in counts},
+                "base_latency": num(base[i]),
+                "best_latency": num(best[i]),
+                "speedup": num(speedup[i]),
+                "median_latency": num(median[i]),
+            }
+            for i, kernel in enumerate(kernels)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("db", help="SQLite results database")
+    parser.add_argument("--ingest", default=None, help="run directory whose trajectory journals are loaded first")
+    parser.add_argument("--episode", type=int, default=None)
+    parser.add_argument("--summary", action="store_true")
+    parser.add_argument("--curve", default=None, metavar="KERNEL", help="best-so-far latency per turn and trajectory")
+    parser.add_argument("--pareto", default=None, metavar="KERNEL", help="latency/resource Pareto front")
+    parser.add_argument("--resource", default="lut_tot", choices=QOR_COLUMNS[1:])
+    args = parser.parse_args()
+
+    db = ResultsDB(args.db)
+    if args.ingest is not None:
+        print(f"ingested {db.ingest(args.ingest)} turns")
+    if args.summary:
+        pprint(db.summary(args.episode), sort_dicts=False)
+    if args.curve is not None:
+        pprint({traj: curve.tolist() for traj, curve in db.best_so_far(args.curve, args.episode).items()})
+    if args.pareto is not None:
+        pprint(db.pareto_front(args.pareto, args.resource, args.episode), sort_dicts=False)
+    db.close()
+
+if __name__ == "__main__":
+    main()
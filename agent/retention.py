@@ -0,0 +1,234 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from qor_report import load_report, summarize
+from synth_cache import REPORT_SUBDIR
+
+KEEP_MODES = ("all", "best", "reports")
+
+def tree_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class RetentionPolicy:
+    """
+    Decides what of a finished vitis_hls project survives in EP_*/results, shared
+    by all trajectories of a run.
+
+    keep="all" moves whole projects (.autopilot databases, generated HDL, ...);
+    keep="reports" keeps only the report directory; keep="best" (the default of
+    run.py) keeps the reports of every design and the full tree of the
+    best-so-far (lowest latency) design per kernel, pruning the previous best
+    back to its reports. Everything retained (projects, reports, and the logs and
+    cache restores registered with track()) is accounted against quota_bytes: a
+    full tree that does not fit is pruned to its reports instead, and once the
+    retained data exceeds the quota the oldest artifacts are deleted, the trees of
+    the current best designs last (pruned to their reports).
+
+    With scratch_dir (e.g. on tmpfs), projects are built under
+    scratch_dir/<trajectory> instead of the trajectory's working directory; an
+    EP_<n> symlink back to the working directory keeps the relative source paths
+    of syn.tcl valid, and only what is retained is ever written to the results.
+    """
+
+    def __init__(
+        self,
+        keep: str = "best",
+        scratch_dir: str | Path | None = None,
+        quota_bytes: int | None = None,
+    ):
+        if keep not in KEEP_MODES:
+            raise ValueError(f"unknown retention mode {keep!r}, expected one of {list(KEEP_MODES)}")
+        self.keep = keep
+        self.scratch_dir = Path(scratch_dir) if scratch_dir is not None else None
+        self.quota_bytes = quota_bytes
+        self.used = {}  # retained dir or file -> bytes, oldest first
+        self.best = {}  # kernel -> (latency, retained dir, report subdir)
+        self._lock = threading.Lock()
+        self._warned = False
+        self._pruned = set()  # best designs pruned to their reports by the quota
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(self.used.values())
+
+    def build_dir(
+        self,
+        work_dir: Path,
+        episode_no: int,
+    ) -> Path:
+        """
+        Directory vitis_hls runs in for work_dir.
+        """
+        if self.scratch_dir is None:
+            return work_dir
+
+        build_dir = self._scratch(work_dir)
+        build_dir.mkdir(parents=True, exist_ok=True)
+
+        ep_dir = work_dir.resolve() / f"EP_{episode_no}"
+        ep_dir.mkdir(parents=True, exist_ok=True)
+        link = build_dir / f"EP_{episode_no}"
+        if not link.is_symlink():
+            link.symlink_to(ep_dir, target_is_directory=True)
+        return build_dir
+
+    def _scratch(self, work_dir: Path) -> Path:
+        work_dir = work_dir.resolve()
+        return self.scratch_dir / f"{os.getpid()}_{work_dir.parent.name}_{work_dir.name}"
+
+    def release(self, work_dir: Path):
+        """
+        Drop the scratch build directory of work_dir once its trajectory is done.
+        """
+        if self.scratch_dir is not None:
+            shutil.rmtree(self._scratch(work_dir), ignore_errors=True)
+
+    def _prune(self, tree: Path, report_subdir: Path):
+        """
+        Delete everything in tree except report_subdir.
+        """
+        node = tree
+        for part in report_subdir.parts:
+            if not node.is_dir():
+                return
+            for child in node.iterdir():
+                if child.name == part:
+                    continue
+                if child.is_dir() and not child.is_symlink():
+                    shutil.rmtree(child, ignore_errors=True)
+                else:
+                    child.unlink(missing_ok=True)
+            node = node / part
+
+    def _over_quota(self, extra: int) -> bool:
+        return self.quota_bytes is not None and self.used_bytes + extra > self.quota_bytes
+
+    def track(self, *paths: Path | None):
+        """
+        Account artifacts written to the results outside of store() (logs and their
+        event sidecars, reports restored from the synthesis cache), then enforce
+        the quota.
+        """
+        with self._lock:
+            for path in paths:
+                if path is None or not path.exists():
+                    continue
+                self.used.pop(path, None)
+                self.used[path] = tree_size(path) if path.is_dir() else path.stat().st_size
+        self._enforce(keep=paths)
+
+    def _enforce(self, keep: tuple = ()):
+        """
+        Delete the oldest retained artifacts (never those in keep) until the
+        retained data fits in the quota; the trees of the best designs are only
+        pruned to their reports, and only once nothing else is left.
+        """
+        prune = []
+        delete = []
+        with self._lock:
+            if not self._over_quota(0):
+                return
+            best = {b[1]: b for b in self.best.values()}
+            excess = self.used_bytes - self.quota_bytes
+            for path, size in list(self.used.items()):
+                if excess <= 0:
+                    break
+                if path in keep or path in best:
+                    continue
+                delete.append(path)
+                del self.used[path]
+                excess -= size
+            for _, path, report_subdir in list(self.best.values()):
+                if excess <= 0:
+                    break
+                if path in keep or path in self._pruned:
+                    continue
+                prune.append((path, report_subdir))
+                self._pruned.add(path)
+                excess -= self.used.get(path, 0)
+            if excess > 0 and not self._warned:
+                print(f"retention: retained results exceed the quota ({self.used_bytes} > {self.quota_bytes} bytes)")
+                self._warned = True
+
+        for path in delete:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+        for path, report_subdir in prune:
+            self._prune(path, report_subdir)
+        with self._lock:
+            for path, _ in prune:
+                self.used[path] = tree_size(path)
+
+    def store(
+        self,
+        kernel: str,
+        proj_src: Path,
+        proj_dst: Path,
+        report_subdir: Path = REPORT_SUBDIR,
+    ) -> bool:
+        """
+        Retain the finished project proj_src as proj_dst according to the policy.
+        Returns True if the full tree was kept.
+        """
+        proj_dst.parent.mkdir(parents=True, exist_ok=True)
+
+        latency = None
+        if self.keep == "best":
+            qor = summarize(load_report(proj_src / report_subdir))
+            latency = qor.get("latency_cycles") if qor else None
+        size = tree_size(proj_src) if self.keep != "reports" else 0
+
+        # decide (and reserve quota) under the lock, move the data outside of it
+        with self._lock:
+            full = self.keep == "all"
+            prev = None
+            if self.keep == "best" and latency is not None:
+                best = self.best.get(kernel)
+                full = best is None or latency < best[0]
+                prev = best if full else None
+
+            # a new best frees (most of) the tree of the previous one
+            freed = self.used.get(prev[1], 0) if prev is not None else 0
+            if full and self._over_quota(size - freed):
+                print(f"retention: quota reached, keeping only the reports of {proj_dst.name}")
+                full = False
+                prev = None
+
+            if full:
+                self.used[proj_dst] = size
+                if self.keep == "best":
+                    self.best[kernel] = (latency, proj_dst, report_subdir)
+
+        if not full:
+            self._prune(proj_src, report_subdir)
+        shutil.move(proj_src, proj_dst)
+
+        # the previous best is now an ordinary design, and so is this one if a better
+        # design of the kernel arrived while it was being moved
+        if prev is not None and prev[1].exists():
+            self._prune(prev[1], prev[2])
+        with self._lock:
+            superseded = self.keep == "best" and full and self.best[kernel][1] != proj_dst
+        if superseded:
+            self._prune(proj_dst, report_subdir)
+            full = False
+
+        with self._lock:
+            if not full:
+                self.used[proj_dst] = tree_size(proj_dst)
+            if prev is not None:
+                self.used[prev[1]] = tree_size(prev[1])
+        self._enforce(keep=(proj_dst,))
+        return full
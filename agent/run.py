@@ -1,8 +1,27 @@
+import argparse
+import json
+import os
+import shlex
+from pathlib import Path
 from pprint import pprint
+
 import dspy
-from pathlib import Path
 
-from episode import Trajectory
+from scheduler import run_episode
+from synth_cache import SynthCache
+from surrogate import Surrogate
+from hls_worker import HLSWorkerPool
+from mem_guard import MemoryGuard
+from synth_queue import SynthQueue
+from retention import KEEP_MODES, RetentionPolicy
+from telemetry import Telemetry
+from replay import Recording
+from lm_cache import LMCache
+from lm_client import LMClient
+from archive import EliteArchive
+from results_db import ResultsDB
+from turn_budget import TurnBudget
+from kill_policy import PHASE_ORDER
 
 # mapping of kernel names to their top-level function names
 kernel_top_map = {
@@ -50,11 +69,191 @@ kernel_top_map = {
     "gesummv": "kernel_gesummv",
 }
 
-episode_no = 0 # single episode for now
-kernel = "2mm" # single kernel for now
-top_fxn = kernel_top_map[kernel]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run K kernels x T trajectories over a bounded pool of vitis_hls jobs.")
+    parser.add_argument("--episode", type=int, default=0)
+    parser.add_argument("--kernels", nargs="+", default=list(kernel_top_map), help="kernels to run (default: all)")
+    parser.add_argument("--trajectories", type=int, default=1, help="trajectories per kernel")
+    parser.add_argument("--jobs", type=int, default=None, help="max concurrent vitis_hls processes (default: cpu count)")
+    parser.add_argument("--run-dir", default="./runs", help="root of the per-trajectory working directories")
+    parser.add_argument("--cache-dir", default="./synth_cache", help="persistent synthesis result cache")
+    parser.add_argument("--cache-size-gb", type=float, default=20.0)
+    parser.add_argument("--no-cache", action="store_true", help="always run vitis_hls (implied by --replay and a non-default --hls-command)")
+    parser.add_argument("--kill-config", default=None, help="JSON file with early-kill thresholds and time budgets")
+    parser.add_argument("--log-compression", choices=["none", "gzip", "zstd"], default=None, help="compress vitis_hls logs on the fly (default: gzip unless --retain all)")
+    parser.add_argument("--candidates", type=int, default=1, help="directive sets proposed and synthesized per turn")
+    parser.add_argument("--candidate-temperature", type=float, default=1.0, help="LM temperature of the extra candidates")
+    parser.add_argument("--share-candidates", action="store_true", help="feed the non-selected candidates back to the agent")
+    parser.add_argument("--surrogate", default=None, help="JSONL file of evaluated designs; enables surrogate ranking of candidates")
+    parser.add_argument("--surrogate-keep", type=int, default=None, help="max candidates synthesized per turn after surrogate ranking")
+    parser.add_argument("--mem-partition", choices=["rules", "llm"], default="rules", help="how array_partition directives are derived")
+    parser.add_argument("--hls-command", default="vitis_hls", help="vitis_hls executable or a stand-in such as fake_vitis_hls.py")
+    parser.add_argument("--mem-budget-gb", type=float, default=None, help="total RSS the vitis_hls runs of this host may use; launches wait and the largest run is killed beyond it")
+    parser.add_argument("--mem-min-available-gb", type=float, default=None, help="host MemAvailable to keep free; launches wait and the largest run is killed below it")
+    parser.add_argument("--job-mem-limit-gb", type=float, default=None, help="RSS above which a single vitis_hls run is killed")
+    parser.add_argument("--hls-workers", action="store_true", help="run jobs on resident vitis_hls workers")
+    parser.add_argument("--worker-max-jobs", type=int, default=50, help="jobs after which a worker is recycled")
+    parser.add_argument("--synth-queue", default=None, help="SQLite job queue served by synth_queue.py workers instead of local vitis_hls runs (--jobs: jobs in flight)")
+    parser.add_argument("--queue-lease-s", type=float, default=60.0, help="lease after which the job of a silent worker is requeued")
+    parser.add_argument("--queue-attempts", type=int, default=3, help="attempts of a job whose workers keep dying")
+    parser.add_argument("--directives", choices=["source", "tcl"], default="source", help="render candidates into the C source, or as set_directive_* solutions of one project per turn")
+    parser.add_argument("--retain", choices=KEEP_MODES, default="best", help="what of each vitis project is kept: everything, reports plus the best design's tree per kernel, or reports only")
+    parser.add_argument("--scratch-dir", default=None, help="build vitis projects here (e.g. on tmpfs) instead of in the run directory")
+    parser.add_argument("--quota-gb", type=float, default=None, help="disk quota of the retained projects, reports and logs; the oldest are deleted beyond it")
+    parser.add_argument("--resume", action="store_true", help="continue every trajectory after the last turn in its journal")
+    parser.add_argument("--telemetry", default=None, help="JSONL file of timing and resource spans")
+    parser.add_argument("--prom-textfile", default=None, help="Prometheus textfile with the span totals")
+    parser.add_argument("--record", default=None, help="record LM responses and vitis_hls runs to this directory")
+    parser.add_argument("--replay", default=None, help="replay a --record directory with the fake LM and fake_vitis_hls.py")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="pace of the replayed logs relative to the recording (0: as fast as possible)")
+    parser.add_argument("--lm-latency-scale", type=float, default=0.0, help="replayed LM latency relative to the recording")
+    parser.add_argument("--lm-cache", default=None, help="persistent LM response cache directory (default: off)")
+    parser.add_argument("--lm-cache-size-mb", type=float, default=512.0)
+    parser.add_argument("--lm-concurrency", type=int, default=None, help="max agent calls in flight across all trajectories (default: unlimited)")
+    parser.add_argument("--lm-retries", type=int, default=6, help="retries of a rate-limited agent call")
+    parser.add_argument("--archive", default=None, help="JSONL file of the elite and known-bad configurations per kernel, shared by all trajectories (and runs)")
+    parser.add_argument("--archive-size", type=int, default=8, help="elite configurations kept per kernel")
+    parser.add_argument("--archive-prompt", type=int, default=3, help="elite configurations shown to the agent")
+    parser.add_argument("--no-archive-seed", action="store_true", help="start every trajectory from the base design instead of the best elite")
+    parser.add_argument("--results-db", default=None, help="SQLite database recording every evaluated design (see results_db.py)")
+    parser.add_argument("--adaptive-turns", action="store_true", help="stop converged trajectories early and give their turns to the ones still improving")
+    parser.add_argument("--base-turns", type=int, default=4, help="average turns per trajectory after the base design with --adaptive-turns")
+    parser.add_argument("--max-turns", type=int, default=8, help="turns a still-improving trajectory may reach with --adaptive-turns")
+    parser.add_argument("--patience", type=int, default=2, help="turns without improvement after which a trajectory has converged")
+    parser.add_argument("--min-improvement", type=float, default=0.01, help="relative latency reduction that counts as an improvement")
+    parser.add_argument("--low-fidelity", action="store_true", help="run every candidate through the front end first and fully synthesize only those that pass")
+    parser.add_argument("--lofi-until", default=PHASE_ORDER[-1], choices=PHASE_ORDER, help="last front-end phase of the low-fidelity run")
+    parser.add_argument("--lofi-max-instructions", type=int, default=None, help="instruction count beyond which the low-fidelity run rejects a design")
+    parser.add_argument("--feedback-budget", type=int, default=1000, help="approximate token budget of the synthesis messages in the agent feedback (0: raw excerpts)")
+    args = parser.parse_args()
+    if args.record is not None and args.replay is not None:
+        parser.error("--record and --replay are mutually exclusive")
+    if args.synth_queue is not None and (args.hls_workers or args.directives == "tcl"):
+        parser.error("--synth-queue runs one-shot source-mode jobs, it excludes --hls-workers and --directives tcl")
+    if args.low_fidelity and args.directives == "tcl":
+        parser.error("--low-fidelity screens source-mode candidates, it excludes --directives tcl")
+
+    kill_config = None
+    if args.kill_config is not None:
+        with open(args.kill_config, encoding="utf-8") as f:
+            kill_config = json.load(f)
+
+    synth_cache = None
+    # never mix the QoR of a stand-in (or of replayed and synthetic reports) into
+    # the cache real vitis_hls runs are served from
+    if not args.no_cache and args.replay is None and args.hls_command == parser.get_default("hls_command"):
+        synth_cache = SynthCache(args.cache_dir, max_bytes=int(args.cache_size_gb * 2**30))
+
+    surrogate = None
+    if args.surrogate is not None:
+        surrogate = Surrogate(args.surrogate)
+
+    log_compression = args.log_compression
+    if log_compression is None:
+        log_compression = None if args.retain == "all" else "gzip"
+    elif log_compression == "none":
+        log_compression = None
+
+    retention = RetentionPolicy(
+        keep=args.retain,
+        scratch_dir=args.scratch_dir,
+        quota_bytes=int(args.quota_gb * 2**30) if args.quota_gb is not None else None,
+    )
+
+    telemetry = Telemetry(args.telemetry, args.prom_textfile)
+    if telemetry.enabled:
+        # token counts of every prediction, see telemetry.lm_usage
+        dspy.settings.configure(track_usage=True)
+
+    lm_cache = None
+    if args.lm_cache is not None:
+        lm_cache = LMCache(args.lm_cache, max_bytes=int(args.lm_cache_size_mb * 2**20))
+    lm_client = LMClient(max_concurrency=args.lm_concurrency, cache=lm_cache, max_retries=args.lm_retries)
+
+    archive = None
+    if args.archive is not None:
+        archive = EliteArchive(args.archive, size=args.archive_size, prompt_top=args.archive_prompt, seed=not args.no_archive_seed)
+
+    turn_budget = None
+    if args.adaptive_turns:
+        turn_budget = TurnBudget(args.base_turns, max_turns=args.max_turns, patience=args.patience, min_improvement=args.min_improvement)
+
+    results_db = ResultsDB(args.results_db) if args.results_db is not None else None
+
+    record = Recording(args.record) if args.record is not None else None
+    replay = None
+    if args.replay is not None:
+        replay = Recording(args.replay, lm_latency_scale=args.lm_latency_scale)
+        os.environ["FAKE_HLS_REPLAY"] = str(Path(args.replay).resolve())
+        os.environ["FAKE_HLS_SPEED"] = str(args.replay_speed)
+        if args.hls_command == "vitis_hls":
+            args.hls_command = str(Path(__file__).resolve().parent / "fake_vitis_hls.py")
+
+    hls_command = shlex.split(args.hls_command)
+    hls_workers = None
+    if args.hls_workers:
+        hls_workers = HLSWorkerPool(
+            size=args.jobs or os.cpu_count() or 1,
+            max_jobs=args.worker_max_jobs,
+            command=hls_command,
+            root=Path(args.run_dir) / "hls_workers",
+        )
+
+    mem_guard = None
+    if args.mem_budget_gb is not None or args.mem_min_available_gb is not None or args.job_mem_limit_gb is not None:
+        mem_guard = MemoryGuard(
+            budget_bytes=int(args.mem_budget_gb * 2**30) if args.mem_budget_gb is not None else None,
+            min_available_bytes=int(args.mem_min_available_gb * 2**30) if args.mem_min_available_gb is not None else None,
+            job_limit_bytes=int(args.job_mem_limit_gb * 2**30) if args.job_mem_limit_gb is not None else None,
+        )
 
-src = Path(f"../sources_BASE/{kernel}_kernel.c").read_text(encoding="utf-8")
+    synth_queue = None
+    if args.synth_queue is not None:
+        synth_queue = SynthQueue(args.synth_queue, lease_s=args.queue_lease_s, max_attempts=args.queue_attempts)
 
-traj = Trajectory()
-traj(episode_no, kernel, top_fxn, src)
+    try:
+        results = run_episode(
+            episode_no=args.episode,
+            kernel_top_map={k: kernel_top_map[k] for k in args.kernels},
+            n_traj=args.trajectories,
+            max_jobs=args.jobs,
+            run_dir=args.run_dir,
+            synth_cache=synth_cache,
+            telemetry=telemetry,
+            mem_guard=mem_guard,
+            kill_config=kill_config,
+            log_compression=log_compression,
+            n_candidates=args.candidates,
+            candidate_temperature=args.candidate_temperature,
+            share_candidates=args.share_candidates,
+            surrogate=surrogate,
+            surrogate_keep=args.surrogate_keep,
+            mem_partition=args.mem_partition,
+            hls_command=hls_command,
+            hls_workers=hls_workers,
+            synth_queue=synth_queue,
+            directive_mode=args.directives,
+            retention=retention,
+            resume=args.resume,
+            record=record,
+            replay=replay,
+            lm_client=lm_client,
+            feedback_budget=args.feedback_budget or None,
+            archive=archive,
+            results_db=results_db,
+            turn_budget=turn_budget,
+            low_fidelity=args.low_fidelity,
+            lofi_until=args.lofi_until,
+            lofi_max_instructions=args.lofi_max_instructions,
+        )
+    finally:
+        if hls_workers is not None:
+            hls_workers.close()
+        telemetry.close()
+        if results_db is not None:
+            results_db.close()
+    pprint({f"{k} T{t}": ("ok" if err is None else "failed") for (k, t), err in sorted(results.items())})
+    if telemetry.enabled:
+        pprint(telemetry.summary())
+    if turn_budget is not None:
+        pprint(turn_budget.stats())
@@ -0,0 +1,94 @@
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+
+from episode import Trajectory
+from synth_cache import SynthCache
+from mem_guard import MemoryGuard
+from telemetry import Telemetry
+
+SOURCES_DIR = Path(__file__).resolve().parent.parent / "sources_BASE"
+RUNS_DIR = Path("./runs")
+
+def trajectory_dir(
+    run_dir: Path,
+    episode_no: int,
+    kernel: str,
+    traj_no: int,
+) -> Path:
+    """
+    Isolated working directory for one trajectory; vitis_hls is launched from here
+    so the {kernel}_{episode}_{turn} project names in syn.tcl cannot collide
+    """
+    return Path(run_dir) / f"EP_{episode_no}" / f"{kernel}_T{traj_no}"
+
+def run_episode(
+    episode_no: int,
+    kernel_top_map: dict,
+    n_traj: int = 1,
+    max_jobs: int | None = None,
+    max_trajs: int | None = None,
+    run_dir: str | Path = RUNS_DIR,
+    sources_dir: str | Path = SOURCES_DIR,
+    synth_cache: SynthCache | None = None,
+    telemetry: Telemetry | None = None,
+    mem_guard: MemoryGuard | None = None,
+    **traj_kwargs,
+) -> dict:
+    """
+    Run n_traj trajectories for every kernel in kernel_top_map concurrently.
+
+    max_jobs bounds the number of vitis_hls processes alive at any time (defaults to
+    the core count); max_trajs bounds the number of trajectories in flight, which must
+    exceed max_jobs so that synthesis slots stay busy while other trajectories wait
+    on the LLM. mem_guard, if given, additionally holds back launches while the
+    host is short of memory and kills the largest run under pressure; it runs for
+    the duration of the episode. synth_cache, if given, is shared by all
+    trajectories; telemetry too, with every span tagged with its kernel and
+    trajectory. Any other keyword (kill_config, log_compression, n_candidates,
+    ...) is passed on to every Trajectory. Returns {(kernel, traj_no): None |
+    traceback string}.
+    """
+    max_jobs = max_jobs or os.cpu_count() or 1
+    max_trajs = max_trajs or 2 * max_jobs
+    synth_slots = threading.BoundedSemaphore(max_jobs)
+
+    def run_one(kernel: str, top_fxn: str, traj_no: int):
+        src_base = (Path(sources_dir) / f"{kernel}_kernel.c").read_text(encoding="utf-8")
+        work_dir = trajectory_dir(run_dir, episode_no, kernel, traj_no)
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        traj_telemetry = (telemetry or Telemetry()).bind(kernel=kernel, traj_no=traj_no)
+        traj = Trajectory(
+            work_dir=work_dir,
+            synth_slots=synth_slots,
+            mem_guard=mem_guard,
+            synth_cache=synth_cache,
+            telemetry=traj_telemetry,
+            rollout_id=traj_no,
+            **traj_kwargs,
+        )
+        with traj_telemetry.span("trajectory"):
+            traj(episode_no, kernel, top_fxn, src_base)
+
+    results = {}
+    with mem_guard or nullcontext(), ThreadPoolExecutor(max_workers=max_trajs) as pool:
+        futures = {
+            pool.submit(run_one, kernel, top_fxn, traj_no): (kernel, traj_no)
+            for traj_no in range(n_traj)
+            for kernel, top_fxn in kernel_top_map.items()
+        }
+        for fut in as_completed(futures):
+            key = futures[fut]
+            try:
+                fut.result()
+                results[key] = None
+            except Exception:
+                # one broken trajectory must not take down the rest of the sweep
+                results[key] = traceback.format_exc()
+                print(f"[{key[0]} T{key[1]}] trajectory failed:\n{results[key]}")
+
+    return results
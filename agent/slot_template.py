@@ -0,0 +1,115 @@
+import functools
+
+def unroll_factor(directive: dict):
+    """
+    Factor an unroll directive is rendered with: an unroll without one is
+    rendered as factor=1, not as a complete unroll.
+    """
+    return (directive.get("params") or {}).get("factor", 1)
+
+def loop_pragma(directive: dict) -> str:
+    pragma = directive.get("pragma")
+    params = directive.get("params") or {}
+    if pragma == "pipeline":
+        return f"#pragma HLS pipeline II={params.get('II', 1)}"
+    if pragma == "unroll":
+        return f"#pragma HLS unroll factor={unroll_factor(directive)}"
+    return ""  # no pragma
+
+def mem_pragma(directive: dict) -> str:
+    assert directive["pragma"] == "array_partition"
+    return (
+        f"#pragma HLS array_partition "
+        f"variable={directive.get('variable')} "
+        f"type={directive.get('type')} "
+        f"factor={directive.get('factor')} "
+        f"dim={directive.get('dim')}"
+    )
+
+
+class SlotTemplate:
+    """
+    A slot-annotated kernel source compiled once: the literal text between @slot
+    lines is pre-joined, so rendering a directive set is a single join over a
+    short list instead of a rescan of the source. Slot lines are replaced by the
+    directive's pragma (or dropped), memory directives go right after the line
+    opening top_fxn, exactly as Trajectory.refactor_loops/refactor_mem did.
+    """
+
+    def __init__(self, src: str, top_fxn: str | None = None):
+        self.top_fxn = top_fxn
+        self.parts = []  # literal text (str) or ("slot", name) / ("mem",) markers
+        self.slots = []
+
+        literal = []
+        def close():
+            if literal:
+                self.parts.append("\n".join(literal))
+                literal.clear()
+
+        top_prefix = f"void {top_fxn}(" if top_fxn is not None else None
+        for line in src.splitlines():
+            if "// @slot" in line:
+                close()
+                slot = line.split("// @slot")[1].strip()
+                self.slots.append(slot)
+                self.parts.append(("slot", slot))
+                continue
+            literal.append(line)
+            if top_prefix is not None and line.strip().startswith(top_prefix):
+                close()
+                self.parts.append(("mem",))
+        close()
+
+        self.slot_set = frozenset(self.slots)
+        self.has_top = any(part == ("mem",) for part in self.parts)
+
+    def check(self, loop_dirs: list) -> dict:
+        """
+        {"unknown": directive slots not in the source, "missing": source slots
+        without a directive}
+        """
+        given = [d.get("slot") for d in loop_dirs or []]
+        return {
+            "unknown": [slot for slot in given if slot not in self.slot_set],
+            "missing": [slot for slot in self.slots if slot not in given],
+        }
+
+    def render(
+        self,
+        loop_dirs: list,
+        mem_dirs: list | None = None,
+    ) -> str:
+        directives = {d["slot"]: d for d in loop_dirs or []}
+        mem_lines = "\n".join(mem_pragma(d) for d in mem_dirs or [])
+
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif part[0] == "slot":
+                pragma_line = loop_pragma(directives.get(part[1], {}))
+                if pragma_line:
+                    out.append(pragma_line)
+            elif mem_lines:
+                out.append(mem_lines)
+        return "\n".join(out)
+
+    def render_batch(
+        self,
+        loop_dirs_batch: list,
+        mem_dirs_batch: list | None = None,
+    ) -> list:
+        """
+        Render a batch of directive sets: [(source, check(loop_dirs))] in order.
+        """
+        mem_dirs_batch = mem_dirs_batch or [None] * len(loop_dirs_batch)
+        return [
+            (self.render(loop_dirs, mem_dirs), self.check(loop_dirs))
+            for loop_dirs, mem_dirs in zip(loop_dirs_batch, mem_dirs_batch)
+        ]
+
+
+@functools.lru_cache(maxsize=128)
+def compile_template(src: str, top_fxn: str | None = None) -> SlotTemplate:
+    return SlotTemplate(src, top_fxn)
@@ -0,0 +1,251 @@
+import json
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from loop_analysis import LoopNest, analyze
+from slot_template import unroll_factor
+
+# records of another version are ignored (2: an unroll without a factor is factor=1)
+FEATURE_VERSION = 2
+
+TARGETS = ("latency_cycles", "bram_tot", "dsp_tot", "ff_tot", "lut_tot")
+
+# trip count assumed for loops whose bound is not a constant
+UNKNOWN_TRIPS = 16
+
+def _directive_maps(nest: LoopNest, loop_dirs: list) -> tuple:
+    pipelined = {}
+    unroll = {}
+    for d in loop_dirs or []:
+        label = d.get("slot", "").split("__")[-1]
+        params = d.get("params") or {}
+        if d.get("pragma") == "pipeline":
+            pipelined[label] = max(int(params.get("II", 1) or 1), 1)
+        elif d.get("pragma") == "unroll":
+            trips = nest.loops[label]["trip_count"] if label in nest.loops else None
+            factor = int(unroll_factor(d))
+            unroll[label] = max(min(factor, trips or factor), 1)
+    return pipelined, unroll
+
+def analytic_latency(nest: LoopNest, loop_dirs: list) -> float:
+    """
+    Back-of-the-envelope cycle count: a pipelined loop costs trips x II plus its
+    (fully unrolled) body depth, any other loop costs ceil(trips / unroll) times
+    its body. Crude, but monotone in the right directions, which makes it the
+    strongest single feature while little data is available.
+    """
+    pipelined, unroll = _directive_maps(nest, loop_dirs)
+
+    def cycles(loop: dict) -> float:
+        trips = loop["trip_count"] or UNKNOWN_TRIPS
+        if loop["label"] in pipelined:
+            depth = 2 + len(loop["children"]) + math.log2(1 + (nest.max_inner_product(loop) or UNKNOWN_TRIPS))
+            return trips * pipelined[loop["label"]] + depth
+        body = 1 + sum(cycles(child) for child in loop["children"])
+        return math.ceil(trips / unroll.get(loop["label"], 1)) * body
+
+    return float(sum(cycles(root) for root in nest.roots))
+
+def generic_features(nest: LoopNest, loop_dirs: list) -> list:
+    """
+    Kernel-independent features, usable by a model shared across kernels.
+    """
+    pipelined, unroll = _directive_maps(nest, loop_dirs)
+    est = nest.estimate(loop_dirs)
+    implied = [v for v in est["pipelined"].values() if v is not None]
+    return [
+        1.0,
+        math.log(1 + analytic_latency(nest, loop_dirs)),
+        math.log(est["replication"]),
+        math.log(1 + max(implied, default=0)),
+        float(len(pipelined)),
+        float(sum(math.log2(u) for u in unroll.values())),
+        float(sum(1.0 / ii for ii in pipelined.values())),
+    ]
+
+def kernel_features(nest: LoopNest, loop_dirs: list) -> list:
+    """
+    Generic features plus one column per @slot of the kernel (pipeline: 1/II,
+    unroll: log2 factor); only comparable between configurations of one kernel.
+    """
+    by_slot = {d.get("slot"): d for d in loop_dirs or []}
+    cols = []
+    for slot in nest.slots:
+        d = by_slot.get(slot, {})
+        params = d.get("params") or {}
+        if slot.startswith("__PIPE__"):
+            cols.append(1.0 / max(int(params.get("II", 1) or 1), 1) if d.get("pragma") == "pipeline" else 0.0)
+        else:
+            cols.append(math.log2(max(int(unroll_factor(d) or 1), 1)) if d.get("pragma") == "unroll" else 0.0)
+    return generic_features(nest, loop_dirs) + cols
+
+
+class RidgeModel:
+    """
+    Multi-output ridge regression on log targets, solved in closed form.
+    """
+
+    def __init__(self, ridge: float = 1e-2):
+        self.ridge = ridge
+        self.mean = None
+        self.scale = None
+        self.coef = None
+
+    def fit(self, X: np.ndarray, Y: np.ndarray) -> "RidgeModel":
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        self.mean[0], self.scale[0] = 0.0, 1.0  # keep the bias column
+        Z = (X - self.mean) / self.scale
+        A = Z.T @ Z + self.ridge * np.eye(Z.shape[1])
+        self.coef = np.linalg.solve(A, Z.T @ Y)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return ((X - self.mean) / self.scale) @ self.coef
+
+
+class Surrogate:
+    """
+    Learned ranking of loop directive sets. Every evaluated candidate is recorded
+    (features, QoR, whether synthesis failed or was killed), optionally appended to
+    a JSONL file so the data survives across runs. Per kernel, a ridge model over
+    kernel_features() predicts log latency/resources and the failure rate; kernels
+    with fewer than min_samples results use a model over generic_features() shared
+    by all kernels, and without any data the analytic latency estimate alone.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ridge: float = 1e-2,
+        min_samples: int = 8,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.ridge = ridge
+        self.min_samples = min_samples
+        self.records = []
+        self._models = {}  # kernel (or None for the shared model) -> (n records, models)
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record.get("version") == FEATURE_VERSION:
+                        self.records.append(record)
+
+    def record(
+        self,
+        kernel: str,
+        src_base: str,
+        loop_dirs: list,
+        status: dict,
+        qor: dict | None,
+    ):
+        # screened candidates were never synthesized, nothing to learn
+        if status.get("kill", {}).get("policy") in ("static_screen", "archive"):
+            return
+        nest = analyze(src_base)
+        record = {
+            "version": FEATURE_VERSION,
+            "kernel": kernel,
+            "loop_dirs": loop_dirs,
+            "x_kernel": kernel_features(nest, loop_dirs),
+            "x_generic": generic_features(nest, loop_dirs),
+            "failed": status["status"] != "completed" or not qor or qor.get("latency_cycles") is None,
+            "y": {t: (qor or {}).get(t) for t in TARGETS},
+        }
+        with self._lock:
+            self.records.append(record)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def _fit(self, kernel: str | None):
+        records = [r for r in self.records if kernel is None or r["kernel"] == kernel]
+        cached = self._models.get(kernel)
+        if cached is not None and cached[0] == len(records):
+            return cached[1]
+
+        models = None
+        ok = [r for r in records if not r["failed"]]
+        if len(ok) >= self.min_samples:
+            key = "x_generic" if kernel is None else "x_kernel"
+            X = np.array([r[key] for r in ok], dtype=float)
+            Y = np.array([[math.log(1 + (r["y"][t] or 0)) for t in TARGETS] for r in ok], dtype=float)
+            X_all = np.array([r[key] for r in records], dtype=float)
+            fail = np.array([[float(r["failed"])] for r in records])
+            models = {
+                "key": key,
+                "qor": RidgeModel(self.ridge).fit(X, Y),
+                "fail": RidgeModel(self.ridge).fit(X_all, fail),
+            }
+        self._models[kernel] = (len(records), models)
+        return models
+
+    def predict(
+        self,
+        kernel: str,
+        src_base: str,
+        loop_dirs_batch: list,
+    ) -> list:
+        """
+        Predicted {"latency_cycles", "bram_tot", ..., "p_fail", "model"} per candidate.
+        """
+        nest = analyze(src_base)
+        with self._lock:
+            models = self._fit(kernel)
+            if models is None:
+                models = self._fit(None)
+
+        if models is None:
+            return [
+                {"latency_cycles": analytic_latency(nest, dirs), "p_fail": None, "model": "analytic"}
+                for dirs in loop_dirs_batch
+            ]
+
+        featurize = kernel_features if models["key"] == "x_kernel" else generic_features
+        X = np.array([featurize(nest, dirs) for dirs in loop_dirs_batch], dtype=float)
+        Y = np.expm1(models["qor"].predict(X))
+        p_fail = np.clip(models["fail"].predict(X)[:, 0], 0.0, 1.0)
+
+        preds = []
+        for i in range(len(loop_dirs_batch)):
+            pred = {t: float(max(Y[i, j], 0.0)) for j, t in enumerate(TARGETS)}
+            pred["p_fail"] = float(p_fail[i])
+            pred["model"] = "kernel" if models["key"] == "x_kernel" else "shared"
+            preds.append(pred)
+        return preds
+
+    def rank(
+        self,
+        kernel: str,
+        src_base: str,
+        loop_dirs_batch: list,
+        best_latency: float | None = None,
+        keep: int | None = None,
+        max_p_fail: float = 0.8,
+    ) -> list:
+        """
+        Order candidates by predicted latency and drop those predicted not to beat
+        best_latency or likely to fail; at least the top-ranked candidate is kept.
+        Returns [(loop_dirs, prediction), ...].
+        """
+        if not loop_dirs_batch:
+            return []
+        preds = self.predict(kernel, src_base, loop_dirs_batch)
+        ranked = sorted(zip(loop_dirs_batch, preds), key=lambda dp: dp[1]["latency_cycles"])
+
+        selected = [
+            (dirs, pred) for dirs, pred in ranked
+            if (best_latency is None or pred["latency_cycles"] < best_latency)
+            and (pred["p_fail"] is None or pred["p_fail"] <= max_p_fail)
+        ]
+        if not selected:
+            selected = ranked[:1]
+        return selected[:keep] if keep else selected
@@ -0,0 +1,59 @@
+##########################
+### VITIS HLS COMMANDS ###
+##########################
+
+proc configure_solution {} {
+    set_part { xcvh1582-vsva3697-2MP-e-S }
+
+    create_clock -period 4 -name default
+
+    config_compile -pipeline_loops 0
+}
+
+# synthesize ./EP_<episode_no>/sources/<kernel>_<episode_no>_<turn_no>.c into the
+# project <kernel>_<episode_no>_<turn_no>, both relative to the current directory
+proc synthesize {episode_no turn_no kernel top_fxn} {
+    open_project ${kernel}_${episode_no}_${turn_no}
+
+    set_top $top_fxn
+
+    add_files ./EP_${episode_no}/sources/${kernel}_${episode_no}_${turn_no}.c
+    open_solution "solution1" -flow_target vivado
+
+    configure_solution
+
+    #source "./${kernel}_XPRAG/solution1/directives.tcl"
+    #csim_design
+    csynth_design
+    #cosim_design
+    # export_design -format ip_catalog
+}
+
+# synthesize one unchanged source under several directive sets, as solutions
+# solution<i> of the single project <kernel>_<episode_no>_<turn_no>; solution<i>
+# sources ./EP_<episode_no>/directives/<kernel>_<episode_no>_<turn_no>_<i>.tcl.
+# Each solution is framed by "@@SOLUTION_BEGIN <i>" / "@@SOLUTION_END <i> <rc>",
+# and a failing solution does not stop the others
+proc synthesize_solutions {episode_no turn_no kernel top_fxn src solutions} {
+    open_project ${kernel}_${episode_no}_${turn_no}
+
+    set_top $top_fxn
+
+    add_files $src
+
+    foreach i $solutions {
+        puts "@@SOLUTION_BEGIN $i"
+        set rc [catch {
+            open_solution "solution$i" -flow_target vivado
+            configure_solution
+            source "./EP_${episode_no}/directives/${kernel}_${episode_no}_${turn_no}_${i}.tcl"
+            csynth_design
+        } err]
+        if {$rc} {
+            puts "ERROR: \[SOLUTION\] $err"
+        }
+        puts "@@SOLUTION_END $i $rc"
+    }
+
+    close_project
+}
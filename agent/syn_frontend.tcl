@@ -0,0 +1,31 @@
+# low-fidelity run: vitis_hls syn_frontend.tcl <episode_no> <turn_no> <kernel> <top_fxn>
+#
+# the flow of syn.tcl in the separate project <kernel>_<episode_no>_<turn_no>_lofi,
+# so that a full run afterwards starts from a clean project; the driver stops the
+# tool once the front end (compile/link, unroll/inline, array/struct, performance
+# and hw transforms) has reported its last instruction count, see
+# kill_policy.FrontEndDone
+if { $argc != 4 } {
+    puts "Usage: vitis_hls syn_frontend.tcl <episode_no> <turn_no> <kernel> <top_fxn>"
+    exit 1
+}
+
+set episode_no [lindex $argv 0]
+set turn_no [lindex $argv 1]
+set kernel [lindex $argv 2]
+set top_fxn [lindex $argv 3]
+
+source [file join [file dirname [info script]] syn_flow.tcl]
+
+open_project ${kernel}_${episode_no}_${turn_no}_lofi
+
+set_top $top_fxn
+
+add_files ./EP_${episode_no}/sources/${kernel}_${episode_no}_${turn_no}.c
+open_solution "solution1" -flow_target vivado
+
+configure_solution
+
+csynth_design
+
+exit
@@ -0,0 +1,20 @@
+# synthesize several directive sets of one turn as solutions of one project
+if { $argc < 6 } {
+    puts "Usage: vitis_hls syn_multi.tcl <episode_no> <turn_no> <kernel> <top_fxn> <src> <solution> \[<solution> ...\]"
+    exit 1
+}
+
+set episode_no [lindex $argv 0]
+set turn_no [lindex $argv 1]
+set kernel [lindex $argv 2]
+set top_fxn [lindex $argv 3]
+set src [lindex $argv 4]
+set solutions [lrange $argv 5 end]
+
+source [file join [file dirname [info script]] syn_flow.tcl]
+
+fconfigure stdout -buffering line
+
+synthesize_solutions $episode_no $turn_no $kernel $top_fxn $src $solutions
+
+exit
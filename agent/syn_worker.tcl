@@ -0,0 +1,42 @@
+# resident synthesis driver: vitis_hls syn_worker.tcl
+#
+# reads one command per line on stdin:
+#   job <job_id> <episode_no> <turn_no> <kernel> <top_fxn> <work_dir>
+#   quit
+# runs the same flow as syn.tcl from <work_dir> and ends the log of every job
+# with "@@JOB_DONE <job_id> <rc>", so tool startup, license checkout and part
+# loading are paid once per worker instead of once per turn
+
+source [file join [file dirname [info script]] syn_flow.tcl]
+
+fconfigure stdout -buffering line
+set home [pwd]
+
+puts "@@WORKER_READY"
+while {[gets stdin line] >= 0} {
+    set cmd [lindex $line 0]
+    if {$cmd eq "quit"} {
+        break
+    }
+    if {$cmd ne "job"} {
+        puts "@@ERROR unknown command: $line"
+        continue
+    }
+
+    lassign [lrange $line 1 end] job_id episode_no turn_no kernel top_fxn work_dir
+    set rc 0
+    if {[catch {
+        cd $work_dir
+        synthesize $episode_no $turn_no $kernel $top_fxn
+    } err]} {
+        puts "ERROR: \[WORKER\] $err"
+        set rc 1
+    }
+    # release the project so the next job (and the results move) can use it
+    catch {close_project}
+    cd $home
+
+    puts "@@JOB_DONE $job_id $rc"
+}
+
+exit
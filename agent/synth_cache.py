@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# relative location of the report directory inside a vitis project
+REPORT_SUBDIR = Path("solution1/syn/report")
+
+def tool_identity(command: list) -> str:
+    """
+    The resolved hls command line, so that results of different installs (the
+    install path carries the Vitis version) or of a stand-in never share entries.
+    """
+    exe = shutil.which(command[0])
+    return " ".join([os.path.realpath(exe) if exe else command[0], *command[1:]])
+
+class SynthCache:
+    """
+    Persistent, content-addressed store of synthesis results.
+
+    An entry is keyed by the hash of everything that determines the outcome of a
+    vitis_hls run: the rendered C source, the top function, the contents of
+    syn.tcl (which pins the part, the clock period and the flow options), the
+    tool that ran it (see tool_identity) and the count thresholds of the kernel's
+    kill configuration (which decide whether a run is killed or completes).
+    Each entry lives in <root>/<key[:2]>/<key>/ and holds meta.json (status with
+    log excerpts, QoR, bookkeeping) plus a copy of the csynth report directory.
+    Entries are evicted least-recently-used first once the store exceeds max_bytes.
+    """
+
+    # statuses that are a pure function of the inputs; "failed" is not cached
+    # because it is just as often a license or host problem as a design problem
+    CACHEABLE = ("completed", "killed")
+    # kills that are a pure function of the key; kills on a time budget depend on
+    # host load, memory kills on the host and its limits
+    CACHEABLE_KILLS = ("count_threshold",)
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = 20 * 2**30,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(
+        src: str,
+        top_fxn: str,
+        tcl: str,
+        tool: str,
+        thresholds: dict,
+    ) -> str:
+        h = hashlib.sha256()
+        for part in (src, top_fxn, tcl, tool, json.dumps(thresholds, sort_keys=True)):
+            data = part.encode("utf-8")
+            # length-prefix each field so that field boundaries cannot alias
+            h.update(len(data).to_bytes(8, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(
+        self,
+        key: str,
+        proj_dst: Path | None = None,
+    ) -> dict | None:
+        """
+        Return the cached meta for key (or None on a miss). If proj_dst is given,
+        the cached reports are restored to proj_dst/solution1/syn/report so the
+        result looks exactly like a freshly synthesized project.
+        """
+        entry = self._entry(key)
+        meta_path = entry / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if proj_dst is not None and (entry / "report").is_dir():
+            rpt_dst = Path(proj_dst) / REPORT_SUBDIR
+            shutil.rmtree(rpt_dst, ignore_errors=True)
+            shutil.copytree(entry / "report", rpt_dst)
+
+        # touch for LRU eviction
+        try:
+            os.utime(meta_path)
+        except FileNotFoundError:
+            pass
+        return meta
+
+    def put(
+        self,
+        key: str,
+        status: dict,
+        qor: dict | None = None,
+        proj_dir: Path | None = None,
+        **info,
+    ) -> bool:
+        """
+        Store status/QoR (and the reports of proj_dir, if any) under key.
+        Returns False if the status is not cacheable.
+        """
+        if status.get("status") not in self.CACHEABLE:
+            return False
+        if status["status"] == "killed" and (status.get("kill") or {}).get("policy") not in self.CACHEABLE_KILLS:
+            return False
+
+        entry = self._entry(key)
+        if entry.exists():
+            return True
+
+        # build the entry next to its final location and publish it with a single
+        # rename so concurrent readers and writers never see a partial entry
+        tmp = entry.parent / f".tmp-{uuid.uuid4().hex}"
+        tmp.mkdir(parents=True)
+        try:
+            rpt_src = Path(proj_dir) / REPORT_SUBDIR if proj_dir is not None else None
+            if rpt_src is not None and rpt_src.is_dir():
+                shutil.copytree(rpt_src, tmp / "report")
+
+            size = sum(p.stat().st_size for p in tmp.rglob("*") if p.is_file())
+            meta = {
+                "key": key,
+                "created": time.time(),
+                "status": status,
+                "qor": qor,
+                **info,
+            }
+            meta_text = json.dumps(meta)
+            meta["size"] = size + len(meta_text)
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+            try:
+                tmp.rename(entry)
+            except OSError:
+                # another writer published the same key first
+                shutil.rmtree(tmp, ignore_errors=True)
+                return True
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """
+        Drop least-recently-used entries until the store fits in max_bytes.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for meta_path in self.root.glob("*/*/meta.json"):
+                try:
+                    size = json.loads(meta_path.read_text(encoding="utf-8")).get("size", 0)
+                    last_used = meta_path.stat().st_mtime
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+                entries.append((last_used, size, meta_path.parent))
+                total += size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, entry in sorted(entries):
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                if total <= self.max_bytes:
+                    break
@@ -0,0 +1,502 @@
+"""
+Synthesis job queue shared by a coordinator (run.py --synth-queue DB) and worker
+daemons on any number of build hosts that can open DB (local disk for workers on
+the same box, otherwise a shared filesystem with working POSIX locks).
+
+    python synth_queue.py worker DB [--workers N] [--hls-command vitis_hls] [--scratch-dir DIR]
+    python synth_queue.py status DB
+
+The coordinator submits rendered sources; a worker leases a job, runs syn.tcl
+on it, streams the log back line batch by line batch (so the early-kill policies
+keep working) and finally pushes back the exit code and the project (or just its
+reports) as a tarball. Leases are renewed by a heartbeat; the job of a worker
+that stops renewing it (host or daemon died) is requeued for another worker,
+up to the max_attempts the coordinator submitted it with.
+"""
+import argparse
+import io
+import os
+import shlex
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import tarfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from synth_cache import REPORT_SUBDIR
+
+SYN_TCL = Path(__file__).resolve().parent / "syn.tcl"
+
+# first line of the log of a retried job, after the lines of the lost attempt
+WORKER_LOST = "@@WORKER_LOST"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    episode INTEGER NOT NULL,
+    turn_no TEXT NOT NULL,
+    kernel TEXT NOT NULL,
+    top_fxn TEXT NOT NULL,
+    source TEXT NOT NULL,
+    ship TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempt INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    rc INTEGER,
+    error TEXT,
+    project BLOB,
+    submitted REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS log (
+    job_id INTEGER NOT NULL,
+    attempt INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    PRIMARY KEY (job_id, attempt, seq)
+);
+"""
+
+
+class SynthQueue:
+    """
+    SQLite-backed job queue. Job states: queued -> leased -> done, or cancelled
+    (early kill by the coordinator). Every thread gets its own connection.
+    max_attempts is stored with every job submitted here, so that coordinator and
+    workers (whichever reclaims an expired lease first) apply the same limit.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        lease_s: float = 60.0,
+        max_attempts: int = 3,
+        poll_s: float = 0.2,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.poll_s = poll_s
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # coordinator side
+
+    def submit(
+        self,
+        episode_no: int,
+        turn_no: int | str,
+        kernel: str,
+        top_fxn: str,
+        work_dir: str | Path,
+        ship: str = "project",
+    ) -> "QueuedJob":
+        """
+        Queue EP_n/sources/{kernel}_{n}_{turn}.c of work_dir; the result is unpacked
+        into work_dir as the project {kernel}_{n}_{turn} (ship "reports": only its
+        report directory). Blocks until a worker has leased the job, so that the
+        kill budgets do not count the time spent in the queue; every job must be
+        handed back with release().
+        """
+        src = Path(work_dir) / f"EP_{episode_no}/sources/{kernel}_{episode_no}_{turn_no}.c"
+        with self._tx() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (episode, turn_no, kernel, top_fxn, source, ship, state, max_attempts, submitted) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (episode_no, str(turn_no), kernel, top_fxn, src.read_text(encoding="utf-8"), ship, self.max_attempts, time.time()),
+            )
+        job = QueuedJob(self, cur.lastrowid, Path(work_dir))
+        job.wait_leased()
+        return job
+
+    def cancel(self, job_id: int):
+        with self._tx() as conn:
+            conn.execute("UPDATE jobs SET state = 'cancelled', finished = ? WHERE id = ? AND state IN ('queued', 'leased')", (time.time(), job_id))
+
+    def release(self, job: "QueuedJob"):
+        # the log and the result were consumed, keep only the job's bookkeeping
+        self.cancel(job.job_id)
+        with self._tx() as conn:
+            conn.execute("UPDATE jobs SET project = NULL WHERE id = ?", (job.job_id,))
+            conn.execute("DELETE FROM log WHERE job_id = ?", (job.job_id,))
+
+    def _job(self, job_id: int) -> sqlite3.Row:
+        return self._conn().execute(
+            "SELECT state, attempt, worker, lease_until, rc, error, project FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+    def _log(
+        self,
+        job_id: int,
+        attempt: int,
+        seq: int,
+    ) -> list:
+        rows = self._conn().execute(
+            "SELECT line FROM log WHERE job_id = ? AND attempt = ? AND seq >= ? ORDER BY seq",
+            (job_id, attempt, seq),
+        ).fetchall()
+        return [row["line"] for row in rows]
+
+    def requeue_expired(self) -> int:
+        """
+        Hand the jobs of workers whose lease ran out to the next worker (or fail
+        them after their max_attempts); returns the number of jobs affected.
+        """
+        now = time.time()
+        with self._tx() as conn:
+            expired = conn.execute(
+                "SELECT id, attempt, max_attempts, worker FROM jobs WHERE state = 'leased' AND lease_until < ?", (now,)
+            ).fetchall()
+            for job in expired:
+                if job["attempt"] + 1 >= job["max_attempts"]:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'done', rc = NULL, error = ?, finished = ? WHERE id = ?",
+                        (f"worker {job['worker']} lost, giving up after {job['attempt'] + 1} attempts", now, job["id"]),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'queued', attempt = attempt + 1, worker = NULL, lease_until = NULL WHERE id = ?",
+                        (job["id"],),
+                    )
+        return len(expired)
+
+    def stats(self) -> dict:
+        rows = self._conn().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        workers = self._conn().execute("SELECT DISTINCT worker FROM jobs WHERE state = 'leased'").fetchall()
+        return {"jobs": {row["state"]: row["n"] for row in rows}, "busy_workers": sorted(row["worker"] for row in workers)}
+
+    # worker side
+
+    def claim(self, worker: str) -> sqlite3.Row | None:
+        self.requeue_expired()
+        with self._tx() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE state = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if job is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ? WHERE id = ?",
+                (worker, time.time() + self.lease_s, job["id"]),
+            )
+        return job
+
+    def heartbeat(
+        self,
+        job_id: int,
+        attempt: int,
+        worker: str,
+    ) -> bool:
+        """
+        Renew the lease; False if the job is no longer this worker's to run
+        (cancelled, or requeued after a missed heartbeat).
+        """
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND attempt = ? AND worker = ? AND state = 'leased'",
+                (time.time() + self.lease_s, job_id, attempt, worker),
+            )
+        return cur.rowcount == 1
+
+    def append_log(
+        self,
+        job_id: int,
+        attempt: int,
+        seq: int,
+        lines: list,
+    ):
+        with self._tx() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO log VALUES (?, ?, ?, ?)",
+                [(job_id, attempt, seq + i, line) for i, line in enumerate(lines)],
+            )
+
+    def finish(
+        self,
+        job_id: int,
+        attempt: int,
+        worker: str,
+        rc: int,
+        project: bytes | None,
+    ):
+        with self._tx() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'done', rc = ?, project = ?, finished = ? "
+                "WHERE id = ? AND attempt = ? AND worker = ? AND state = 'leased'",
+                (rc, project, time.time(), job_id, attempt, worker),
+            )
+
+
+class QueuedJob:
+    """
+    A job on the queue, with the subset of the subprocess.Popen interface used by
+    Trajectory.synthesize_design (stdout, wait; pid is None, the process runs on
+    some other host). stdout follows the log the worker streams back; if the
+    worker is lost, a WORKER_LOST line is followed by the log of the next attempt.
+    """
+
+    def __init__(
+        self,
+        queue: SynthQueue,
+        job_id: int,
+        work_dir: Path,
+    ):
+        self.queue = queue
+        self.job_id = job_id
+        self.work_dir = work_dir
+        self.pid = None
+        self.rc = None
+        self.error = None
+        self.finished = False
+        self.stdout = self._lines()
+
+    def wait_leased(self):
+        next_requeue = time.monotonic() + self.queue.lease_s
+        while self.queue._job(self.job_id)["state"] == "queued":
+            # the coordinator reaps dead workers too, in case no worker is polling
+            if time.monotonic() > next_requeue:
+                self.queue.requeue_expired()
+                next_requeue = time.monotonic() + self.queue.lease_s
+            time.sleep(self.queue.poll_s)
+
+    def _lines(self):
+        attempt, seq = 0, 0
+        next_requeue = time.monotonic() + self.queue.lease_s
+        while True:
+            lines = self.queue._log(self.job_id, attempt, seq)
+            yield from lines
+            seq += len(lines)
+            if lines:
+                continue
+
+            job = self.queue._job(self.job_id)
+            if job["attempt"] != attempt:
+                self.wait_leased()
+                yield f"{WORKER_LOST} job {self.job_id} attempt {attempt} lost with its worker, retrying\n"
+                attempt, seq = job["attempt"], 0
+                continue
+            if job["state"] in ("done", "cancelled"):
+                # lines the worker pushed right before finishing
+                yield from self.queue._log(self.job_id, attempt, seq)
+                self._collect(job)
+                return
+
+            if time.monotonic() > next_requeue:
+                self.queue.requeue_expired()
+                next_requeue = time.monotonic() + self.queue.lease_s
+            time.sleep(self.queue.poll_s)
+
+    def _collect(self, job: sqlite3.Row):
+        self.error = job["error"]
+        if job["state"] != "done" or job["rc"] is None:
+            return
+        if job["project"] is not None:
+            with tarfile.open(fileobj=io.BytesIO(job["project"]), mode="r:gz") as tar:
+                tar.extractall(self.work_dir, filter="data")
+        self.rc = job["rc"]
+        self.finished = True
+
+    def wait(self, timeout: float | None = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.finished:
+            job = self.queue._job(self.job_id)
+            if job["state"] in ("done", "cancelled"):
+                self._collect(job)
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(f"synth_queue job {self.job_id}", timeout)
+            time.sleep(self.queue.poll_s)
+        # cancelled or lost for good: never a success
+        return self.rc if self.finished else 1
+
+    def cancel(self):
+        self.queue.cancel(self.job_id)
+
+
+class QueueWorker:
+    """
+    Runs queued jobs one at a time with hls_command in scratch directories under
+    root. The vitis_hls process group is killed when the job is cancelled or the
+    lease is lost.
+    """
+
+    def __init__(
+        self,
+        queue: SynthQueue,
+        name: str,
+        root: str | Path,
+        hls_command: list | None = None,
+        flush_s: float = 0.25,
+        flush_lines: int = 500,
+    ):
+        self.queue = queue
+        self.name = name
+        self.root = Path(root)
+        self.hls_command = hls_command or ["vitis_hls"]
+        self.flush_s = flush_s
+        self.flush_lines = flush_lines
+
+    def _heartbeat(
+        self,
+        job: sqlite3.Row,
+        proc: subprocess.Popen,
+        done: threading.Event,
+    ):
+        while not done.wait(self.queue.lease_s / 3):
+            if not self.queue.heartbeat(job["id"], job["attempt"], self.name):
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                return
+
+    def run_job(self, job: sqlite3.Row):
+        name = f"{job['kernel']}_{job['episode']}_{job['turn_no']}"
+        job_dir = self.root / f"job_{job['id']}_{job['attempt']}"
+        src = job_dir / f"EP_{job['episode']}/sources/{name}.c"
+        src.parent.mkdir(parents=True, exist_ok=True)
+        src.write_text(job["source"], encoding="utf-8")
+
+        env = os.environ.copy()
+        env["PYTHONUNBUFFERED"] = "1"
+        proc = subprocess.Popen(
+            [*self.hls_command, str(SYN_TCL), str(job["episode"]), job["turn_no"], job["kernel"], job["top_fxn"]],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+            cwd=job_dir,
+            start_new_session=True,
+        )
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job, proc, done), daemon=True).start()
+
+        seq = 0
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            for line in proc.stdout:
+                batch.append(line)
+                if len(batch) >= self.flush_lines or time.monotonic() - last_flush > self.flush_s:
+                    self.queue.append_log(job["id"], job["attempt"], seq, batch)
+                    seq += len(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+            if batch:
+                self.queue.append_log(job["id"], job["attempt"], seq, batch)
+            rc = proc.wait()
+        finally:
+            done.set()
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+
+        project = None
+        proj_dir = job_dir / name
+        if proj_dir.exists():
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+                if job["ship"] == "reports":
+                    tar.add(proj_dir / REPORT_SUBDIR, arcname=f"{name}/{REPORT_SUBDIR}")
+                else:
+                    tar.add(proj_dir, arcname=name)
+            project = buf.getvalue()
+        self.queue.finish(job["id"], job["attempt"], self.name, rc, project)
+
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    def run(
+        self,
+        idle_exit_s: float | None = None,
+        stop: threading.Event | None = None,
+    ):
+        """
+        Serve jobs until stop is set (or after idle_exit_s without work).
+        """
+        stop = stop or threading.Event()
+        idle_since = time.monotonic()
+        while not stop.is_set():
+            job = self.queue.claim(self.name)
+            if job is None:
+                if idle_exit_s is not None and time.monotonic() - idle_since > idle_exit_s:
+                    return
+                stop.wait(self.queue.poll_s * 5)
+                continue
+            try:
+                self.run_job(job)
+            except Exception as e:
+                print(f"[{self.name}] job {job['id']} failed: {e!r}")
+                self.queue.finish(job["id"], job["attempt"], self.name, 1, None)
+            idle_since = time.monotonic()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="serve jobs on this host")
+    worker.add_argument("db")
+    worker.add_argument("--workers", type=int, default=1, help="concurrent vitis_hls runs on this host")
+    worker.add_argument("--hls-command", default="vitis_hls")
+    worker.add_argument("--scratch-dir", default=None, help="where projects are built (default: a directory next to the queue)")
+    worker.add_argument("--name", default=f"{socket.gethostname()}:{os.getpid()}")
+    worker.add_argument("--lease-s", type=float, default=60.0)
+    worker.add_argument("--idle-exit-s", type=float, default=None, help="exit after this long without jobs")
+    status = sub.add_parser("status", help="job counts and busy workers")
+    status.add_argument("db")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(SynthQueue(args.db).stats())
+        return
+
+    queue = SynthQueue(args.db, lease_s=args.lease_s)
+    root = Path(args.scratch_dir or Path(args.db).resolve().parent / "queue_scratch") / args.name.replace(":", "_")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    threads = [
+        threading.Thread(
+            target=QueueWorker(queue, f"{args.name}/{i}", root / str(i), hls_command=shlex.split(args.hls_command)).run,
+            args=(args.idle_exit_s, stop),
+        )
+        for i in range(args.workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        stop.set()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import copy
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from kill_policy import PHASE_ORDER, PHASE_RE
+
+# span attributes exported as Prometheus labels; everything else only goes to the JSONL
+LABELS = ("kernel", "agent", "phase", "status")
+# numeric span attributes summed (tokens) or maxed (memory) per label set
+SUMS = ("prompt_tokens", "completion_tokens")
+MAXES = ("peak_rss_bytes",)
+
+# what vitis_hls does after the last instruction count message (scheduling, binding, RTL)
+TAIL_PHASE = "Schedule/Bind/RTL"
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def groups_rss(pgids) -> dict:
+    """
+    Resident set size (bytes) summed over the live processes of each process group
+    in pgids, from a single pass over /proc.
+    """
+    totals = dict.fromkeys(pgids, 0)
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:  # exited meanwhile
+            continue
+        # the command name may contain spaces, the fields after it do not
+        fields = stat[stat.rfind(b")") + 2:].split()
+        pgrp = int(fields[2])
+        if pgrp in totals:
+            totals[pgrp] += int(fields[21]) * PAGE_SIZE
+    return totals
+
+def group_rss(pgid: int) -> int:
+    """
+    Resident set size (bytes) summed over the live processes of process group pgid.
+    """
+    return groups_rss([pgid])[pgid]
+
+def lm_usage(prediction) -> dict:
+    """
+    Token counts of a dspy prediction (requires dspy.settings.track_usage), summed
+    over the models it called.
+    """
+    totals = {"prompt_tokens": 0, "completion_tokens": 0}
+    get_usage = getattr(prediction, "get_lm_usage", None)
+    for usage in ((get_usage() if get_usage is not None else None) or {}).values():
+        for key in totals:
+            totals[key] += (usage or {}).get(key) or 0
+    return totals
+
+
+class Telemetry:
+    """
+    Timing and resource spans of the trajectory pipeline (LLM calls, rendering,
+    vitis_hls runs and their phases, report parsing, file moves), shared by all
+    trajectories of a run.
+
+    Every span is appended to jsonl_path as one record {"span", "start",
+    "duration_s", **attrs}; per (span, label set) totals are kept in memory and
+    written to prom_path in the Prometheus text format (for node_exporter's
+    textfile collector) at most every prom_interval_s and on close(). Without
+    either path, spans are not recorded at all.
+
+    bind() returns a view adding fixed attributes (kernel, trajectory) to every
+    span of one trajectory.
+    """
+
+    def __init__(
+        self,
+        jsonl_path: str | Path | None = None,
+        prom_path: str | Path | None = None,
+        prom_interval_s: float = 15.0,
+    ):
+        self.jsonl_path = Path(jsonl_path) if jsonl_path is not None else None
+        self.prom_path = Path(prom_path) if prom_path is not None else None
+        self.prom_interval_s = prom_interval_s
+        self.enabled = self.jsonl_path is not None or self.prom_path is not None
+        self.context = {}
+        self._totals = {}  # (span, labels) -> {"count", "seconds", "max_s", <sum/max attrs>}
+        self._lock = threading.Lock()
+        self._file = None
+        self._prom_written = 0.0
+        self._root = self
+        if self.jsonl_path is not None:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.jsonl_path.open("a", encoding="utf-8")
+
+    def bind(self, **context) -> "Telemetry":
+        view = copy.copy(self)
+        view.context = {**self.context, **context}
+        return view
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        duration_s: float,
+        **attrs,
+    ):
+        """
+        Record a finished span (start is a time.time() timestamp).
+        """
+        if not self.enabled:
+            return
+        attrs = {**self.context, **attrs}
+        labels = tuple((k, str(attrs[k])) for k in LABELS if attrs.get(k) is not None)
+        root = self._root
+
+        with root._lock:
+            totals = root._totals.setdefault((name, labels), {"count": 0, "seconds": 0.0, "max_s": 0.0})
+            totals["count"] += 1
+            totals["seconds"] += duration_s
+            totals["max_s"] = max(totals["max_s"], duration_s)
+            for key in SUMS:
+                if attrs.get(key) is not None:
+                    totals[key] = totals.get(key, 0) + attrs[key]
+            for key in MAXES:
+                if attrs.get(key) is not None:
+                    totals[key] = max(totals.get(key, 0), attrs[key])
+
+            if root._file is not None:
+                record = {"span": name, "start": round(start, 6), "duration_s": round(duration_s, 6), **attrs}
+                root._file.write(json.dumps(record, default=str) + "\n")
+                root._file.flush()
+            write_prom = root.prom_path is not None and time.time() - root._prom_written >= root.prom_interval_s
+        if write_prom:
+            root.write_prometheus()
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time the body as span name; the yielded dict takes attributes known only at
+        the end (token counts, status, ...).
+        """
+        start = time.time()
+        t0 = time.perf_counter()
+        extra = {}
+        try:
+            yield extra
+        finally:
+            self.record(name, start, time.perf_counter() - t0, **attrs, **extra)
+
+    @contextmanager
+    def acquire(self, lock, name: str, **attrs):
+        """
+        Enter lock (e.g. the shared synthesis slots), recording the wait as span name.
+        """
+        start = time.time()
+        t0 = time.perf_counter()
+        with lock:
+            self.record(name, start, time.perf_counter() - t0, **attrs)
+            yield
+
+    def summary(self) -> dict:
+        """
+        Total seconds and count per span name.
+        """
+        root = self._root
+        summary = {}
+        with root._lock:
+            for (name, _), totals in root._totals.items():
+                s = summary.setdefault(name, {"count": 0, "seconds": 0.0})
+                s["count"] += totals["count"]
+                s["seconds"] += totals["seconds"]
+        return {name: {**s, "seconds": round(s["seconds"], 3)} for name, s in sorted(summary.items())}
+
+    def write_prometheus(self):
+        root = self._root
+        if root.prom_path is None:
+            return
+
+        def series(metric: str, name: str, labels: tuple, value) -> str:
+            label_str = ",".join(f'{k}="{v}"' for k, v in (("span", name), *labels))
+            return f"{metric}{{{label_str}}} {value}"
+
+        with root._lock:
+            items = sorted((key, dict(totals)) for key, totals in root._totals.items())
+            root._prom_written = time.time()
+
+        lines = []
+        metrics = [
+            ("rl4hls_span_seconds_total", "counter", "Wall-clock seconds spent in the span", "seconds"),
+            ("rl4hls_span_count_total", "counter", "Number of finished spans", "count"),
+            ("rl4hls_span_max_seconds", "gauge", "Longest single span", "max_s"),
+        ]
+        metrics += [(f"rl4hls_span_{key}_total", "counter", f"Sum of {key} over the spans", key) for key in SUMS]
+        metrics += [(f"rl4hls_span_{key}", "gauge", f"Maximum {key} over the spans", key) for key in MAXES]
+        for metric, kind, help_text, key in metrics:
+            rows = [series(metric, name, labels, totals[key]) for (name, labels), totals in items if key in totals]
+            if rows:
+                lines += [f"# HELP {metric} {help_text}.", f"# TYPE {metric} {kind}", *rows]
+        lines += [
+            "# HELP rl4hls_process_peak_rss_bytes Peak RSS of the agent process.",
+            "# TYPE rl4hls_process_peak_rss_bytes gauge",
+            f"rl4hls_process_peak_rss_bytes {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}",
+        ]
+
+        # written atomically, the textfile collector may read it at any time
+        root.prom_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = root.prom_path.with_name(f".{root.prom_path.name}.{os.getpid()}.tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, root.prom_path)
+
+    def close(self):
+        root = self._root
+        root.write_prometheus()
+        with root._lock:
+            if root._file is not None:
+                root._file.close()
+                root._file = None
+
+
+class PhaseClock:
+    """
+    Splits one vitis_hls run into its compilation phases, timestamped from the log
+    stream: a phase ends with its [HLS 200-1995] instruction count message, the
+    next one starts there. finish() records the phase still running (TAIL_PHASE
+    after the last message of PHASE_ORDER).
+    """
+
+    def __init__(self, telemetry: Telemetry, **attrs):
+        self.telemetry = telemetry
+        self.attrs = attrs
+        self.phase = None
+        self.phase_start = None
+
+    def start(self, **attrs):
+        self.phase = PHASE_ORDER[0]
+        self.phase_start = time.time()
+        self.attrs.update(attrs)
+
+    def on_event(self, event: dict):
+        if self.phase is None:
+            return
+        m = PHASE_RE.search(event["message"])
+        if m is None:
+            return
+        now = time.time()
+        done = m.group(1)
+        self.telemetry.record("hls_phase", self.phase_start, now - self.phase_start, phase=done, **self.attrs)
+        try:
+            self.phase = PHASE_ORDER[PHASE_ORDER.index(done) + 1]
+        except ValueError:
+            self.phase = "unknown"
+        except IndexError:
+            self.phase = TAIL_PHASE
+        self.phase_start = now
+
+    def finish(self, **attrs):
+        if self.phase is None:
+            return
+        now = time.time()
+        self.telemetry.record("hls_phase", self.phase_start, now - self.phase_start, phase=self.phase, **self.attrs, **attrs)
+        self.phase = None
+
+
+class RSSSampler:
+    """
+    Samples the RSS of a process group every interval seconds from a daemon thread
+    between start() and stop() (or as a context manager); peak holds the largest sample (bytes), or
+    None if sampling is off (interval None).
+    """
+
+    def __init__(self, pgid: int, interval: float | None = 1.0):
+        self.pgid = pgid
+        self.interval = interval
+        self.peak = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while True:
+            self.peak = max(self.peak or 0, group_rss(self.pgid))
+            if self._done.wait(self.interval):
+                return
+
+    def start(self):
+        if self.interval is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,94 @@
+import threading
+
+class TurnBudget:
+    """
+    Turn budget shared by all trajectories of a run.
+
+    Every trajectory is entitled to base_turns turns after its base design, but
+    stops as soon as it converges: its best latency has not improved by more than
+    min_improvement (relative) for patience turns, or its last turn evaluated only
+    directive sets it had evaluated before (the agent is going in circles). The
+    turns a converged trajectory leaves unused go to a pool, from which
+    trajectories that are still improving (their last turn improved the best
+    latency by more than min_improvement) draw extra turns, up to max_turns each.
+    The total number of turns therefore never exceeds base_turns per trajectory.
+    """
+
+    def __init__(
+        self,
+        base_turns: int = 4,
+        max_turns: int = 8,
+        patience: int = 2,
+        min_improvement: float = 0.01,
+    ):
+        self.base_turns = base_turns
+        self.max_turns = max_turns
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.pool = 0
+        self.stopped_early = 0
+        self.extra_turns = 0
+        self._lock = threading.Lock()
+        self._trajs = {}
+
+    def open(self, key: str):
+        with self._lock:
+            self._trajs[key] = {"best": [], "seen": set(), "repeated": False}
+
+    def observe(
+        self,
+        key: str,
+        best_latency: int | None,
+        config_hashes: list,
+    ):
+        """
+        Record a finished turn: the best latency so far and the directive hashes of
+        its candidates.
+        """
+        with self._lock:
+            traj = self._trajs[key]
+            traj["best"].append(float("inf") if best_latency is None else best_latency)
+            traj["repeated"] = bool(traj["best"][1:]) and all(h in traj["seen"] for h in config_hashes)
+            traj["seen"].update(config_hashes)
+
+    def _improved(self, best: list, turns: int) -> bool:
+        # better by more than min_improvement than turns turns ago
+        if len(best) <= turns:
+            return True
+        before, now = best[-1 - turns], best[-1]
+        if now == float("inf"):
+            return False
+        return before == float("inf") or now < before * (1 - self.min_improvement)
+
+    def next_turn(self, key: str, turn: int) -> bool:
+        """
+        Whether the trajectory should run turn (1 = first turn after the base design).
+        """
+        with self._lock:
+            traj = self._trajs[key]
+            reason = None
+            if traj["repeated"]:
+                reason = "repeated directive sets"
+            elif not self._improved(traj["best"], self.patience):
+                reason = f"no improvement over {self.patience} turns"
+
+            if reason is not None:
+                unused = max(0, self.base_turns - (turn - 1))
+                if unused:
+                    self.pool += unused
+                    self.stopped_early += 1
+                    print(f"turn budget: {key} converged after turn {turn - 1} ({reason}), {unused} turns freed")
+                return False
+
+            if turn <= self.base_turns:
+                return True
+            if turn > self.max_turns or self.pool == 0 or not self._improved(traj["best"], 1):
+                return False
+            self.pool -= 1
+            self.extra_turns += 1
+            print(f"turn budget: {key} still improving, extra turn {turn} ({self.pool} left)")
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"stopped_early": self.stopped_early, "extra_turns": self.extra_turns, "unused_turns": self.pool}